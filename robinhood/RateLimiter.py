@@ -0,0 +1,35 @@
+import threading
+import time
+
+
+class RateLimiter:
+  """
+  A token bucket shared by every thread making requests through a client.
+
+  Tokens refill at `rate` per second up to `burst`, each request takes one and
+  blocks until one is available.
+  """
+  def __init__(self, rate, burst):
+    self._rate = rate
+    self._burst = burst
+    self._tokens = burst
+    self._updated_at = time.monotonic()
+    self._lock = threading.Lock()
+
+  def acquire(self):
+    while True:
+      with self._lock:
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+        if self._tokens >= 1:
+          self._tokens -= 1
+          return
+        wait_seconds = (1 - self._tokens) / self._rate
+      time.sleep(wait_seconds)
+
+  def backoff(self, seconds):
+    """Drain the bucket so nobody makes a request for the given number of seconds, e.g. after a 429."""
+    with self._lock:
+      self._tokens = min(self._tokens, 0) - seconds * self._rate
+      self._updated_at = time.monotonic()
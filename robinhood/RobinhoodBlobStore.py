@@ -0,0 +1,91 @@
+import hashlib
+import mmap
+import os
+import tempfile
+
+from .exceptions import CorruptCacheEntry
+from .util import DOWNLOAD_CHUNK_SIZE
+
+
+class RobinhoodBlobStore:
+  """
+  Content addressed storage for binary payloads like document PDFs.
+
+  Each blob is named by the sha256 of its bytes and sharded two levels deep by
+  its first four hex characters, e.g. blobs/3f/a1/3fa1..., so no directory gets
+  huge. Blobs are immutable, written to a temporary file while being hashed and
+  then moved into place, so identical payloads are only stored once and a
+  partial write never shows up. Reads check the bytes still match their name.
+  """
+  def __init__(self, root_path):
+    self._root_path = root_path
+    if not os.path.exists(root_path):
+      os.makedirs(root_path)
+
+  def get_path(self, digest):
+    return os.path.join(self._root_path, digest[:2], digest[2:4], digest)
+
+  def exists(self, digest):
+    return os.path.exists(self.get_path(digest))
+
+  def write_chunks(self, chunks):
+    """Stores the bytes of an iterable of chunks, returning (digest, size)."""
+    sha256 = hashlib.sha256()
+    size = 0
+    temporary_file = tempfile.NamedTemporaryFile(dir=self._root_path, prefix='.incoming_', delete=False)
+    try:
+      with temporary_file:
+        for chunk in chunks:
+          sha256.update(chunk)
+          size += len(chunk)
+          temporary_file.write(chunk)
+      digest = sha256.hexdigest()
+      blob_path = self.get_path(digest)
+      os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+      # Immutable, so anything already there is the same bytes
+      os.replace(temporary_file.name, blob_path)
+    finally:
+      if os.path.exists(temporary_file.name):
+        os.remove(temporary_file.name)
+    return digest, size
+
+  def write(self, content):
+    return self.write_chunks([content])
+
+  def write_file(self, file_path):
+    """Stores a copy of the file at file_path, a chunk at a time."""
+    with open(file_path, 'rb') as source_file:
+      return self.write_chunks(iter(lambda: source_file.read(DOWNLOAD_CHUNK_SIZE), b''))
+
+  def open(self, digest, verify=True):
+    """
+    Returns the blob as an open binary file, positioned at the start. With
+    verify, it's read through once first and CorruptCacheEntry is raised if the
+    bytes don't match the digest.
+    """
+    blob_file = open(self.get_path(digest), 'rb')
+    if verify:
+      sha256 = hashlib.sha256()
+      for chunk in iter(lambda: blob_file.read(DOWNLOAD_CHUNK_SIZE), b''):
+        sha256.update(chunk)
+      if sha256.hexdigest() != digest:
+        blob_file.close()
+        raise CorruptCacheEntry('Blob {} does not match its digest'.format(digest))
+      blob_file.seek(0)
+    return blob_file
+
+  def map(self, digest, verify=True):
+    """Returns the blob as a read only memory map, see open."""
+    with open(self.get_path(digest), 'rb') as blob_file:
+      if not os.fstat(blob_file.fileno()).st_size:
+        raise ValueError("Empty blobs can't be memory mapped, use open")
+      blob_map = mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ)
+    if verify and hashlib.sha256(blob_map).hexdigest() != digest:
+      blob_map.close()
+      raise CorruptCacheEntry('Blob {} does not match its digest'.format(digest))
+    return blob_map
+
+  def remove(self, digest):
+    blob_path = self.get_path(digest)
+    if os.path.exists(blob_path):
+      os.remove(blob_path)
@@ -1,15 +1,20 @@
 """
 A wrapper of RobinhoodClient that introduces a caching layer.
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 import getpass
 import json
 import logging
 import os
+import time
 
-from .exceptions import MfaRequired
-from .RobinhoodClient import RobinhoodClient
-from .util import get_last_id_from_url
+from . import cache_format
+from .exceptions import CorruptCacheEntry, MfaRequired, NotFound
+from .RobinhoodBlobStore import RobinhoodBlobStore
+from .RobinhoodClient import RobinhoodClient, POSITION_INDEX_MAX_AGE
+from .RobinhoodInstrumentUniverse import RobinhoodInstrumentUniverse
+from .RobinhoodOptionsChainIndex import RobinhoodOptionsChainIndex
+from .util import get_last_id_from_url, FINAL_ORDER_STATES
 
 cache_root_path = '.robinhood'
 if not os.path.exists(cache_root_path):
@@ -20,9 +25,32 @@ CACHE_FIRST = 'CACHE_FIRST'
 FORCE_LIVE = 'FORCE_LIVE'
 FORCE_CACHE = 'FORCE_CACHE'
 
+# How long to remember that something doesn't exist by default. Things that can
+# show up any moment, e.g. a position as soon as an order fills, pass their own
+# shorter not_found_ttl.
+NOT_FOUND_TTL = timedelta(hours=1)
+# Options prices move fast but pricing a chain is a lot of requests
+OPTIONS_MARKETDATA_TTL = timedelta(seconds=30)
+# Collateral is live account state, it changes with every options position
+OPTIONS_COLLATERAL_TTL = timedelta(seconds=30)
+# Chains gain expiration dates and contracts change state, but rarely within a day
+OPTIONS_CHAIN_TTL = timedelta(hours=12)
+OPTIONS_INSTRUMENT_TTL = timedelta(hours=12)
+CRYPTO_CURRENCY_PAIR_TTL = timedelta(days=1)
+# Names get added to and removed from watchlists from the app at any time
+WATCHLIST_TTL = timedelta(minutes=5)
+
+
+def _is_order_final(order):
+  return order['state'] in FINAL_ORDER_STATES
+
+
 class RobinhoodCachedClient(RobinhoodClient):
   def __init__(self):
     super(RobinhoodCachedClient, self).__init__()
+    self._instrument_universe = None
+    self._options_chain_index_by_chain_id = {}
+    self._blob_store = RobinhoodBlobStore(os.path.join(cache_root_path, 'blobs'))
     self.confirm_disclosures_if_needed()
 
   def confirm_disclosures_if_needed(self):
@@ -109,25 +137,120 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
     if self._oauth2_refresh_token:
       self.clear_auth_token()
 
-  def _simple_call(self, cache_name, method, cache_mode, args=[], kwargs={}, binary=False):
+  def _is_cache_fresh(self, cache_path, ttl):
+    if ttl is None:
+      return True
+    return time.time() - os.path.getmtime(cache_path) < ttl.total_seconds()
+
+  def _is_not_found_cached(self, cache_name, not_found_ttl=NOT_FOUND_TTL):
+    not_found_cache_path = os.path.join(cache_root_path, 'not_found_{}'.format(cache_name))
+    if not os.path.exists(not_found_cache_path):
+      return False
+    return self._is_cache_fresh(not_found_cache_path, not_found_ttl)
+
+  def _cache_not_found(self, cache_name):
+    with open(os.path.join(cache_root_path, 'not_found_{}'.format(cache_name)), 'w') as not_found_cache_file:
+      not_found_cache_file.write(datetime.now().isoformat())
+
+  def _clear_not_found(self, cache_name):
+    not_found_cache_path = os.path.join(cache_root_path, 'not_found_{}'.format(cache_name))
+    if os.path.exists(not_found_cache_path):
+      os.remove(not_found_cache_path)
+
+  def _invalidate(self, cache_name):
     cache_path = os.path.join(cache_root_path, cache_name)
-    binary_flag = 'b' if binary else ''
-    if os.path.exists(cache_path) and cache_mode != FORCE_LIVE:
+    if os.path.exists(cache_path):
+      os.remove(cache_path)
+
+  def _load_cached(self, cache_name):
+    """The cached content, or None after dropping the entry if it's corrupt."""
+    try:
+      return cache_format.load(os.path.join(cache_root_path, cache_name))
+    except CorruptCacheEntry as e:
+      logging.warning('Dropping cached {}: {}'.format(cache_name, e))
+      self._invalidate(cache_name)
+      return None
+
+  def _write_blob_entry(self, cache_path, digest, size):
+    cache_format.dump({'blob': digest, 'size': size}, cache_path)
+
+  def _get_blob_digest(self, cache_path):
+    """The digest a binary cache entry points to, moving entries from before the blob store into it."""
+    with open(cache_path, 'rb') as cache_file:
+      head = cache_file.read(len(cache_format.MAGIC))
+    # Pointers are cache entries, or plain json from before the cache format had a header
+    if head == cache_format.MAGIC or head.startswith(b'{'):
+      blob_entry = cache_format.load(cache_path)
+      if not isinstance(blob_entry, dict) or 'blob' not in blob_entry:
+        raise CorruptCacheEntry('Bad blob pointer')
+      return blob_entry['blob']
+    digest, size = self._blob_store.write_file(cache_path)
+    self._write_blob_entry(cache_path, digest, size)
+    return digest
+
+  def _open_blob_entry(self, cache_path):
+    digest = self._get_blob_digest(cache_path)
+    if not self._blob_store.exists(digest):
+      raise CorruptCacheEntry('Blob {} is missing'.format(digest))
+    return self._blob_store.open(digest)
+
+  def _simple_call(
+      self,
+      cache_name,
+      method,
+      cache_mode,
+      args=[],
+      kwargs={},
+      binary=False,
+      ttl=None,
+      not_found_ttl=NOT_FOUND_TTL,
+      is_final=None):
+    """
+    ttl is how long the cached content is good for, None means forever. If given,
+    is_final(content) says whether cached content can't change anymore, anything
+    else is refetched (outside of FORCE_CACHE). Final content is used even under
+    FORCE_LIVE, since fetching it again can't turn up anything new.
+
+    With binary, method returns the content as an iterable of byte chunks that
+    are streamed into the blob store, and the content is returned as an open
+    binary file for the caller to close.
+    """
+    cache_path = os.path.join(cache_root_path, cache_name)
+    use_cache = cache_mode != FORCE_LIVE or is_final is not None
+    if os.path.exists(cache_path) and use_cache and self._is_cache_fresh(cache_path, ttl):
       logging.debug('Getting {} from cache'.format(cache_name))
-      with open(cache_path, 'r' + binary_flag) as cache_file:
+      try:
         if binary:
-          return cache_file.read()
-        else:
-          return json.load(cache_file)
+          return self._open_blob_entry(cache_path)
+        cached_content = cache_format.load(cache_path)
+      except CorruptCacheEntry as e:
+        logging.warning('Dropping cached {}: {}'.format(cache_name, e))
+        self._invalidate(cache_name)
+        if cache_mode == FORCE_CACHE:
+          return None
+        return self._simple_call(cache_name, method, FORCE_LIVE, args=args, kwargs=kwargs, binary=binary)
+      if cache_mode == FORCE_CACHE or is_final is None or is_final(cached_content):
+        return cached_content
+      return self._simple_call(cache_name, method, FORCE_LIVE, args=args, kwargs=kwargs, binary=binary)
     elif cache_mode == FORCE_CACHE:
       return None
+    elif cache_mode != FORCE_LIVE and self._is_not_found_cached(cache_name, not_found_ttl):
+      logging.debug('Getting {} not found from cache'.format(cache_name))
+      raise NotFound()
     else:
-      live_content = method(*args, **kwargs)
-      with open(cache_path, 'w' + binary_flag) as cache_file:
+      try:
+        live_content = method(*args, **kwargs)
         if binary:
-          cache_file.write(live_content)
-        else:
-          json.dump(live_content, cache_file)
+          # Chunks stream in as they're written, so errors can show up here too
+          digest, size = self._blob_store.write_chunks(live_content)
+      except NotFound:
+        self._cache_not_found(cache_name)
+        raise
+      self._clear_not_found(cache_name)
+      if binary:
+        self._write_blob_entry(cache_path, digest, size)
+        return self._blob_store.open(digest, verify=False)
+      cache_format.dump(live_content, cache_path)
       return live_content
 
   def get_user(self, cache_mode=CACHE_FIRST):
@@ -187,15 +310,43 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
     )
 
   def download_document_by_id(self, document_id, cache_mode=CACHE_FIRST):
+    """The document's PDF as bytes, see open_document_by_id to stream it instead."""
+    document_file = self.open_document_by_id(document_id, cache_mode=cache_mode)
+    if document_file is None:
+      return None
+    with document_file:
+      return document_file.read()
+
+  def open_document_by_id(self, document_id, cache_mode=CACHE_FIRST):
+    """The document's PDF as an open binary file for the caller to close."""
     return self._simple_call(
       'document_pdf_{}'.format(document_id),
-      super(RobinhoodCachedClient, self).download_document_by_id,
+      super(RobinhoodCachedClient, self).iterate_document_chunks,
       cache_mode,
       args=[document_id],
       binary=True
     )
 
-  def get_document_by_id(self, document_id):
+  def download_document_to_cache(self, document_id):
+    """
+    Streams the document's PDF into the blob store behind the same cache entry
+    open_document_by_id uses, unless it's already there, and returns the
+    path to the blob. Blobs never change, so it's safe to hard link.
+    """
+    # Documents don't change, never force live
+    cache_name = 'document_pdf_{}'.format(document_id)
+    cache_path = os.path.join(cache_root_path, cache_name)
+    if os.path.exists(cache_path):
+      try:
+        self._open_blob_entry(cache_path).close()
+        return self._blob_store.get_path(self._get_blob_digest(cache_path))
+      except CorruptCacheEntry as e:
+        logging.warning('Dropping cached {}: {}'.format(cache_name, e))
+    digest, size = self._blob_store.write_chunks(super(RobinhoodCachedClient, self).iterate_document_chunks(document_id))
+    self._write_blob_entry(cache_path, digest, size)
+    return self._blob_store.get_path(digest)
+
+  def get_document_by_id(self, document_id, cache_mode=CACHE_FIRST):
     return self._simple_call(
       'document_{}'.format(document_id),
       super(RobinhoodCachedClient, self).get_document_by_id,
@@ -208,7 +359,9 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
     return self._simple_call(
       'watchlists',
       super(RobinhoodCachedClient, self).get_watchlists,
-      cache_mode
+      cache_mode,
+      ttl=WATCHLIST_TTL,
+      not_found_ttl=WATCHLIST_TTL
     )
 
   def get_watchlist_instruments(self, watchlist_name, cache_mode=CACHE_FIRST):
@@ -216,7 +369,9 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
       'watchlist_instruments_{}'.format(watchlist_name),
       super(RobinhoodCachedClient, self).get_watchlist_instruments,
       cache_mode,
-      args=[watchlist_name]
+      args=[watchlist_name],
+      ttl=WATCHLIST_TTL,
+      not_found_ttl=WATCHLIST_TTL
     )
 
   def get_notification_settings(self, cache_mode=CACHE_FIRST):
@@ -303,30 +458,79 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
       args=[instrument_id]
     )
 
-  def get_instrument_by_symbol(self, symbol, cache_mode=CACHE_FIRST):
+  def get_instrument_universe(self, sync=False, max_age=RobinhoodInstrumentUniverse.DEFAULT_MAX_AGE):
+    """
+    The locally stored listing of every instrument, which is only loaded from
+    disk on first use. Pass sync=True to page in the full listing as needed.
+    """
+    if not self._instrument_universe:
+      self._instrument_universe = RobinhoodInstrumentUniverse(
+          self, os.path.join(cache_root_path, 'instrument_universe'))
+    if sync:
+      self._instrument_universe.sync(max_age=max_age)
+    return self._instrument_universe
+
+  def _get_cached_instrument_by_symbol(self, symbol, cache_mode):
     symbol_instrument_id_cache_path = os.path.join(cache_root_path, 'symbol_instrument_id_{}'.format(symbol))
     if os.path.exists(symbol_instrument_id_cache_path):
       with open(symbol_instrument_id_cache_path, 'r') as symbol_instrument_id_cache_file:
         instrument_id = symbol_instrument_id_cache_file.read()
       return self.get_instrument_by_id(instrument_id, cache_mode=cache_mode)
 
-    instrument = self._simple_call(
-      'instrument_{}'.format(symbol),
-      super(RobinhoodCachedClient, self).get_instrument_by_symbol,
-      cache_mode,
-      args=[symbol]
-    )
-    instrument_id = instrument['id']
+    # Fall back on the universe if it has ever been synced
+    if cache_mode != FORCE_LIVE and os.path.exists(os.path.join(cache_root_path, 'instrument_universe')):
+      instrument = self.get_instrument_universe().get_instrument_by_symbol(symbol)
+      if instrument and instrument['state'] == 'active':
+        return instrument
 
-    os.rename(
-      os.path.join(cache_root_path, 'instrument_{}'.format(symbol)), 
-      os.path.join(cache_root_path, 'instrument_{}'.format(instrument_id))
-    )
+    return None
+
+  def _cache_instrument_by_symbol(self, symbol, instrument):
+    instrument_id = instrument['id']
+    cache_format.dump(instrument, os.path.join(cache_root_path, 'instrument_{}'.format(instrument_id)))
+    symbol_instrument_id_cache_path = os.path.join(cache_root_path, 'symbol_instrument_id_{}'.format(symbol))
     with open(symbol_instrument_id_cache_path, 'w') as symbol_instrument_id_cache_file:
       symbol_instrument_id_cache_file.write(instrument_id)
+    self._clear_not_found('symbol_{}'.format(symbol))
+
+  def get_instrument_by_symbol(self, symbol, cache_mode=CACHE_FIRST):
+    instrument = self._get_cached_instrument_by_symbol(symbol, cache_mode)
+    if instrument:
+      return instrument
+    if cache_mode != FORCE_LIVE and self._is_not_found_cached('symbol_{}'.format(symbol)):
+      raise NotFound()
+    if cache_mode == FORCE_CACHE:
+      return None
 
+    try:
+      instrument = super(RobinhoodCachedClient, self).get_instrument_by_symbol(symbol)
+    except NotFound:
+      self._cache_not_found('symbol_{}'.format(symbol))
+      raise
+    self._cache_instrument_by_symbol(symbol, instrument)
     return instrument
 
+  def get_instruments_by_symbols(self, symbols, cache_mode=CACHE_FIRST):
+    instrument_by_symbol = {}
+    unfound_symbols = []
+    for symbol in set(symbols):
+      instrument = self._get_cached_instrument_by_symbol(symbol, cache_mode)
+      if instrument:
+        instrument_by_symbol[symbol] = instrument
+      elif cache_mode == FORCE_LIVE or not self._is_not_found_cached('symbol_{}'.format(symbol)):
+        unfound_symbols.append(symbol)
+
+    if unfound_symbols and cache_mode != FORCE_CACHE:
+      live_instrument_by_symbol = super(RobinhoodCachedClient, self).get_instruments_by_symbols(unfound_symbols)
+      for symbol in unfound_symbols:
+        if symbol in live_instrument_by_symbol:
+          self._cache_instrument_by_symbol(symbol, live_instrument_by_symbol[symbol])
+          instrument_by_symbol[symbol] = live_instrument_by_symbol[symbol]
+        else:
+          self._cache_not_found('symbol_{}'.format(symbol))
+
+    return instrument_by_symbol
+
   def get_instrument_split_history(self, instrument_id, cache_mode=CACHE_FIRST):
     return self._simple_call(
       'instrument_split_history_{}'.format(instrument_id),
@@ -415,13 +619,26 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
     )
 
   def get_position_by_instrument_id(self, instrument_id, use_account_number=None, cache_mode=CACHE_FIRST):
-    account_number = use_account_number or self.get_account()['account_number']
+    if use_account_number:
+      return self._simple_call(
+        'position_{}_{}'.format(use_account_number, instrument_id),
+        super(RobinhoodCachedClient, self).get_position_by_instrument_id,
+        cache_mode,
+        args=[instrument_id],
+        kwargs={'use_account_number': use_account_number},
+        ttl=POSITION_INDEX_MAX_AGE,
+        not_found_ttl=POSITION_INDEX_MAX_AGE
+      )
+    # Misses are served from the position index, so looking up many instruments
+    # is a single positions fetch. Live lookups don't reuse an index fetched earlier.
     return self._simple_call(
       'position_{}'.format(instrument_id),
-      super(RobinhoodCachedClient, self).get_position_by_instrument_id,
+      self.get_indexed_position_by_instrument_id,
       cache_mode,
       args=[instrument_id],
-      kwargs={'use_account_number': account_number}
+      kwargs={'max_age': timedelta(0)} if cache_mode == FORCE_LIVE else {},
+      ttl=POSITION_INDEX_MAX_AGE,
+      not_found_ttl=POSITION_INDEX_MAX_AGE
     )
 
   def get_news(self, symbol, cache_mode=CACHE_FIRST):
@@ -460,9 +677,67 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
       'order_{}'.format(order_id),
       super(RobinhoodCachedClient, self).get_order_by_id,
       cache_mode,
-      args=[order_id]
+      args=[order_id],
+      is_final=_is_order_final
+    )
+
+  def cancel_order(self, order_id):
+    try:
+      return super(RobinhoodCachedClient, self).cancel_order(order_id)
+    finally:
+      self._invalidate('order_{}'.format(order_id))
+
+  def cancel_orders(self, order_ids):
+    cancelled_order_by_id = super(RobinhoodCachedClient, self).cancel_orders(order_ids)
+    # Failures too, a cancel that errored may still have gone through
+    for order_id in order_ids:
+      self._invalidate('order_{}'.format(order_id))
+    return cancelled_order_by_id
+
+  def get_options_order(self, order_id, cache_mode=CACHE_FIRST):
+    return self._simple_call(
+      'options_order_{}'.format(order_id),
+      super(RobinhoodCachedClient, self).get_options_order,
+      cache_mode,
+      args=[order_id],
+      is_final=_is_order_final
+    )
+
+  def cancel_options_order(self, order_id):
+    try:
+      return super(RobinhoodCachedClient, self).cancel_options_order(order_id)
+    finally:
+      self._invalidate('options_order_{}'.format(order_id))
+
+  def cancel_options_orders(self, order_ids):
+    cancelled_order_by_id = super(RobinhoodCachedClient, self).cancel_options_orders(order_ids)
+    # Failures too, a cancel that errored may still have gone through
+    for order_id in order_ids:
+      self._invalidate('options_order_{}'.format(order_id))
+    return cancelled_order_by_id
+
+  def get_crypto_order(self, order_id, cache_mode=CACHE_FIRST):
+    return self._simple_call(
+      'crypto_order_{}'.format(order_id),
+      super(RobinhoodCachedClient, self).get_crypto_order,
+      cache_mode,
+      args=[order_id],
+      is_final=_is_order_final
     )
 
+  def cancel_crypto_order(self, order_id):
+    try:
+      return super(RobinhoodCachedClient, self).cancel_crypto_order(order_id)
+    finally:
+      self._invalidate('crypto_order_{}'.format(order_id))
+
+  def cancel_crypto_orders(self, order_ids):
+    cancelled_order_by_id = super(RobinhoodCachedClient, self).cancel_crypto_orders(order_ids)
+    # Failures too, a cancel that errored may still have gone through
+    for order_id in order_ids:
+      self._invalidate('crypto_order_{}'.format(order_id))
+    return cancelled_order_by_id
+
   def _search_and_cache_call(
       self,
       search_method,
@@ -473,11 +748,13 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
     results = []
     live_search_content = search_method(*search_args, **search_kwargs)
     for live_item in live_search_content:
+      # Batch lookups return nulls for ids with nothing to return
+      if not live_item:
+        continue
       results.append(live_item)
       item_id = item_to_id_method(live_item)
       item_cache_path = os.path.join(cache_root_path, item_cache_name_template.format(item_id))
-      with open(item_cache_path, 'w') as item_cache_file:
-        json.dump(live_item, item_cache_file)
+      cache_format.dump(live_item, item_cache_path)
     return results
 
   def _list_call(
@@ -491,15 +768,17 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
       list_args=[],
       list_kwargs={},
       item_extra_args=[],
-      item_kwargs={}):
+      item_kwargs={},
+      ttl=None):
     results = []
     list_cache_path = os.path.join(cache_root_path, list_cache_name)
-    if os.path.exists(list_cache_path) and cache_mode != FORCE_LIVE:
+    list_json = None
+    if os.path.exists(list_cache_path) and cache_mode != FORCE_LIVE and self._is_cache_fresh(list_cache_path, ttl):
       logging.debug('Loading {} from cache'.format(list_cache_name))
-      with open(list_cache_path, 'r') as list_cache_file:
-        list_json = json.load(list_cache_file)
-        for item_id in list_json:
-          results.append(item_method(item_id, *item_extra_args, **item_kwargs, cache_mode=cache_mode))
+      list_json = self._load_cached(list_cache_name)
+    if list_json is not None:
+      for item_id in list_json:
+        results.append(item_method(item_id, *item_extra_args, **item_kwargs, cache_mode=cache_mode))
     else:
       live_list_content = self._search_and_cache_call(
           list_method,
@@ -512,10 +791,94 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
         item_id = item_to_id_method(live_item)
         live_list_ids.append(item_id)
         results.append(live_item)
-      with open(list_cache_path, 'w') as list_cache_file:
-        json.dump(live_list_ids, list_cache_file)
+      cache_format.dump(live_list_ids, list_cache_path)
     return results
 
+  def _iterate_list_call(
+      self,
+      list_cache_name,
+      iterate_method,
+      item_method,
+      item_to_id_method,
+      item_cache_name_template,
+      cache_mode,
+      list_kwargs={},
+      ttl=None):
+    """
+    Like _list_call, but yields items one at a time. Live items are yielded and
+    cached as each page comes in, the list itself only gets cached once every
+    page has been read.
+    """
+    list_cache_path = os.path.join(cache_root_path, list_cache_name)
+    list_json = None
+    if os.path.exists(list_cache_path) and cache_mode != FORCE_LIVE and self._is_cache_fresh(list_cache_path, ttl):
+      logging.debug('Loading {} from cache'.format(list_cache_name))
+      list_json = self._load_cached(list_cache_name)
+    if list_json is not None:
+      for item_id in list_json:
+        yield item_method(item_id, cache_mode=cache_mode)
+      return
+
+    live_list_ids = []
+    for live_item in iterate_method(**list_kwargs):
+      item_id = item_to_id_method(live_item)
+      cache_format.dump(live_item, os.path.join(cache_root_path, item_cache_name_template.format(item_id)))
+      live_list_ids.append(item_id)
+      yield live_item
+    cache_format.dump(live_list_ids, list_cache_path)
+
+  def _grouped_list_call(
+      self,
+      keys,
+      list_cache_name_template,
+      search_method,
+      item_to_key_method,
+      item_to_id_method,
+      item_cache_name_template,
+      item_method,
+      cache_mode,
+      ttl=None):
+    """
+    Like _list_call, but for a search that can cover many keys at once (e.g. the
+    chains of many instruments). Each key gets its own cached list of ids, and
+    only the keys missing from the cache are searched for, in a single call to
+    search_method(missing_keys).
+    """
+    items_by_key = {}
+    missing_keys = []
+    for key in keys:
+      list_cache_name = list_cache_name_template.format(key)
+      list_cache_path = os.path.join(cache_root_path, list_cache_name)
+      if cache_mode == FORCE_LIVE or not os.path.exists(list_cache_path) or not self._is_cache_fresh(list_cache_path, ttl):
+        missing_keys.append(key)
+        continue
+      item_ids = self._load_cached(list_cache_name)
+      if item_ids is None:
+        missing_keys.append(key)
+        continue
+      items = [item_method(item_id, cache_mode=FORCE_CACHE) for item_id in item_ids]
+      if all(items):
+        items_by_key[key] = items
+      else:
+        missing_keys.append(key)
+
+    if missing_keys and cache_mode != FORCE_CACHE:
+      logging.debug('Searching for {}'.format(list_cache_name_template.format(','.join(missing_keys))))
+      for key in missing_keys:
+        items_by_key[key] = []
+      for live_item in self._search_and_cache_call(
+          search_method,
+          item_to_id_method,
+          item_cache_name_template,
+          search_args=[missing_keys]):
+        items_by_key.setdefault(item_to_key_method(live_item), []).append(live_item)
+      for key in missing_keys:
+        cache_format.dump(
+            [item_to_id_method(item) for item in items_by_key[key]],
+            os.path.join(cache_root_path, list_cache_name_template.format(key)))
+
+    return [item for key in keys for item in items_by_key.get(key, [])]
+
   def get_documents(self, cache_mode=CACHE_FIRST):
     return self._list_call(
       'documents',
@@ -546,6 +909,16 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
       cache_mode
     )
 
+  def iterate_ach_transfers(self, cache_mode=CACHE_FIRST):
+    return self._iterate_list_call(
+      'ach_transfers',
+      super(RobinhoodCachedClient, self).iterate_ach_transfers,
+      self.get_ach_transfer_by_id,
+      lambda ach_transfer: ach_transfer['id'],
+      'ach_transfer_{}',
+      cache_mode
+    )
+
   def get_dividends(self, cache_mode=CACHE_FIRST):
     return self._list_call(
       'dividends',
@@ -556,17 +929,27 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
       cache_mode
     )
 
+  def iterate_dividends(self, cache_mode=CACHE_FIRST):
+    return self._iterate_list_call(
+      'dividends',
+      super(RobinhoodCachedClient, self).iterate_dividends,
+      self.get_dividend_by_id,
+      lambda dividend: dividend['id'],
+      'dividend_{}',
+      cache_mode
+    )
+
   def get_positions(self, include_old=False, use_account_number=None, cache_mode=CACHE_FIRST):
-    account_number = use_account_number or self.get_account()['account_number']
+    account_prefix = '{}_'.format(use_account_number) if use_account_number else ''
     return self._list_call(
-      'positions_' + ('all' if include_old else  'current'),
+      'positions_' + account_prefix + ('all' if include_old else  'current'),
       super(RobinhoodCachedClient, self).get_positions,
       self.get_position_by_instrument_id,
       lambda position: get_last_id_from_url(position['instrument']),
-      'position_{}',
+      'position_' + account_prefix + '{}',
       cache_mode,
-      list_kwargs={'include_old': include_old},
-      item_kwargs={'use_account_number': account_number}
+      list_kwargs={'include_old': include_old, 'use_account_number': use_account_number},
+      item_kwargs={'use_account_number': use_account_number}
     )
 
   def get_orders(self, instrument_id=False, cache_mode=CACHE_FIRST):
@@ -580,6 +963,17 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
       list_kwargs={'instrument_id': instrument_id}
     )
 
+  def iterate_orders(self, instrument_id=None, cache_mode=CACHE_FIRST):
+    return self._iterate_list_call(
+      'instrument_orders_{}'.format(instrument_id) if instrument_id else 'orders',
+      super(RobinhoodCachedClient, self).iterate_orders,
+      self.get_order_by_id,
+      lambda order: order['id'],
+      'order_{}',
+      cache_mode,
+      list_kwargs={'instrument_id': instrument_id}
+    )
+
   def get_historical_quotes(self, symbols, interval, span=None, bounds=None, cache_mode=CACHE_FIRST):
     combined_sorted_symbols = ''.join(sorted(symbols))
     return self._list_call(
@@ -626,7 +1020,9 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
           search_args=[unfound_item_ids])
       items.extend(live_search_content)
 
-    return items
+    # Keep the same order as asked for
+    item_by_id = {item_to_id_method(item): item for item in items}
+    return [item_by_id[item_id] for item_id in item_ids if item_id in item_by_id]
 
   def get_instruments(self, instrument_ids, cache_mode=CACHE_FIRST):
     return self._search_call(
@@ -673,7 +1069,168 @@ vvvvvvvvvvvvvvvvvvvvvvv robinhood-python disclosures vvvvvvvvvvvvvvvvvvvvvvv
         self.get_quote,
         cache_mode)
 
+  def get_options_chain_collateral(self, chain_id, use_account_number=None, cache_mode=CACHE_FIRST):
+    account_number = use_account_number or self.get_account()['account_number']
+    return self._simple_call(
+      'options_chain_collateral_{}_{}'.format(account_number, chain_id),
+      super(RobinhoodCachedClient, self).get_options_chain_collateral,
+      cache_mode,
+      args=[chain_id],
+      kwargs={'use_account_number': account_number},
+      ttl=OPTIONS_COLLATERAL_TTL,
+      not_found_ttl=OPTIONS_COLLATERAL_TTL
+    )
+
+  def get_options_chain_index(self, chain_id, cache_mode=CACHE_FIRST):
+    """
+    An index of the chain's active, tradable contracts by expiration, type and strike,
+    see RobinhoodOptionsChainIndex. It's kept on disk and refreshed incrementally.
+    """
+    if chain_id not in self._options_chain_index_by_chain_id:
+      self._options_chain_index_by_chain_id[chain_id] = RobinhoodOptionsChainIndex(
+          self, chain_id, os.path.join(cache_root_path, 'options_chain_index_{}'.format(chain_id)))
+    options_chain_index = self._options_chain_index_by_chain_id[chain_id]
+    if cache_mode == FORCE_LIVE:
+      options_chain_index.rebuild()
+    else:
+      options_chain_index.refresh()
+    return options_chain_index
+
+  def get_options_marketdata(self, options_instrument_id, cache_mode=CACHE_FIRST):
+    return self._simple_call(
+      'options_marketdata_{}'.format(options_instrument_id),
+      super(RobinhoodCachedClient, self).get_options_marketdata,
+      cache_mode,
+      args=[options_instrument_id],
+      ttl=OPTIONS_MARKETDATA_TTL
+    )
+
+  def get_options_marketdatas(self, options_instrument_ids, cache_mode=CACHE_FIRST):
+    return self._search_call(
+        options_instrument_ids,
+        super(RobinhoodCachedClient, self).get_options_marketdatas,
+        lambda options_marketdata: get_last_id_from_url(options_marketdata['instrument']),
+        'options_marketdata_{}',
+        self.get_options_marketdata,
+        cache_mode)
+
+  def _get_live_options_chain(self, chain_id):
+    options_chains = super(RobinhoodCachedClient, self).get_options_chains(chain_ids=[chain_id])
+    if not options_chains:
+      raise NotFound()
+    return options_chains[0]
+
+  def get_options_chain(self, chain_id, cache_mode=CACHE_FIRST):
+    return self._simple_call(
+      'options_chain_{}'.format(chain_id),
+      self._get_live_options_chain,
+      cache_mode,
+      args=[chain_id],
+      ttl=OPTIONS_CHAIN_TTL
+    )
+
+  def get_options_chains(self, chain_ids=None, instrument_ids=None, cache_mode=CACHE_FIRST):
+    assert not (chain_ids and instrument_ids)
+    if chain_ids:
+      return self._search_call(
+          chain_ids,
+          lambda ids: super(RobinhoodCachedClient, self).get_options_chains(chain_ids=ids),
+          lambda options_chain: options_chain['id'],
+          'options_chain_{}',
+          self.get_options_chain,
+          cache_mode)
+    if instrument_ids:
+      return self._grouped_list_call(
+          instrument_ids,
+          'instrument_options_chains_{}',
+          lambda ids: super(RobinhoodCachedClient, self).get_options_chains(instrument_ids=ids),
+          lambda options_chain: get_last_id_from_url(options_chain['underlying_instruments'][0]['instrument']),
+          lambda options_chain: options_chain['id'],
+          'options_chain_{}',
+          self.get_options_chain,
+          cache_mode,
+          ttl=OPTIONS_CHAIN_TTL)
+    return super(RobinhoodCachedClient, self).get_options_chains()
+
+  def get_options_instrument(self, options_instrument_id, cache_mode=CACHE_FIRST):
+    return self._simple_call(
+      'options_instrument_{}'.format(options_instrument_id),
+      super(RobinhoodCachedClient, self).get_options_instrument,
+      cache_mode,
+      args=[options_instrument_id],
+      ttl=OPTIONS_INSTRUMENT_TTL
+    )
+
+  def get_options_instruments(
+      self,
+      options_instrument_ids=None,
+      chain_id=None,
+      options_type=None,
+      tradability=None,
+      state=None,
+      expiration_dates=None,
+      cache_mode=CACHE_FIRST):
+    search_kwargs = {
+        'chain_id': chain_id,
+        'options_type': options_type,
+        'tradability': tradability,
+        'state': state,
+    }
+    if options_instrument_ids:
+      assert not any(search_kwargs.values()) and not expiration_dates
+      return self._search_call(
+          options_instrument_ids,
+          lambda ids: super(RobinhoodCachedClient, self).get_options_instruments(options_instrument_ids=ids),
+          lambda options_instrument: options_instrument['id'],
+          'options_instrument_{}',
+          self.get_options_instrument,
+          cache_mode)
+    if not chain_id:
+      return super(RobinhoodCachedClient, self).get_options_instruments(
+          expiration_dates=expiration_dates, **search_kwargs)
+    # Cached per expiration date so other searches over overlapping dates can share them
+    list_cache_name_template = 'options_instruments_{}_{{}}_{}_{}_{}'.format(chain_id, options_type, tradability, state)
+    if not expiration_dates:
+      return self._list_call(
+        list_cache_name_template.format('all'),
+        super(RobinhoodCachedClient, self).get_options_instruments,
+        self.get_options_instrument,
+        lambda options_instrument: options_instrument['id'],
+        'options_instrument_{}',
+        cache_mode,
+        list_kwargs=search_kwargs,
+        ttl=OPTIONS_INSTRUMENT_TTL
+      )
+    return self._grouped_list_call(
+        expiration_dates,
+        list_cache_name_template,
+        lambda dates: super(RobinhoodCachedClient, self).get_options_instruments(expiration_dates=dates, **search_kwargs),
+        lambda options_instrument: options_instrument['expiration_date'],
+        lambda options_instrument: options_instrument['id'],
+        'options_instrument_{}',
+        self.get_options_instrument,
+        cache_mode,
+        ttl=OPTIONS_INSTRUMENT_TTL)
+
+  def get_crypto_currency_pair(self, currency_pair_id, cache_mode=CACHE_FIRST):
+    return self._simple_call(
+      'crypto_currency_pair_{}'.format(currency_pair_id),
+      super(RobinhoodCachedClient, self).get_crypto_currency_pair,
+      cache_mode,
+      args=[currency_pair_id],
+      ttl=CRYPTO_CURRENCY_PAIR_TTL
+    )
+
+  def get_crypto_currency_pairs(self, cache_mode=CACHE_FIRST):
+    return self._list_call(
+      'crypto_currency_pairs',
+      super(RobinhoodCachedClient, self).get_crypto_currency_pairs,
+      self.get_crypto_currency_pair,
+      lambda currency_pair: currency_pair['id'],
+      'crypto_currency_pair_{}',
+      cache_mode,
+      ttl=CRYPTO_CURRENCY_PAIR_TTL
+    )
+
   # TODO: get_prices
-  # TODO: crypto
-  # TODO: options
   # TODO: oauth2
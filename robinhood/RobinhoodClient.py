@@ -5,9 +5,12 @@ Another python library that inspired this:
 https://github.com/Jamonek/Robinhood
 """
 
+from concurrent.futures import as_completed, Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
 import copy
 import json
+import threading
 import uuid
 
 import requests
@@ -20,6 +23,7 @@ from .exceptions import (
     NotLoggedIn,
     TooManyRequests
 )
+from .RateLimiter import RateLimiter
 from .util import (
     CERT_BUNDLE_PATH,
     ANALYTICS,
@@ -38,12 +42,20 @@ from .util import (
     SPANS,
     DIRECTIONS,
     DIRECTION_TO_ORDER_SIDE,
+    DOWNLOAD_CHUNK_SIZE,
+    MAX_CONCURRENT_REQUESTS,
+    ORDER_RETRIES,
+    REQUESTS_BURST,
+    REQUESTS_PER_SECOND,
     get_cursor_from_url,
     get_last_id_from_url,
     instrument_id_to_url,
     options_instrument_id_to_url
 )
 
+# How long a fetched set of positions is used for per instrument lookups
+POSITION_INDEX_MAX_AGE = timedelta(seconds=30)
+
 
 def _raise_on_error(response):
   try:
@@ -62,15 +74,15 @@ def _raise_on_error(response):
     raise
 
 
+def _get_next_cursor(response_json):
+  return get_cursor_from_url(response_json['next']) if response_json['next'] else None
+
+
 class RobinhoodClient:
   def __init__(self):
-    self._api_session = requests.Session()
-    self._api_session.verify = CERT_BUNDLE_PATH
-    self._nummus_session = requests.Session()
-    self._nummus_session.verify = CERT_BUNDLE_PATH
-    self._analytics_session = requests.Session()
-    self._analytics_session.verify = CERT_BUNDLE_PATH
-    common_headers = {
+    # Sessions are per thread since auth headers get toggled on them per request
+    self._thread_local = threading.local()
+    self._common_headers = {
         'Accept': '*/*',
         'Accept-Encoding': 'gzip, deflate',
         'Accept-Language': 'en;q=1',
@@ -79,23 +91,39 @@ class RobinhoodClient:
         'Connection': 'keep-alive',
         'User-Agent': 'Robinhood/823 (iPhone; iOS 7.1.2; Scale/2.00)',
     }
-    self._api_session.headers = common_headers
-    self._nummus_session.headers = common_headers
-    self._analytics_session.headers = common_headers
     self._authorization_headers = {}
     self._oauth2_refresh_token = None
     self._oauth2_expires_at = None
+    # Worker threads share the token, only one of them gets to spend the single use refresh token
+    self._oauth2_lock = threading.Lock()
     self._client_id = 'c82SH0WZOsabOXGP2sxqcj34FxkvfnWRZBKlBjFS'
+    self._rate_limiter = RateLimiter(REQUESTS_PER_SECOND, REQUESTS_BURST)
+    self._executor = None
+    self._prefetch_executor = None
+    self._executor_lock = threading.Lock()
+    self._position_index = None
+    self._position_index_fetched_at = None
+    self._position_index_lock = threading.Lock()
+    self._default_account_number = None
+
+  def _get_sessions(self):
+    sessions = getattr(self._thread_local, 'sessions', None)
+    if sessions is None:
+      sessions = {}
+      for host in [API, NUMMUS, ANALYTICS]:
+        session = requests.Session()
+        session.verify = CERT_BUNDLE_PATH
+        session.headers = copy.copy(self._common_headers)
+        sessions[host] = session
+      self._thread_local.sessions = sessions
+    return sessions
 
   def _get_session(self, host, authed=False):
-    if host == API:
-      session = self._api_session
-    elif host == NUMMUS:
-      session = self._nummus_session
-    elif host == ANALYTICS:
-      session = self._analytics_session
-    else:
+    sessions = self._get_sessions()
+    if host not in sessions:
       raise Exception('Missing host for {}'.format(host))
+    session = sessions[host]
+    self._rate_limiter.acquire()
 
     # Set auth as required
     if authed:
@@ -117,7 +145,10 @@ class RobinhoodClient:
     if not self._oauth2_refresh_token:
       raise Exception('Cannot ensure valid OAuth2 token. No refresh token.')
     elif datetime.now() > self._oauth2_expires_at:
-      self.refresh_oauth2_token()
+      with self._oauth2_lock:
+        # Another thread may have refreshed it while this one waited
+        if datetime.now() > self._oauth2_expires_at:
+          self.refresh_oauth2_token()
 
   def refresh_oauth2_token(self):
     body = {
@@ -166,30 +197,150 @@ class RobinhoodClient:
     }
     response = self._get_session(API, authed=True).post(API_HOST + 'oauth2/revoke_token/', )
     _raise_on_error(response)
+    for key in self._authorization_headers.keys():
+      for session in self._get_sessions().values():
+        if key in session.headers:
+          del session.headers[key]
     self._authorization_headers = {}
-    del self._session.headers['Authorization']
 
-  def _collect_results(self, request_method, request_args, request_kwargs={}, request_params={}):
-    """Used within apis that are paged"""
+  def _run_in_worker(self, method, args):
+    self._thread_local.is_worker = True
+    return method(*args)
+
+  def submit_concurrently(self, method, args_list):
+    """
+    Submits method once per args in args_list to the shared pool of worker
+    threads, returning a Future for each in the same order.
+    """
+    with self._executor_lock:
+      if not self._executor:
+        self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS)
+    if getattr(self._thread_local, 'is_worker', False):
+      # Already on the pool, waiting on it from here could starve it, so just run serially.
+      futures = []
+      for args in args_list:
+        future = Future()
+        try:
+          future.set_result(method(*args))
+        except Exception as e:
+          future.set_exception(e)
+        futures.append(future)
+      return futures
+    return [self._executor.submit(self._run_in_worker, method, args) for args in args_list]
+
+  def map_concurrently(self, method, args_list, return_exceptions=False):
+    """
+    Calls method once per args in args_list on a shared pool of worker threads,
+    returning results in the same order. Requests still go through the rate limiter.
+
+    With return_exceptions, any exception raised is returned in place of that result
+    rather than raised.
+    """
     results = []
-    cursor = None
-    page_params = copy.copy(request_params)
-
-    while True:
-      if cursor:
-        page_params['cursor'] = cursor
-      response = request_method(
-          *request_args,
-          **request_kwargs,
-          params=page_params
-      )
+    for future in self.submit_concurrently(method, args_list):
+      try:
+        results.append(future.result())
+      except Exception as e:
+        if not return_exceptions:
+          raise
+        results.append(e)
+    return results
+
+  def iterate_concurrently(self, method, args_list):
+    """
+    Like map_concurrently, but yields (index into args_list, result) as each call
+    finishes rather than waiting on all of them. Any exception raised is yielded in
+    place of that result.
+    """
+    # Submit now rather than on first iteration
+    futures = self.submit_concurrently(method, args_list)
+    index_by_future = {future: i for i, future in enumerate(futures)}
+
+    def iterate():
+      for future in as_completed(futures):
+        try:
+          yield index_by_future[future], future.result()
+        except Exception as e:
+          yield index_by_future[future], e
+    return iterate()
+
+  def backoff(self, seconds):
+    """Hold off every request made through this client for the given number of seconds, e.g. after a 429."""
+    self._rate_limiter.backoff(seconds)
+
+  def _iterate_responses(self, request_method, request_args, request_kwargs={}, request_params={}, cursor=None):
+    """
+    The paging engine for every paged api, yields each page's response json.
+
+    While a page is being consumed, the next one is already being fetched in
+    the background.
+    """
+    # Pin the auth state of the session as it is now, other requests on this
+    # thread toggle the session's auth headers while pages are being consumed.
+    session = request_method.__self__
+    session_headers = session.headers
+    # Pages after the first are fetched on a prefetch thread, with that thread's own session for the same host
+    host = next(host for host, thread_session in self._get_sessions().items() if thread_session is session)
+    request_method_name = request_method.__name__
+    page_kwargs = copy.copy(request_kwargs)
+    page_kwargs['headers'] = dict(request_kwargs.get('headers', {}))
+    for key in self._authorization_headers.keys():
+      page_kwargs['headers'][key] = session_headers.get(key)
+
+    def fetch_page(page_cursor, is_first_page):
+      page_params = copy.copy(request_params)
+      if page_cursor:
+        page_params['cursor'] = page_cursor
+      page_request_method = request_method
+      if not is_first_page:
+        # The first page was already counted when the session was gotten
+        self._rate_limiter.acquire()
+        page_request_method = getattr(self._get_sessions()[host], request_method_name)
+      response = page_request_method(*request_args, **page_kwargs, params=page_params)
       _raise_on_error(response)
-      response_json = response.json()
-      results.extend(response_json['results'])
-      if response_json['next']:
-        cursor = get_cursor_from_url(response_json['next'])
+      return response.json()
+
+    with self._executor_lock:
+      if not self._prefetch_executor:
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS)
+
+    def iterate():
+      response_json = fetch_page(cursor, True)
+      while True:
+        next_cursor = _get_next_cursor(response_json)
+        next_page_future = self._prefetch_executor.submit(fetch_page, next_cursor, False) if next_cursor else None
+        yield response_json
+        if not next_page_future:
+          return
+        response_json = next_page_future.result()
+
+    # Not a generator itself so that the headers above are pinned as soon as this is called
+    return iterate()
+
+  def _iterate_pages(self, request_method, request_args, request_kwargs={}, request_params={}, cursor=None):
+    """Used within apis that are paged, yields (results, next_cursor) for each page"""
+    responses = self._iterate_responses(request_method, request_args, request_kwargs, request_params, cursor)
+    return ((response_json['results'], _get_next_cursor(response_json)) for response_json in responses)
+
+  def _iterate_results(self, request_method, request_args, request_kwargs={}, request_params={}):
+    """Used within apis that are paged, yields results one at a time across every page"""
+    responses = self._iterate_responses(request_method, request_args, request_kwargs, request_params)
+    return (result for response_json in responses for result in response_json['results'])
+
+  def _collect_results(self, request_method, request_args, request_kwargs={}, request_params={}):
+    """Used within apis that are paged"""
+    return list(self._iterate_results(request_method, request_args, request_kwargs, request_params))
+
+  def _collect_response(self, request_method, request_args, request_kwargs={}, request_params={}):
+    """Used within apis that are paged but return the whole response, the results of every page are combined"""
+    full_response_json = None
+    for response_json in self._iterate_responses(request_method, request_args, request_kwargs, request_params):
+      if full_response_json is None:
+        full_response_json = response_json
       else:
-        return results
+        full_response_json['results'].extend(response_json['results'])
+    full_response_json['next'] = None
+    return full_response_json
 
   def request_app_mfa(self):
     """
@@ -377,12 +528,10 @@ class RobinhoodClient:
     return response.json()
 
   def get_margin_calls(self):
-    response = self._get_session(API, authed=True).get(API_HOST + 'margin/calls/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: auto page if needed
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'margin/calls/']
+    )
 
   def get_subscription_fees(self):
     """
@@ -402,12 +551,10 @@ class RobinhoodClient:
     ]
 
     """
-    response = self._get_session(API, authed=True).get(API_HOST + 'subscription/subscription_fees/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: auto page if needed
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'subscription/subscription_fees/']
+    )
 
   def get_subscriptions(self):
     """
@@ -435,12 +582,11 @@ class RobinhoodClient:
     params = {
         'active': 'true',
     }
-    response = self._get_session(API, authed=True).get(API_HOST + 'subscription/subscriptions/', params=params)
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: auto page if needed
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'subscription/subscriptions/'],
+        request_params=params
+    )
 
   def get_markets(self):
     """
@@ -465,12 +611,10 @@ class RobinhoodClient:
         "next": null
     }
     """
-    response = self._get_session(API).get(API_HOST + 'markets/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # This api likely never pages, but you never know.
-    assert not response_json['next']
-    return response_json
+    return self._collect_response(
+        self._get_session(API).get,
+        [API_HOST + 'markets/']
+    )
 
   def download_document_by_id(self, document_id):
     """The response is a PDF file"""
@@ -479,6 +623,17 @@ class RobinhoodClient:
     _raise_on_error(response)
     return response.content
 
+  def iterate_document_chunks(self, document_id):
+    """Same as download_document_by_id, but yields the PDF a chunk at a time as it streams in."""
+    response = self._get_session(API, authed=True).get(
+        API_HOST + 'documents/{}/download/'.format(document_id), stream=True)
+    try:
+      _raise_on_error(response)
+      for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+        yield chunk
+    finally:
+      response.close()
+
   def get_document_by_id(self, document_id):
     """
     Example response:
@@ -530,12 +685,10 @@ class RobinhoodClient:
         "next": null
     }
     """
-    response = self._get_session(API, authed=True).get(API_HOST + 'documents/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'documents/']
+    )
 
   def get_watchlists(self):
     """
@@ -552,12 +705,10 @@ class RobinhoodClient:
         "next": null
     }
     """
-    response = self._get_session(API, authed=True).get(API_HOST + 'watchlists/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json
+    return self._collect_response(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'watchlists/']
+    )
 
   def get_watchlist_instruments(self, watchlist_name):
     """
@@ -578,12 +729,10 @@ class RobinhoodClient:
     }
 
     """
-    response = self._get_session(API, authed=True).get(API_HOST + 'watchlists/{}/'.format(watchlist_name))
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json
+    return self._collect_response(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'watchlists/{}/'.format(watchlist_name)]
+    )
 
   def get_notification_settings(self):
     """
@@ -669,12 +818,10 @@ class RobinhoodClient:
         "next": null
     }
     """
-    response = self._get_session(API, authed=True).get(API_HOST + 'notifications/devices/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # This probably won't autopage for a LONG time
-    assert not response_json['next']
-    return response_json
+    return self._collect_response(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'notifications/devices/']
+    )
 
   def get_account(self):
     """
@@ -798,24 +945,20 @@ class RobinhoodClient:
     """
     # We are limited to about 50, so we need to do multiple calls if grabbing more than that.
     if len(instrument_ids) > 50:
-      # HACK: This should never call a subclass' method
-      my_class = self.__class__
-      self.__class__ = RobinhoodClient
+      # This should never call a subclass' method
       full_popularities = []
       for i in range(0, len(instrument_ids), 50):
-        full_popularities.extend(self.get_popularities(instrument_ids[i:i + 50]))
-      self.__class__ = my_class
+        full_popularities.extend(RobinhoodClient.get_popularities(self, instrument_ids[i:i + 50]))
       return full_popularities
 
     params = {
         'ids': ','.join(instrument_ids),
     }
-    response = self._get_session(API).get(API_HOST + 'instruments/popularity/', params=params)
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API).get,
+        [API_HOST + 'instruments/popularity/'],
+        request_params=params
+    )
 
   def get_rating(self, instrument_id):
     """
@@ -857,24 +1000,20 @@ class RobinhoodClient:
     # For now, do 20 at a time instead of paging. We can hit a scenerio where
     # we have to limit both the instrument ids and page.
     if len(instrument_ids) > 20:
-      # HACK: This should never call a subclass' method
-      my_class = self.__class__
-      self.__class__ = RobinhoodClient
+      # This should never call a subclass' method
       full_ratings = []
       for i in range(0, len(instrument_ids), 20):
-        full_ratings.extend(self.get_ratings(instrument_ids[i:i + 20]))
-      self.__class__ = my_class
+        full_ratings.extend(RobinhoodClient.get_ratings(self, instrument_ids[i:i + 20]))
       return full_ratings
 
     params = {
         'ids': ','.join(instrument_ids),
     }
-    response = self._get_session(API).get(API_HOST + 'midlands/ratings/', params=params)
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API).get,
+        [API_HOST + 'midlands/ratings/'],
+        request_params=params
+    )
 
   def get_instrument_reasons_for_personal_tag(self, tag):
     """
@@ -982,25 +1121,42 @@ class RobinhoodClient:
     # We are limited to 75 based on how long the query param can be, so we
     # need to do multiple calls if grabbing more than 75 instruments.
     if len(instrument_ids) > 75:
-      # HACK: This should never call a subclass' method
-      my_class = self.__class__
-      self.__class__ = RobinhoodClient
+      # This should never call a subclass' method
       full_instruments = []
       for i in range(0, len(instrument_ids), 75):
-        full_instruments.extend(self.get_instruments(instrument_ids=instrument_ids[i:i + 75]))
-      self.__class__ = my_class
+        full_instruments.extend(RobinhoodClient.get_instruments(self, instrument_ids=instrument_ids[i:i + 75]))
       return full_instruments
 
     params = {
         'ids': ','.join(instrument_ids),
         'active_instruments_only': 'false',
     }
-    response = self._get_session(API).get(API_HOST + 'instruments/', params=params)
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API).get,
+        [API_HOST + 'instruments/'],
+        request_params=params
+    )
+
+  def get_instrument_pages(self, cursor=None, active_only=False):
+    """
+    Pages through every instrument Robinhood knows about, including inactive ones.
+
+    Args:
+      cursor: Resume from a cursor previously yielded
+      active_only: Only page through active instruments, a much shorter listing
+
+    Yields (instruments, next_cursor) per page, see get_instruments for the
+    instrument format. next_cursor is None on the last page.
+    """
+    params = {
+        'active_instruments_only': 'true' if active_only else 'false',
+    }
+    return self._iterate_pages(
+        self._get_session(API).get,
+        [API_HOST + 'instruments/'],
+        request_params=params,
+        cursor=cursor
+    )
 
   def get_earnings(self, instrument_id):
     """
@@ -1134,6 +1290,28 @@ class RobinhoodClient:
     assert instrument['symbol'] == symbol
     return instrument
 
+  def get_instruments_by_symbols(self, symbols):
+    """
+    Looks up many symbols at once, there is no batch api so these are done concurrently.
+
+    Returns a dict of symbol to instrument (see get_instrument_by_symbol), symbols
+    that aren't found are left out.
+    """
+    symbols = list(set(symbols))
+    # This should never call a subclass' method
+    instruments = self.map_concurrently(
+        lambda symbol: RobinhoodClient.get_instrument_by_symbol(self, symbol),
+        [[symbol] for symbol in symbols],
+        return_exceptions=True)
+    instrument_by_symbol = {}
+    for symbol, instrument in zip(symbols, instruments):
+      if isinstance(instrument, NotFound):
+        continue
+      if isinstance(instrument, Exception):
+        raise instrument
+      instrument_by_symbol[symbol] = instrument
+    return instrument_by_symbol
+
   def get_instrument_split_history(self, instrument_id):
     """
     Args:
@@ -1154,12 +1332,10 @@ class RobinhoodClient:
         ]
     }
     """
-    response = self._get_session(API).get(API_HOST + 'instruments/{}/splits'.format(instrument_id))
-    _raise_on_error(response)
-    response_json = response.json()
-    # This is probably never the case.
-    assert not response_json['next']
-    return response_json
+    return self._collect_response(
+        self._get_session(API).get,
+        [API_HOST + 'instruments/{}/splits'.format(instrument_id)]
+    )
 
   def get_quote(self, instrument_id):
     """
@@ -1213,13 +1389,10 @@ class RobinhoodClient:
     }
     """
     if len(instrument_ids) > 35:
-      # HACK: This should never call a subclass' method
-      my_class = self.__class__
-      self.__class__ = RobinhoodClient
+      # This should never call a subclass' method
       full_quotes = []
       for i in range(0, len(instrument_ids), 35):
-        full_quotes.extend(self.get_quotes(instrument_ids[i:i + 35]))
-      self.__class__ = my_class
+        full_quotes.extend(RobinhoodClient.get_quotes(self, instrument_ids[i:i + 35]))
       return full_quotes
 
     # bounds=trading ?
@@ -1314,12 +1487,10 @@ class RobinhoodClient:
         ...
     ]
     """
-    response = self._get_session(API, authed=True).get(API_HOST + 'ach/relationships')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'ach/relationships']
+    )
 
   def get_ach_relationship_by_id(self, relationship_id):
     """
@@ -1394,13 +1565,16 @@ class RobinhoodClient:
         ...
     ]
     """
+    # This should never call a subclass' method
+    return list(RobinhoodClient.iterate_ach_transfers(self))
+
+  def iterate_ach_transfers(self):
+    """Same as get_ach_transfers, but yields one at a time as each page comes in."""
     # There's also updated_at[gte]
-    response = self._get_session(API, authed=True).get(API_HOST + 'ach/transfers/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._iterate_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'ach/transfers/']
+    )
 
   def get_dividends(self):
     """
@@ -1426,12 +1600,15 @@ class RobinhoodClient:
         "next": null
     }
     """
-    response = self._get_session(API, authed=True).get(API_HOST + 'dividends/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    # This should never call a subclass' method
+    return list(RobinhoodClient.iterate_dividends(self))
+
+  def iterate_dividends(self):
+    """Same as get_dividends, but yields one at a time as each page comes in."""
+    return self._iterate_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'dividends/']
+    )
 
   def get_order_by_id(self, order_id):
     """
@@ -1512,23 +1689,28 @@ class RobinhoodClient:
         "previous": null
     }
     """
-    # HACK: This should never call a subclass' method
-    my_class = self.__class__
-    self.__class__ = RobinhoodClient
+    # This should never call a subclass' method
+    return list(RobinhoodClient.iterate_orders(self, instrument_id=instrument_id))
+
+  def iterate_orders(self, instrument_id=None, updated_since=None):
+    """
+    Same as get_orders, but yields one at a time as each page comes in.
 
+    Args:
+      updated_since: A UTC datetime, only orders updated since then
+    """
     params = {}
     if instrument_id:
       params['instrument'] = instrument_id_to_url(instrument_id)
+    if updated_since:
+      params['updated_at[gte]'] = updated_since.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
 
-    orders = self._collect_results(
+    return self._iterate_results(
         self._get_session(API, authed=True).get,
         [API_HOST + 'orders/'],
         request_params=params
     )
 
-    self.__class__ = my_class
-    return orders
-
   def get_popular_stocks(self):
     """
     The most active S&P 500 stocks based on the trading activity of Robinhood customers.
@@ -1671,8 +1853,12 @@ class RobinhoodClient:
     _raise_on_error(response)
     return response.json()
 
-  def get_positions(self, include_old=False):
+  def get_positions(self, include_old=False, use_account_number=None):
     """
+    Args:
+      include_old: Include positions that have since been sold off
+      use_account_number: Only this account's positions, instead of the default account's
+
     Example response:
     {
         "results": [
@@ -1703,12 +1889,46 @@ class RobinhoodClient:
     params = {}
     if not include_old:
       params['nonzero'] = 'true'
-    response = self._get_session(API, authed=True).get(API_HOST + 'positions/', params=params)
-    _raise_on_error(response)
-    portfolio_json = response.json()
-    # TODO: autopage
-    assert not portfolio_json['next']
-    return portfolio_json['results']
+    if use_account_number:
+      params['account_number'] = use_account_number
+    return self._collect_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'positions/'],
+        request_params=params
+    )
+
+  def _get_default_account_number(self):
+    """Looked up once, the default account doesn't change."""
+    if not self._default_account_number:
+      # This should never call a subclass' method
+      self._default_account_number = RobinhoodClient.get_account(self)['account_number']
+    return self._default_account_number
+
+  def get_position_index(self, max_age=POSITION_INDEX_MAX_AGE):
+    """
+    The default account's positions (including old ones) by instrument id, from
+    a single paged positions/ fetch that is reused until it is older than max_age.
+    """
+    with self._position_index_lock:
+      if self._position_index is None or datetime.now() - self._position_index_fetched_at >= max_age:
+        # This should never call a subclass' method
+        positions = RobinhoodClient.get_positions(
+            self, include_old=True, use_account_number=self._get_default_account_number())
+        self._position_index = {
+            get_last_id_from_url(position['instrument']): position for position in positions
+        }
+        self._position_index_fetched_at = datetime.now()
+      return self._position_index
+
+  def get_indexed_position_by_instrument_id(self, instrument_id, max_age=POSITION_INDEX_MAX_AGE):
+    """
+    Same as get_position_by_instrument_id, but served from get_position_index so
+    looking up many instruments only takes one request.
+    """
+    position_index = self.get_position_index(max_age=max_age)
+    if instrument_id not in position_index:
+      raise NotFound()
+    return position_index[instrument_id]
 
   def get_position_by_instrument_id(self, instrument_id, use_account_number=None):
     """
@@ -1967,13 +2187,10 @@ class RobinhoodClient:
     """
     # We are limited to 100, so we need to do multiple calls if grabbing more than that.
     if len(instrument_ids) > 35:
-      # HACK: This should never call a subclass' method
-      my_class = self.__class__
-      self.__class__ = RobinhoodClient
+      # This should never call a subclass' method
       full_fundamentals = []
       for i in range(0, len(instrument_ids), 35):
-        full_fundamentals.extend(self.get_fundamentals(instrument_ids[i:i + 35]))
-      self.__class__ = my_class
+        full_fundamentals.extend(RobinhoodClient.get_fundamentals(self, instrument_ids[i:i + 35]))
       return full_fundamentals
 
     params = {
@@ -2030,12 +2247,15 @@ class RobinhoodClient:
         ]
     }
     """
-    response = self._get_session(API, authed=True).get(API_HOST + 'midlands/referral/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    # This should never call a subclass' method
+    return list(RobinhoodClient.iterate_referrals(self))
+
+  def iterate_referrals(self):
+    """Same as get_referrals, but yields one at a time as each page comes in."""
+    return self._iterate_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'midlands/referral/']
+    )
 
   def cancel_order(self, order_id):
     """
@@ -2046,7 +2266,19 @@ class RobinhoodClient:
     _raise_on_error(response)
     return response.json()
 
-  def order(self, instrument_id, order_type, order_side, symbol, quantity, price, use_account_url=None):
+  def cancel_orders(self, order_ids):
+    """
+    Cancels many orders concurrently. Returns a dict of order id to either the
+    cancel response or the exception that cancelling it raised.
+    """
+    # This should never call a subclass' method
+    results = self.map_concurrently(
+        lambda order_id: RobinhoodClient.cancel_order(self, order_id),
+        [[order_id] for order_id in order_ids],
+        return_exceptions=True)
+    return dict(zip(order_ids, results))
+
+  def order(self, instrument_id, order_type, order_side, symbol, quantity, price, use_account_url=None, ref_id=None):
     """
     Args:
       instrument_id
@@ -2055,6 +2287,8 @@ class RobinhoodClient:
       symbol: e.g. AAPL
       quantity: Number in the transaction
       price (float): Price when buying
+      ref_id: Unique id (a uuid) for the order, placing it again with the same one won't
+        make a second order
 
     Example response:
     {
@@ -2102,10 +2336,104 @@ class RobinhoodClient:
         'trigger': 'immediate', # see util.TRIGGERS
         'type': order_type,
     }
+    if ref_id:
+      body['ref_id'] = ref_id
     response = self._get_session(API, authed=True).post(API_HOST + 'orders/', data=body)
     _raise_on_error(response)
     return response.json()
 
+  def _validate_order_request(self, order_request):
+    problems = []
+    if order_request.get('order_type') not in ORDER_TYPES:
+      problems.append('order_type must be one of {}'.format(', '.join(ORDER_TYPES)))
+    if order_request.get('order_side') not in ORDER_SIDES:
+      problems.append('order_side must be one of {}'.format(', '.join(ORDER_SIDES)))
+    try:
+      quantity = Decimal(str(order_request.get('quantity')))
+      if not quantity.is_finite() or quantity <= 0 or quantity != quantity.to_integral_value():
+        problems.append('quantity must be a positive whole number')
+    except InvalidOperation:
+      problems.append('quantity must be a number')
+    try:
+      price = Decimal(str(order_request.get('price')))
+      if not price.is_finite() or price <= 0:
+        problems.append('price must be a positive number')
+    except InvalidOperation:
+      problems.append('price must be a number')
+    return problems
+
+  def place_orders(self, order_requests, use_account_url=None, retries=ORDER_RETRIES):
+    """
+    Places many orders at once.
+
+    Every order is validated and every symbol resolved before anything gets
+    submitted, if any of them fail nothing is placed. The account is looked up
+    once, then the orders are submitted concurrently. Each order has a ref_id so
+    when a submission fails in a way where it may or may not have gone through
+    (rate limiting, connection errors), it's retried with the same ref_id and
+    can't be placed twice. Pass your own ref_ids to get the same guarantee when
+    re-running a whole batch.
+
+    Args:
+      order_requests: dicts with order_type, order_side, symbol, quantity, price and
+        optionally ref_id, see order()
+
+    Returns a report with one dict per order request, in the same order, with:
+      request: The order request
+      ref_id: The ref_id it was submitted with
+      order: The placed order (see order()) or None
+      error: Why it wasn't placed or None
+    """
+    report = [
+        {'request': order_request, 'ref_id': order_request.get('ref_id') or str(uuid.uuid4()), 'order': None, 'error': None}
+        for order_request in order_requests
+    ]
+
+    for entry in report:
+      problems = self._validate_order_request(entry['request'])
+      if problems:
+        entry['error'] = '; '.join(problems)
+    instrument_by_symbol = self.get_instruments_by_symbols(list(set(
+        order_request.get('symbol') for order_request in order_requests if order_request.get('symbol'))))
+    for entry in report:
+      if not entry['error'] and entry['request'].get('symbol') not in instrument_by_symbol:
+        entry['error'] = 'symbol {} was not found'.format(entry['request'].get('symbol'))
+    if any(entry['error'] for entry in report):
+      for entry in report:
+        entry['error'] = entry['error'] or 'Not placed, other orders in the batch are invalid'
+      return report
+
+    account_url = use_account_url or self.get_account()['url']
+
+    def submit(entry):
+      order_request = entry['request']
+      for attempt in range(retries + 1):
+        try:
+          # This should never call a subclass' method
+          return RobinhoodClient.order(
+              self,
+              instrument_by_symbol[order_request['symbol']]['id'],
+              order_request['order_type'],
+              order_request['order_side'],
+              order_request['symbol'],
+              order_request['quantity'],
+              order_request['price'],
+              use_account_url=account_url,
+              ref_id=entry['ref_id'])
+        except (TooManyRequests, requests.ConnectionError, requests.Timeout) as e:
+          if attempt == retries:
+            raise
+          if isinstance(e, TooManyRequests):
+            self._rate_limiter.backoff(attempt + 1)
+
+    orders = self.map_concurrently(submit, [[entry] for entry in report], return_exceptions=True)
+    for entry, order in zip(report, orders):
+      if isinstance(order, Exception):
+        entry['error'] = repr(order)
+      else:
+        entry['order'] = order
+    return report
+
   ### CRYPTO ###
 
   def get_crypto_halts(self):
@@ -2138,35 +2466,30 @@ class RobinhoodClient:
         }
     ]
     """
-    response = self._get_session(NUMMUS, authed=True).get(NUMMUS_HOST + 'activations/')
-    _raise_on_error(response)
-    response_json = response.json()
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(NUMMUS, authed=True).get,
+        [NUMMUS_HOST + 'activations/']
+    )
 
   def get_crypto_watchlists(self):
     """
     Example response:
     TODO
     """
-    response = self._get_session(NUMMUS, authed=True).get(NUMMUS_HOST + 'watchlists/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(NUMMUS, authed=True).get,
+        [NUMMUS_HOST + 'watchlists/']
+    )
 
   def get_crypto_holdings(self):
     """
     Example response:
     TODO
     """
-    response = self._get_session(NUMMUS, authed=True).get(NUMMUS_HOST + 'holdings/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(NUMMUS, authed=True).get,
+        [NUMMUS_HOST + 'holdings/']
+    )
 
   def get_crypto_portfolio(self, portfolio_id):
     """
@@ -2200,12 +2523,15 @@ class RobinhoodClient:
     Example response:
     TODO
     """
-    response = self._get_session(NUMMUS, authed=True).get(NUMMUS_HOST + 'orders/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    # This should never call a subclass' method
+    return list(RobinhoodClient.iterate_crypto_orders(self))
+
+  def iterate_crypto_orders(self):
+    """Same as get_crypto_orders, but yields one at a time as each page comes in."""
+    return self._iterate_results(
+        self._get_session(NUMMUS, authed=True).get,
+        [NUMMUS_HOST + 'orders/']
+    )
 
   def get_crypto_currency_pairs(self):
     """
@@ -2239,12 +2565,10 @@ class RobinhoodClient:
         ...
     ]
     """
-    response = self._get_session(NUMMUS, authed=True).get(NUMMUS_HOST + 'currency_pairs/')
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(NUMMUS, authed=True).get,
+        [NUMMUS_HOST + 'currency_pairs/']
+    )
 
   def get_crypto_currency_pair(self, currency_pair_id):
     """
@@ -2393,6 +2717,15 @@ class RobinhoodClient:
     _raise_on_error(response)
     return response.json()
 
+  def cancel_crypto_orders(self, order_ids):
+    """See cancel_orders"""
+    # This should never call a subclass' method
+    results = self.map_concurrently(
+        lambda order_id: RobinhoodClient.cancel_crypto_order(self, order_id),
+        [[order_id] for order_id in order_ids],
+        return_exceptions=True)
+    return dict(zip(order_ids, results))
+
   def order_crypto(self, currency_pair_id, order_type, order_side, quantity, price):
     """
     Example response:
@@ -2444,12 +2777,11 @@ class RobinhoodClient:
     params = {}
     if not include_old:
       params['nonzero'] = 'True'
-    response = self._get_session(API, authed=True).get(API_HOST + 'options/positions/', params=params)
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'options/positions/'],
+        request_params=params
+    )
 
   def get_options_order(self, order_id):
     """
@@ -2529,9 +2861,23 @@ class RobinhoodClient:
         }
     ]
     """
-    return self._collect_results(
+    # This should never call a subclass' method
+    return list(RobinhoodClient.iterate_options_orders(self))
+
+  def iterate_options_orders(self, updated_since=None):
+    """
+    Same as get_options_orders, but yields one at a time as each page comes in.
+
+    Args:
+      updated_since: A UTC datetime, only orders updated since then
+    """
+    params = {}
+    if updated_since:
+      params['updated_at[gte]'] = updated_since.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    return self._iterate_results(
         self._get_session(API, authed=True).get,
-        [API_HOST + 'options/orders/']
+        [API_HOST + 'options/orders/'],
+        request_params=params
     )
 
   def get_options_events(self, instrument_id=None):
@@ -2543,12 +2889,11 @@ class RobinhoodClient:
     params = {}
     if instrument_id:
       params['equity_instrument_id'] = instrument_id
-    response = self._get_session(API, authed=True).get(API_HOST + 'options/events/', params=params)
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'options/events/'],
+        request_params=params
+    )
 
   def get_options_marketdata(self, options_instrument_id):
     """
@@ -2588,6 +2933,9 @@ class RobinhoodClient:
 
   def get_options_marketdatas(self, options_instrument_ids):
     """
+    In the same order as options_instrument_ids, contracts without marketdata,
+    e.g. expired ones, get None in their place.
+
     Example response:
     [
         {
@@ -2619,6 +2967,14 @@ class RobinhoodClient:
         ...
     ]
     """
+    # Like quotes, the query param can only be so long, so fetch the chunks concurrently.
+    if len(options_instrument_ids) > 35:
+      # This should never call a subclass' method
+      chunked_results = self.map_concurrently(
+          lambda ids: RobinhoodClient.get_options_marketdatas(self, ids),
+          [[options_instrument_ids[i:i + 35]] for i in range(0, len(options_instrument_ids), 35)])
+      return [result for results in chunked_results for result in results]
+
     params = {
         'instruments': ','.join([
             options_instrument_id_to_url(options_instrument_id) for options_instrument_id in options_instrument_ids
@@ -2626,9 +2982,7 @@ class RobinhoodClient:
     }
     response = self._get_session(API, authed=True).get(API_HOST + 'marketdata/options/', params=params)
     _raise_on_error(response)
-    results = response.json()['results']
-    assert len(results) == len(options_instrument_ids)
-    return results
+    return response.json()['results']
 
   def get_options_instrument(self, options_instrument_id):
     """
@@ -2779,17 +3133,26 @@ class RobinhoodClient:
     ]
     """
     assert not (chain_ids and instrument_ids)
+    # Like instruments, the query param can only be so long, so fetch the chunks concurrently.
+    ids = chain_ids or instrument_ids or []
+    if len(ids) > 75:
+      ids_kwarg = 'chain_ids' if chain_ids else 'instrument_ids'
+      # This should never call a subclass' method
+      chunked_results = self.map_concurrently(
+          lambda chunk_ids: RobinhoodClient.get_options_chains(self, **{ids_kwarg: chunk_ids}),
+          [[ids[i:i + 75]] for i in range(0, len(ids), 75)])
+      return [result for results in chunked_results for result in results]
+
     params = {}
     if chain_ids:
       params['ids'] = ','.join(chain_ids),
     if instrument_ids:
       params['equity_instrument_ids'] = ','.join(instrument_ids),
-    response = self._get_session(API, authed=True).get(API_HOST + 'options/chains/', params=params)
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'options/chains/'],
+        request_params=params
+    )
 
   def get_options_discoveries(self, chain_id):
     """
@@ -2884,12 +3247,11 @@ class RobinhoodClient:
     params = {
         'acount': account_url,
     }
-    response = self._get_session(API, authed=True).get(API_HOST + 'options/level_changes/', params=params)
-    _raise_on_error(response)
-    response_json = response.json()
-    # TODO: autopage
-    assert not response_json['next']
-    return response_json['results']
+    return self._collect_results(
+        self._get_session(API, authed=True).get,
+        [API_HOST + 'options/level_changes/'],
+        request_params=params
+    )
 
   def cancel_options_order(self, order_id):
     """
@@ -2900,6 +3262,15 @@ class RobinhoodClient:
     _raise_on_error(response)
     return response.json()
 
+  def cancel_options_orders(self, order_ids):
+    """See cancel_orders"""
+    # This should never call a subclass' method
+    results = self.map_concurrently(
+        lambda order_id: RobinhoodClient.cancel_options_order(self, order_id),
+        [[order_id] for order_id in order_ids],
+        return_exceptions=True)
+    return dict(zip(order_ids, results))
+
   def order_options(self, options_instrument_id, order_type, direction, quantity, price, use_account_url=None):
     """
     Example response:
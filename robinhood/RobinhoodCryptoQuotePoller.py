@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import threading
+
+import requests
+
+from .exceptions import TooManyRequests
+from .RobinhoodClient import RobinhoodClient
+
+
+class RobinhoodCryptoQuotePoller:
+  """
+  Polls quotes for a set of currency pairs and tells subscribers only what changed.
+
+  Every tick is one batched request for all of the pairs. The last quote of
+  each pair is kept, and subscribers get called with (currency_pair_id,
+  changes, quote) where changes is a dict of just the fields that differ from
+  the previous tick. The first tick reports every field.
+
+  The interval drops to min_interval whenever something changes and stretches
+  out towards max_interval while nothing does. Getting rate limited drains the
+  client's rate limiter and doubles the interval, as does any other failed
+  request, so a flaky connection doesn't end the polling.
+  """
+  def __init__(self, client, currency_pair_ids, min_interval=1, max_interval=30):
+    """
+    Args:
+      client: A RobinhoodClient or RobinhoodCachedClient, quotes always come from the live api
+      currency_pair_ids: Pairs to poll, see get_crypto_currency_pairs
+      min_interval, max_interval: Bounds on the seconds between ticks
+    """
+    self._client = client
+    self._currency_pair_ids = list(currency_pair_ids)
+    self._min_interval = min_interval
+    self._max_interval = max_interval
+    self._interval = min_interval
+    self._quote_by_id = {}
+    self._callbacks = []
+    self._lock = threading.Lock()
+    self._stop_event = threading.Event()
+    self._thread = None
+
+  @property
+  def interval(self):
+    return self._interval
+
+  def get_snapshot(self):
+    """The latest quote of every pair polled so far, by currency pair id."""
+    with self._lock:
+      return dict(self._quote_by_id)
+
+  def subscribe(self, callback):
+    """callback(currency_pair_id, changes, quote) gets called from the polling thread."""
+    with self._lock:
+      self._callbacks.append(callback)
+
+  def unsubscribe(self, callback):
+    with self._lock:
+      self._callbacks.remove(callback)
+
+  def poll(self):
+    """
+    Runs one tick, returning a list of (currency_pair_id, changes, quote) for the pairs
+    that changed after telling subscribers about them.
+    """
+    if not self._currency_pair_ids:
+      return []
+    try:
+      # Always go to the live api, never a subclass' cache
+      quotes = RobinhoodClient.get_crypto_quotes(self._client, currency_pair_ids=self._currency_pair_ids)
+    except TooManyRequests:
+      self._interval = min(self._interval * 2, self._max_interval)
+      logging.warning('Rate limited polling crypto quotes, backing off for {}s'.format(self._interval))
+      self._client.backoff(self._interval)
+      return []
+    except requests.RequestException as e:
+      # Connection errors, timeouts and 5xxs
+      self._interval = min(self._interval * 2, self._max_interval)
+      logging.warning('Failed to poll crypto quotes, retrying in {}s: {}'.format(self._interval, e))
+      return []
+
+    updates = []
+    with self._lock:
+      for quote in quotes:
+        previous_quote = self._quote_by_id.get(quote['id'], {})
+        changes = {key: value for key, value in quote.items() if previous_quote.get(key) != value}
+        self._quote_by_id[quote['id']] = quote
+        if changes:
+          updates.append((quote['id'], changes, quote))
+      callbacks = list(self._callbacks)
+
+    if updates:
+      self._interval = self._min_interval
+    else:
+      self._interval = min(self._interval * 1.5, self._max_interval)
+
+    for currency_pair_id, changes, quote in updates:
+      for callback in callbacks:
+        try:
+          callback(currency_pair_id, changes, quote)
+        except Exception:
+          logging.exception('Crypto quote subscriber failed')
+    return updates
+
+  def run(self):
+    """Polls until stop() is called."""
+    while not self._stop_event.is_set():
+      self.poll()
+      self._stop_event.wait(self._interval)
+
+  def start(self):
+    """Polls on a background thread."""
+    assert not self._thread, 'Already started'
+    self._stop_event.clear()
+    self._thread = threading.Thread(target=self.run, name='crypto-quote-poller', daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    self._stop_event.set()
+    if self._thread and self._thread is not threading.current_thread():
+      self._thread.join()
+    self._thread = None
+
+  async def iterate_changes(self):
+    """
+    Async iterator of (currency_pair_id, changes, quote), polling for as long as
+    it's being iterated. Requests run on the event loop's default executor.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+      for update in await loop.run_in_executor(None, self.poll):
+        yield update
+      await asyncio.sleep(self._interval)
@@ -0,0 +1,297 @@
+"""
+A long running process holding one warm RobinhoodCachedClient, so scripts can
+skip building and logging in a client, disclosure and auth checks and new TLS
+handshakes.
+
+Scripts import get_client and run_in_daemon from here and start their main
+block with:
+
+  if __name__ == '__main__':
+    run_in_daemon(__file__)
+
+When a daemon is listening on DAEMON_SOCKET_PATH the script runs inside it and
+this process just relays stdin, stdout, stderr and the exit code. Otherwise
+run_in_daemon returns and the script runs in-process as usual. Hanging up,
+e.g. with ctrl-c, raises KeyboardInterrupt in the script inside the daemon.
+
+This module only imports the standard library at the top so that handing off
+stays cheap, the client gets imported when a client is actually needed.
+"""
+import ctypes
+import json
+import logging
+import os
+import queue
+import runpy
+import socket
+import sys
+import threading
+import time
+import traceback
+
+DAEMON_SOCKET_PATH = os.path.join('.robinhood', 'daemon.sock')
+
+# The daemon running in this process, if any
+_daemon = None
+# When each get_client call started and finished, for cli --timings
+_client_timings = []
+
+
+def get_client():
+  """The daemon's warm client when running inside one, otherwise a fresh logged in client."""
+  started_at = time.perf_counter()
+  if _daemon:
+    client = _daemon.get_client()
+  else:
+    from .RobinhoodCachedClient import RobinhoodCachedClient
+    client = RobinhoodCachedClient()
+    client.login()
+  _client_timings.append((started_at, time.perf_counter()))
+  return client
+
+
+def _send_message(sock, message):
+  sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def run_in_daemon(script_path, argv=None, socket_path=DAEMON_SOCKET_PATH):
+  """
+  Runs the script in the daemon and exits with its exit code. Returns without
+  doing anything if there's no daemon or when already running inside one.
+  """
+  if _daemon:
+    return
+  sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  try:
+    sock.connect(socket_path)
+  except (FileNotFoundError, ConnectionRefusedError):
+    sock.close()
+    return
+
+  _send_message(sock, {
+      'script_path': os.path.abspath(script_path),
+      'argv': sys.argv[1:] if argv is None else argv,
+  })
+  exit_code = 1
+  try:
+    with sock.makefile('rb') as messages:
+      for line in messages:
+        message = json.loads(line.decode('utf-8'))
+        if 'stdout' in message:
+          sys.stdout.write(message['stdout'])
+          sys.stdout.flush()
+        elif 'stderr' in message:
+          sys.stderr.write(message['stderr'])
+          sys.stderr.flush()
+        elif 'readline' in message:
+          _send_message(sock, {'stdin': sys.stdin.readline()})
+        elif 'exit' in message:
+          exit_code = message['exit']
+          break
+  except KeyboardInterrupt:
+    # Hanging up interrupts the script in the daemon
+    exit_code = 130
+  finally:
+    sock.close()
+  sys.exit(exit_code)
+
+
+class _ConnectionStream:
+  """A file-like object standing in for stdin, stdout or stderr of a connected script."""
+  def __init__(self, connection, name):
+    self._connection = connection
+    self._name = name
+
+  def write(self, text):
+    self._connection.send({self._name: text})
+    return len(text)
+
+  def readline(self, size=-1):
+    return self._connection.readline()
+
+  def read(self, size=-1):
+    return ''.join(iter(self.readline, ''))
+
+  def flush(self):
+    pass
+
+  def isatty(self):
+    return False
+
+  def close(self):
+    # exit() closes stdin, the connection outlives it
+    pass
+
+
+class _Connection:
+  """
+  After the request, everything the script's process sends is stdin, read on a
+  thread of its own so that hanging up gets noticed while the script is busy.
+  """
+  def __init__(self, sock):
+    self._sock = sock
+    self._messages = sock.makefile('rb')
+    self._send_lock = threading.Lock()
+    self._stdin_lines = queue.Queue()
+    self._hung_up = threading.Event()
+    self._interrupt_lock = threading.Lock()
+    self._interrupt_thread_id = None
+
+  def send(self, message):
+    with self._send_lock:
+      _send_message(self._sock, message)
+
+  def receive(self):
+    line = self._messages.readline()
+    return json.loads(line.decode('utf-8')) if line else None
+
+  def readline(self):
+    if self._hung_up.is_set():
+      return ''
+    self.send({'readline': True})
+    return self._stdin_lines.get()
+
+  def interrupt_on_hang_up(self, thread_id):
+    """Raises KeyboardInterrupt in the given thread if the script's process hangs up, until stop_interrupting."""
+    with self._interrupt_lock:
+      self._interrupt_thread_id = thread_id
+    threading.Thread(target=self._read_stdin, name='daemon-stdin', daemon=True).start()
+
+  def stop_interrupting(self):
+    with self._interrupt_lock:
+      thread_id, self._interrupt_thread_id = self._interrupt_thread_id, None
+      if thread_id:
+        # Drop an interrupt that was raised but hasn't been delivered yet
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), None)
+
+  def _read_stdin(self):
+    while True:
+      try:
+        message = self.receive()
+      except (OSError, ValueError):
+        # Closed from this end once the script finished
+        message = None
+      if not message:
+        break
+      self._stdin_lines.put(message.get('stdin', ''))
+    self._hung_up.set()
+    # Unblock a readline waiting on a reply that's never coming
+    self._stdin_lines.put('')
+    with self._interrupt_lock:
+      if self._interrupt_thread_id:
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(
+            ctypes.c_ulong(self._interrupt_thread_id), ctypes.py_object(KeyboardInterrupt))
+
+  def close(self):
+    try:
+      # Wakes up the stdin thread if it's still reading
+      self._sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+      pass
+    self._messages.close()
+    self._sock.close()
+
+
+class RobinhoodDaemon:
+  """
+  Serves script runs over a Unix socket, all sharing one client along with its
+  connection pools and in-memory caches.
+
+  stdin, stdout, stderr and argv are process wide, so scripts run one at a time
+  and a script that keeps running, like a --watch, holds up the ones after it
+  until it's stopped with ctrl-c, which interrupts it the same as in-process.
+  """
+  def __init__(self, socket_path=DAEMON_SOCKET_PATH):
+    from .RobinhoodCachedClient import RobinhoodCachedClient, cache_root_path
+    self._socket_path = socket_path
+    self._auth_path = os.path.join(cache_root_path, 'auth_data')
+    self._auth_mtime = None
+    self._client = RobinhoodCachedClient()
+    self._run_lock = threading.Lock()
+
+  def get_client(self):
+    # Pick up logins and logouts done by `robinhood login` and `robinhood logout` in other processes
+    if not os.path.exists(self._auth_path):
+      print('Not logged in, run `robinhood login` first')
+      exit(1)
+    auth_mtime = os.path.getmtime(self._auth_path)
+    if auth_mtime != self._auth_mtime:
+      self._client.login()
+      self._auth_mtime = auth_mtime
+    return self._client
+
+  def serve_forever(self):
+    global _daemon
+    if os.path.exists(self._socket_path):
+      probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      try:
+        probe.connect(self._socket_path)
+      except ConnectionRefusedError:
+        # Left behind by a daemon that didn't shut down cleanly
+        os.remove(self._socket_path)
+      else:
+        raise RuntimeError('A daemon is already listening on {}'.format(self._socket_path))
+      finally:
+        probe.close()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # The daemon holds an auth token, only this user gets to talk to it
+    old_umask = os.umask(0o177)
+    try:
+      server.bind(self._socket_path)
+    finally:
+      os.umask(old_umask)
+    server.listen()
+    _daemon = self
+    try:
+      while True:
+        sock, _ = server.accept()
+        threading.Thread(target=self._handle, args=(sock,), name='daemon-connection', daemon=True).start()
+    finally:
+      _daemon = None
+      server.close()
+      os.remove(self._socket_path)
+
+  def _handle(self, sock):
+    connection = _Connection(sock)
+    try:
+      request = connection.receive()
+      if request:
+        with self._run_lock:
+          exit_code = self._run_script(connection, request['script_path'], request['argv'])
+        connection.send({'exit': exit_code})
+    except ConnectionError:
+      # The script's process went away
+      pass
+    finally:
+      connection.close()
+
+  def _run_script(self, connection, script_path, argv):
+    saved = (sys.stdin, sys.stdout, sys.stderr, sys.argv)
+    sys.stdin = _ConnectionStream(connection, 'stdin')
+    sys.stdout = _ConnectionStream(connection, 'stdout')
+    sys.stderr = _ConnectionStream(connection, 'stderr')
+    sys.argv = [script_path] + argv
+    try:
+      connection.interrupt_on_hang_up(threading.get_ident())
+      try:
+        runpy.run_path(script_path, run_name='__main__')
+      finally:
+        connection.stop_interrupting()
+      return 0
+    except KeyboardInterrupt:
+      # The script's process hung up and the script didn't handle it
+      return 130
+    except SystemExit as e:
+      if e.code is None or isinstance(e.code, int):
+        return e.code or 0
+      print(e.code, file=sys.stderr)
+      return 1
+    except ConnectionError:
+      raise
+    except BaseException:
+      traceback.print_exc()
+      return 1
+    finally:
+      sys.stdin, sys.stdout, sys.stderr, sys.argv = saved
+      logging.info('Ran {} {}'.format(os.path.basename(script_path), ' '.join(argv)))
@@ -0,0 +1,223 @@
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+import logging
+import os
+
+from . import cache_format
+from .exceptions import CorruptCacheEntry
+from .RobinhoodClient import RobinhoodClient
+
+# Rewriting the whole store every page would be slow, checkpoint every so often instead.
+CHECKPOINT_EVERY_PAGES = 25
+
+
+class RobinhoodInstrumentUniverse:
+  """
+  A local copy of the entire instrument listing with indexes on top of it.
+
+  The store is one json file holding every instrument by id along with when it
+  was last synced and last fully synced. If a full sync gets interrupted, the
+  cursor it got to is stored too and the next sync picks up from there.
+  """
+  DEFAULT_MAX_AGE = timedelta(days=1)
+  FULL_SYNC_MAX_AGE = timedelta(days=7)
+
+  def __init__(self, client, store_path):
+    self._client = client
+    self._store_path = store_path
+    self._instrument_by_id = {}
+    self._synced_at = None
+    self._fully_synced_at = None
+    self._resume_cursor = None
+    store_json = self._load(store_path)
+    if store_json:
+      self._instrument_by_id = store_json['instruments']
+      self._synced_at = self._parse_datetime(store_json['synced_at'])
+      # Stores from before incremental syncs only had full ones
+      self._fully_synced_at = self._parse_datetime(store_json.get('fully_synced_at', store_json['synced_at']))
+      self._resume_cursor = store_json['resume_cursor']
+    self._build_indexes()
+
+  @staticmethod
+  def _load(store_path):
+    if not os.path.exists(store_path):
+      return None
+    try:
+      return cache_format.load(store_path)
+    except CorruptCacheEntry as e:
+      # Starts over with a full sync
+      logging.warning('Dropping instrument store {}: {}'.format(store_path, e))
+      return None
+
+  @staticmethod
+  def _parse_datetime(value):
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f') if value else None
+
+  def _build_indexes(self):
+    self._id_by_symbol = {}
+    self._ids_by_symbol = defaultdict(set)
+    self._ids_by_state = defaultdict(set)
+    self._ids_by_tradability = defaultdict(set)
+    self._ids_by_market = defaultdict(set)
+    for instrument in self._instrument_by_id.values():
+      self._index_instrument(instrument)
+    self._sorted_symbols = sorted(self._id_by_symbol.keys())
+
+  def _index_instrument(self, instrument):
+    instrument_id = instrument['id']
+    self._ids_by_symbol[instrument['symbol']].add(instrument_id)
+    # Delisted instruments can share a symbol with the active one, the active one wins.
+    existing_id = self._id_by_symbol.get(instrument['symbol'])
+    if not existing_id or existing_id == instrument_id or instrument['state'] == 'active':
+      self._id_by_symbol[instrument['symbol']] = instrument_id
+    self._ids_by_state[instrument['state']].add(instrument_id)
+    self._ids_by_tradability[instrument['tradability']].add(instrument_id)
+    self._ids_by_market[self._get_market_code(instrument)].add(instrument_id)
+
+  def _unindex_instrument(self, instrument):
+    instrument_id = instrument['id']
+    symbol = instrument['symbol']
+    other_ids = self._ids_by_symbol[symbol]
+    other_ids.discard(instrument_id)
+    if self._id_by_symbol.get(symbol) == instrument_id:
+      if other_ids:
+        # Fall back on whichever other instrument has the symbol, an active one if there is one
+        self._id_by_symbol[symbol] = max(
+            other_ids, key=lambda other_id: self._instrument_by_id[other_id]['state'] == 'active')
+      else:
+        del self._id_by_symbol[symbol]
+        del self._ids_by_symbol[symbol]
+    self._ids_by_state[instrument['state']].discard(instrument_id)
+    self._ids_by_tradability[instrument['tradability']].discard(instrument_id)
+    self._ids_by_market[self._get_market_code(instrument)].discard(instrument_id)
+
+  @staticmethod
+  def _get_market_code(instrument):
+    # e.g. https://api.robinhood.com/markets/XNAS/
+    return instrument['market'].rstrip('/').split('/')[-1]
+
+  def _save(self):
+    store_json = {
+        'synced_at': self._synced_at.isoformat(timespec='microseconds') if self._synced_at else None,
+        'fully_synced_at': self._fully_synced_at.isoformat(timespec='microseconds') if self._fully_synced_at else None,
+        'resume_cursor': self._resume_cursor,
+        'instruments': self._instrument_by_id,
+    }
+    cache_format.dump(store_json, self._store_path)
+
+  def _merge(self, instruments):
+    for instrument in instruments:
+      existing_instrument = self._instrument_by_id.get(instrument['id'])
+      if existing_instrument == instrument:
+        continue
+      if existing_instrument:
+        self._unindex_instrument(existing_instrument)
+      self._instrument_by_id[instrument['id']] = instrument
+      self._index_instrument(instrument)
+
+  @property
+  def synced_at(self):
+    return self._synced_at
+
+  def sync(self, max_age=DEFAULT_MAX_AGE):
+    """
+    Brings the store up to date, doing nothing if the last sync is newer than
+    max_age (pass None to force a full sync).
+
+    The first sync, and any once the last full one is older than
+    FULL_SYNC_MAX_AGE, pages through the whole listing including the inactive
+    instruments that make up most of it. In between, only the active listing
+    is paged, which picks up new listings and changes to active instruments,
+    and instruments that dropped out of it are re-fetched by id for their new
+    state.
+    """
+    started_at = datetime.now()
+    if self._synced_at and not self._resume_cursor and max_age is not None:
+      if started_at - self._synced_at < max_age:
+        return
+
+    if (max_age is None or self._resume_cursor or not self._fully_synced_at
+        or started_at - self._fully_synced_at >= self.FULL_SYNC_MAX_AGE):
+      self._sync_full()
+      self._fully_synced_at = started_at
+    else:
+      self._sync_active()
+    self._synced_at = started_at
+    self._sorted_symbols = sorted(self._id_by_symbol.keys())
+    self._save()
+
+  def _sync_full(self):
+    if self._resume_cursor:
+      logging.debug('Resuming instrument sync from {}'.format(self._resume_cursor))
+    for page_num, (instruments, next_cursor) in enumerate(self._client.get_instrument_pages(cursor=self._resume_cursor)):
+      self._merge(instruments)
+      self._resume_cursor = next_cursor
+      if next_cursor and page_num % CHECKPOINT_EVERY_PAGES == CHECKPOINT_EVERY_PAGES - 1:
+        self._save()
+
+  def _sync_active(self):
+    # Not resumable, the ids seen so far would be lost, but it's short
+    previously_active_ids = set(self._ids_by_state['active'])
+    seen_ids = set()
+    for instruments, _ in self._client.get_instrument_pages(active_only=True):
+      self._merge(instruments)
+      seen_ids.update(instrument['id'] for instrument in instruments)
+    dropped_ids = list(previously_active_ids - seen_ids)
+    if dropped_ids:
+      logging.debug('Refreshing {} instruments that are no longer active'.format(len(dropped_ids)))
+      # Always go to the live api, never a subclass' cache
+      self._merge(instrument for instrument in RobinhoodClient.get_instruments(self._client, dropped_ids) if instrument)
+
+  def refresh_instruments(self, instrument_ids):
+    """Re-fetches just the given instruments and merges them into the store."""
+    # Always go to the live api, never a subclass' cache
+    self._merge(RobinhoodClient.get_instruments(self._client, instrument_ids))
+    self._sorted_symbols = sorted(self._id_by_symbol.keys())
+    self._save()
+
+  def __len__(self):
+    return len(self._instrument_by_id)
+
+  def __contains__(self, symbol):
+    return symbol in self._id_by_symbol
+
+  def get_instrument_id_by_symbol(self, symbol):
+    return self._id_by_symbol.get(symbol)
+
+  def get_instrument_by_id(self, instrument_id):
+    return self._instrument_by_id.get(instrument_id)
+
+  def get_instrument_by_symbol(self, symbol):
+    instrument_id = self._id_by_symbol.get(symbol)
+    return self._instrument_by_id[instrument_id] if instrument_id else None
+
+  def search_symbols(self, prefix, limit=None):
+    """Symbols starting with the given prefix, in sorted order."""
+    symbols = []
+    for i in range(bisect_left(self._sorted_symbols, prefix), len(self._sorted_symbols)):
+      symbol = self._sorted_symbols[i]
+      if not symbol.startswith(prefix) or (limit and len(symbols) >= limit):
+        break
+      symbols.append(symbol)
+    return symbols
+
+  def filter_instruments(self, tradability=None, state=None, market=None):
+    """
+    Args:
+      tradability: util.TRADABILITY
+      state: e.g. active, inactive, unlisted
+      market: Market code, e.g. XNAS
+    """
+    instrument_ids = None
+    for ids_by_key, key in [
+        (self._ids_by_tradability, tradability),
+        (self._ids_by_state, state),
+        (self._ids_by_market, market)]:
+      if key is None:
+        continue
+      key_ids = ids_by_key.get(key, set())
+      instrument_ids = key_ids if instrument_ids is None else instrument_ids & key_ids
+    if instrument_ids is None:
+      return list(self._instrument_by_id.values())
+    return [self._instrument_by_id[instrument_id] for instrument_id in instrument_ids]
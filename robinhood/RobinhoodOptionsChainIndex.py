@@ -0,0 +1,178 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import logging
+import os
+
+from . import cache_format
+from .exceptions import CorruptCacheEntry
+from .RobinhoodClient import RobinhoodClient
+
+
+class RobinhoodOptionsChainIndex:
+  """
+  The active, tradable contracts of one options chain, grouped by expiration
+  date and type with strikes kept sorted so lookups are a bisect instead of a
+  scan. Strikes are compared as Decimals, never floats.
+
+  Contracts past their expiration are dropped on load. Once the index is older
+  than max_age it is rebuilt, since existing expiration dates gain strikes and
+  contracts stop being tradable, not just new dates showing up. A lookup that
+  misses can refresh just the dates it's about with refresh_expiration_dates.
+  """
+  DEFAULT_MAX_AGE = timedelta(hours=12)
+
+  def __init__(self, client, chain_id, store_path):
+    self._client = client
+    self._chain_id = chain_id
+    self._store_path = store_path
+    self._refreshed_at = None
+    options_instruments = []
+    store_json = None
+    if os.path.exists(store_path):
+      try:
+        store_json = cache_format.load(store_path)
+      except CorruptCacheEntry as e:
+        # Never refreshed, so the next refresh rebuilds it
+        logging.warning('Dropping options chain index {}: {}'.format(store_path, e))
+    if store_json:
+      self._refreshed_at = datetime.strptime(store_json['refreshed_at'], '%Y-%m-%dT%H:%M:%S.%f')
+      options_instruments = store_json['options_instruments']
+    self._build_indexes(options_instruments)
+
+  def _build_indexes(self, options_instruments):
+    self._strikes = defaultdict(list)
+    self._options_instruments = defaultdict(list)
+    self._options_instrument_by_id = {}
+    self._add(options_instruments)
+
+  def _add(self, options_instruments):
+    today = date.today().isoformat()
+    for options_instrument in options_instruments:
+      if options_instrument['expiration_date'] < today:
+        continue
+      key = (options_instrument['expiration_date'], options_instrument['type'])
+      strike = Decimal(options_instrument['strike_price'])
+      strikes = self._strikes[key]
+      i = bisect_left(strikes, strike)
+      if i < len(strikes) and strikes[i] == strike:
+        self._options_instruments[key][i] = options_instrument
+      else:
+        strikes.insert(i, strike)
+        self._options_instruments[key].insert(i, options_instrument)
+      self._options_instrument_by_id[options_instrument['id']] = options_instrument
+
+  def _prune_expired(self):
+    today = date.today().isoformat()
+    for key in list(self._strikes.keys()):
+      if key[0] < today:
+        for options_instrument in self._options_instruments[key]:
+          del self._options_instrument_by_id[options_instrument['id']]
+        del self._strikes[key]
+        del self._options_instruments[key]
+
+  def _save(self):
+    store_json = {
+        'refreshed_at': self._refreshed_at.isoformat(timespec='microseconds'),
+        'options_instruments': list(self._options_instrument_by_id.values()),
+    }
+    cache_format.dump(store_json, self._store_path)
+
+  def _fetch(self, expiration_dates=None):
+    kwargs = {}
+    if expiration_dates:
+      kwargs['expiration_dates'] = expiration_dates
+    # Always go to the live api, never a subclass' cache
+    return RobinhoodClient.get_options_instruments(
+        self._client, chain_id=self._chain_id, tradability='tradable', state='active', **kwargs)
+
+  def rebuild(self):
+    """Fetches every active contract of the chain from scratch."""
+    self._refreshed_at = datetime.now()
+    self._build_indexes(self._fetch())
+    self._save()
+
+  def refresh(self, max_age=DEFAULT_MAX_AGE):
+    """Drops expired contracts, rebuilding the index if it's older than max_age."""
+    if self._refreshed_at is None or datetime.now() - self._refreshed_at >= max_age:
+      self.rebuild()
+      return
+    self._prune_expired()
+
+  def refresh_expiration_dates(self, expiration_dates):
+    """Re-fetches just the contracts of the given expiration dates, replacing what's indexed for them."""
+    for key in [key for key in self._strikes.keys() if key[0] in expiration_dates]:
+      for options_instrument in self._options_instruments[key]:
+        del self._options_instrument_by_id[options_instrument['id']]
+      del self._strikes[key]
+      del self._options_instruments[key]
+    self._add(self._fetch(expiration_dates=expiration_dates))
+    self._save()
+
+  @property
+  def expiration_dates(self):
+    return sorted(set(expiration_date for expiration_date, _ in self._strikes.keys()))
+
+  def __len__(self):
+    return len(self._options_instrument_by_id)
+
+  def get_options_instrument_by_id(self, options_instrument_id):
+    return self._options_instrument_by_id.get(options_instrument_id)
+
+  def get_strikes(self, expiration_date, options_type):
+    return list(self._strikes.get((expiration_date, options_type), []))
+
+  def get_contract(self, expiration_date, options_type, strike):
+    """The contract at exactly the given strike, or None."""
+    key = (expiration_date, options_type)
+    strikes = self._strikes.get(key, [])
+    strike = Decimal(strike)
+    i = bisect_left(strikes, strike)
+    if i < len(strikes) and strikes[i] == strike:
+      return self._options_instruments[key][i]
+    return None
+
+  def get_nearest_contract(self, expiration_date, options_type, strike):
+    """The contract with the strike closest to the given one, ties go to the lower strike."""
+    key = (expiration_date, options_type)
+    strikes = self._strikes.get(key, [])
+    if not strikes:
+      return None
+    strike = Decimal(strike)
+    i = bisect_left(strikes, strike)
+    if i == len(strikes) or (i > 0 and strike - strikes[i - 1] <= strikes[i] - strike):
+      i -= 1
+    return self._options_instruments[key][i]
+
+  def get_contracts_in_range(self, expiration_date, options_type, low_strike, high_strike):
+    """Contracts with low_strike <= strike <= high_strike, sorted by strike."""
+    key = (expiration_date, options_type)
+    strikes = self._strikes.get(key, [])
+    low = bisect_left(strikes, Decimal(low_strike))
+    high = bisect_right(strikes, Decimal(high_strike))
+    return self._options_instruments[key][low:high] if key in self._options_instruments else []
+
+  def get_contracts(self, expiration_dates=None, options_type=None, strike=None):
+    """
+    Contracts matching all of the given filters, sorted by expiration date, type and strike.
+
+    Args:
+      expiration_dates: e.g. ['2018-04-13']
+      options_type: util.OPTIONS_TYPES
+      strike: Exact strike price
+    """
+    contracts = []
+    for key in sorted(self._strikes.keys()):
+      expiration_date, key_options_type = key
+      if expiration_dates and expiration_date not in expiration_dates:
+        continue
+      if options_type and key_options_type != options_type:
+        continue
+      if strike is None:
+        contracts.extend(self._options_instruments[key])
+      else:
+        contract = self.get_contract(expiration_date, key_options_type, strike)
+        if contract:
+          contracts.append(contract)
+    return contracts
@@ -0,0 +1,180 @@
+from datetime import date, timedelta
+from decimal import Decimal
+import logging
+
+from .options_pricing import price_chain
+from .RobinhoodClient import RobinhoodClient
+from .util import get_last_id_from_url
+
+
+class RobinhoodOptionsScanner:
+  """
+  Scans the options chains of many underlyings at once for contracts that pass
+  a set of filters.
+
+  Instruments, quotes and chains are looked up in bulk up front, then each chain's
+  contracts and marketdata are fetched on the client's worker pool. Results are
+  yielded chain by chain as they finish, each already ranked.
+  """
+  def __init__(self, client, client_kwargs=None):
+    """
+    Args:
+      client: A RobinhoodClient or RobinhoodCachedClient
+      client_kwargs: Passed to the calls that take them on a RobinhoodCachedClient, e.g. cache_mode
+    """
+    self._client = client
+    self._client_kwargs = client_kwargs or {}
+
+  @staticmethod
+  def rank_key(candidate):
+    """Tightest spread first, then the most open interest."""
+    return (candidate['spread_percent'], -candidate['open_interest'])
+
+  def scan(
+      self,
+      symbols,
+      options_type=None,
+      min_days=0,
+      max_days=45,
+      min_delta=None,
+      max_delta=None,
+      min_volume=0,
+      min_open_interest=0,
+      max_spread_percent=None,
+      rank_key=None):
+    """
+    Yields (symbol, candidates) for each underlying as its chain finishes, in no
+    particular order. Symbols that aren't found or have no chain are skipped.
+
+    Args:
+      options_type: util.OPTIONS_TYPES, or None for both
+      min_days, max_days: Window of days until expiration, inclusive
+      min_delta, max_delta: Bounds on the absolute value of delta
+      max_spread_percent: Largest bid/ask spread as a percent of the mark price
+      rank_key: Sort key for candidates, defaults to RobinhoodOptionsScanner.rank_key
+
+    Each candidate is a dict of symbol, options_instrument, options_marketdata,
+    days_to_expiration, spread_percent, volume, open_interest and the greeks and
+    implied_volatility from options_pricing.price_chain.
+    """
+    filters = {
+        'options_type': options_type,
+        'min_days': min_days,
+        'max_days': max_days,
+        'min_delta': min_delta,
+        'max_delta': max_delta,
+        'min_volume': min_volume,
+        'min_open_interest': min_open_interest,
+        'max_spread_percent': max_spread_percent,
+        'rank_key': rank_key or self.rank_key,
+    }
+
+    instrument_by_symbol = self._client.get_instruments_by_symbols(symbols, **self._client_kwargs)
+    symbol_by_instrument_id = {instrument['id']: symbol for symbol, instrument in instrument_by_symbol.items()}
+    if not symbol_by_instrument_id:
+      return
+
+    instrument_ids = list(symbol_by_instrument_id.keys())
+    # Always the live api, never a subclass' cache, quotes would be cached forever
+    # while the greeks get solved against marketdata that's only seconds old
+    quotes = RobinhoodClient.get_quotes(self._client, instrument_ids)
+    spot_by_instrument_id = {
+        get_last_id_from_url(quote['instrument']): float(quote['last_extended_hours_trade_price'] or quote['last_trade_price'])
+        for quote in quotes if quote
+    }
+    options_chains = [
+        options_chain for options_chain in self._client.get_options_chains(instrument_ids=instrument_ids, **self._client_kwargs)
+        if options_chain['can_open_position'] and len(options_chain['underlying_instruments']) == 1
+    ]
+
+    args_list = []
+    for options_chain in options_chains:
+      instrument_id = get_last_id_from_url(options_chain['underlying_instruments'][0]['instrument'])
+      if instrument_id not in spot_by_instrument_id:
+        continue
+      args_list.append((
+          symbol_by_instrument_id[instrument_id], options_chain, spot_by_instrument_id[instrument_id], filters))
+
+    for i, candidates in self._client.iterate_concurrently(self._scan_chain, args_list):
+      symbol = args_list[i][0]
+      if isinstance(candidates, Exception):
+        logging.warning('Failed to scan {}: {}'.format(symbol, candidates))
+        continue
+      yield symbol, candidates
+
+  def _scan_chain(self, symbol, options_chain, spot, filters):
+    today = date.today()
+    first_date = (today + timedelta(days=filters['min_days'])).isoformat()
+    last_date = (today + timedelta(days=filters['max_days'])).isoformat()
+    expiration_dates = [d for d in options_chain['expiration_dates'] if first_date <= d <= last_date]
+    if not expiration_dates:
+      return []
+
+    options_instruments = self._client.get_options_instruments(
+        chain_id=options_chain['id'],
+        options_type=filters['options_type'],
+        tradability='tradable',
+        state='active',
+        expiration_dates=expiration_dates,
+        **self._client_kwargs)
+    if not options_instruments:
+      return []
+    options_marketdatas = self._client.get_options_marketdatas(
+        [options_instrument['id'] for options_instrument in options_instruments], **self._client_kwargs)
+    options_marketdata_by_id = {
+        get_last_id_from_url(options_marketdata['instrument']): options_marketdata
+        for options_marketdata in options_marketdatas if options_marketdata
+    }
+
+    # Cheap filters first so only what's left gets priced
+    survivors = []
+    for options_instrument in options_instruments:
+      options_marketdata = options_marketdata_by_id.get(options_instrument['id'])
+      if not options_marketdata:
+        continue
+      volume = options_marketdata['volume'] or 0
+      open_interest = options_marketdata['open_interest'] or 0
+      if volume < filters['min_volume'] or open_interest < filters['min_open_interest']:
+        continue
+      mark_price = Decimal(options_marketdata['adjusted_mark_price'])
+      if not mark_price:
+        continue
+      spread_percent = (Decimal(options_marketdata['ask_price']) - Decimal(options_marketdata['bid_price'])) * 100 / mark_price
+      if filters['max_spread_percent'] is not None and spread_percent > filters['max_spread_percent']:
+        continue
+      survivors.append((options_instrument, options_marketdata, spread_percent))
+    if not survivors:
+      return []
+
+    priced = price_chain(
+        spot,
+        [options_instrument for options_instrument, _, _ in survivors],
+        [options_marketdata for _, options_marketdata, _ in survivors])
+
+    candidates = []
+    for i, (options_instrument, options_marketdata, spread_percent) in enumerate(survivors):
+      delta = priced['delta'][i]
+      if filters['min_delta'] is not None or filters['max_delta'] is not None:
+        if delta is None:
+          continue
+        if filters['min_delta'] is not None and abs(delta) < filters['min_delta']:
+          continue
+        if filters['max_delta'] is not None and abs(delta) > filters['max_delta']:
+          continue
+      expiration_date = options_instrument['expiration_date']
+      candidates.append({
+          'symbol': symbol,
+          'options_instrument': options_instrument,
+          'options_marketdata': options_marketdata,
+          'days_to_expiration': (date(*map(int, expiration_date.split('-'))) - today).days,
+          'spread_percent': spread_percent,
+          'volume': options_marketdata['volume'] or 0,
+          'open_interest': options_marketdata['open_interest'] or 0,
+          'implied_volatility': priced['implied_volatility'][i],
+          'delta': delta,
+          'gamma': priced['gamma'][i],
+          'theta': priced['theta'][i],
+          'vega': priced['vega'][i],
+      })
+    candidates.sort(key=filters['rank_key'])
+    return candidates
@@ -0,0 +1,204 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+import logging
+import threading
+import time
+
+from .exceptions import TooManyRequests
+from .RobinhoodClient import RobinhoodClient
+from .util import API, NUMMUS, FINAL_ORDER_STATES
+
+# Order kind to the host it lives on, the client method that fetches one and
+# the RobinhoodClient method that lists the ones updated since a given time.
+# Crypto's listing can't be filtered that way.
+ORDER_KINDS = {
+    'equity': (API, 'get_order_by_id', 'iterate_orders'),
+    'options': (API, 'get_options_order', 'iterate_options_orders'),
+    'crypto': (NUMMUS, 'get_crypto_order', None),
+}
+# Listings reach back a little further than the last one to allow for clock skew
+LISTING_OVERLAP = timedelta(seconds=10)
+
+
+class RobinhoodOrderTracker:
+  """
+  Watches orders until they reach a final state, calling subscribers on every
+  state change.
+
+  Only orders that aren't final yet get polled. Each tick, a kind of order
+  with a listing that can be filtered by update time is polled with one
+  listing request for everything updated since the last one, which is fanned
+  out to the tracked orders, however many there are. Orders that haven't been
+  seen yet, and crypto orders, are fetched one at a time.
+
+  Each host keeps its own interval which resets to min_interval when something
+  changes, stretches towards max_interval while nothing does and doubles when
+  that host rate limits us.
+
+  With a RobinhoodCachedClient the one at a time fetches go through its order
+  cache, listings always go to the live api.
+  """
+  def __init__(self, client, client_kwargs=None, min_interval=1, max_interval=60):
+    """
+    Args:
+      client: A RobinhoodClient or RobinhoodCachedClient
+      client_kwargs: Passed to every order fetch, e.g. cache_mode
+      min_interval, max_interval: Bounds on the seconds between polls of a host
+    """
+    self._client = client
+    self._client_kwargs = client_kwargs or {}
+    self._min_interval = min_interval
+    self._max_interval = max_interval
+    self._order_by_id = {}
+    self._kind_by_order_id = {}
+    self._listed_since_by_kind = {}
+    self._interval_by_host = defaultdict(lambda: min_interval)
+    self._next_poll_at_by_host = defaultdict(float)
+    self._callbacks = []
+    self._lock = threading.Lock()
+    self._stop_event = threading.Event()
+    self._thread = None
+
+  def subscribe(self, callback):
+    """callback(kind, order, previous_state) gets called on every state change."""
+    with self._lock:
+      self._callbacks.append(callback)
+
+  def unsubscribe(self, callback):
+    with self._lock:
+      self._callbacks.remove(callback)
+
+  def track(self, order_id, kind='equity', order=None):
+    """
+    Args:
+      kind: One of ORDER_KINDS
+      order: The order as last seen if there is one, e.g. the response from placing it
+    """
+    assert kind in ORDER_KINDS
+    with self._lock:
+      self._kind_by_order_id[order_id] = kind
+      if order:
+        self._order_by_id[order_id] = order
+
+  def get_order(self, order_id):
+    with self._lock:
+      return self._order_by_id.get(order_id)
+
+  def _is_pending(self, order_id):
+    order = self._order_by_id.get(order_id)
+    return not order or order['state'] not in FINAL_ORDER_STATES
+
+  def get_pending_order_ids(self):
+    with self._lock:
+      return [order_id for order_id in self._kind_by_order_id if self._is_pending(order_id)]
+
+  def _fetch(self, kind, order_id, listed_since):
+    """One order by id, or with an order_id of None, every order of the kind updated since listed_since."""
+    if order_id:
+      return [getattr(self._client, ORDER_KINDS[kind][1])(order_id, **self._client_kwargs)]
+    # Always go to the live api, never a subclass' cache
+    return list(getattr(RobinhoodClient, ORDER_KINDS[kind][2])(self._client, updated_since=listed_since))
+
+  def poll(self):
+    """
+    Polls the pending orders of every host that's due, returning a list of
+    (kind, order, previous_state) for the orders whose state changed.
+    """
+    now = time.monotonic()
+    listing_started_at = datetime.now(timezone.utc)
+    with self._lock:
+      due_hosts = set()
+      pending_order_ids_by_kind = defaultdict(set)
+      args_list = []
+      for order_id in filter(self._is_pending, self._kind_by_order_id):
+        kind = self._kind_by_order_id[order_id]
+        host = ORDER_KINDS[kind][0]
+        if self._next_poll_at_by_host[host] > now:
+          continue
+        due_hosts.add(host)
+        pending_order_ids_by_kind[kind].add(order_id)
+        # Nothing to compare a listing against until the order has been seen
+        if not ORDER_KINDS[kind][2] or order_id not in self._order_by_id or kind not in self._listed_since_by_kind:
+          args_list.append((kind, order_id, None))
+      for kind in pending_order_ids_by_kind:
+        if ORDER_KINDS[kind][2] and kind in self._listed_since_by_kind:
+          args_list.append((kind, None, self._listed_since_by_kind[kind]))
+    if not args_list:
+      return []
+
+    results = self._client.map_concurrently(self._fetch, args_list, return_exceptions=True)
+
+    transitions = []
+    rate_limited_hosts = set()
+    changed_hosts = set()
+    with self._lock:
+      for (kind, order_id, _), orders in zip(args_list, results):
+        host = ORDER_KINDS[kind][0]
+        if isinstance(orders, TooManyRequests):
+          rate_limited_hosts.add(host)
+          continue
+        elif isinstance(orders, Exception):
+          logging.warning('Failed to poll {} order {}: {}'.format(kind, order_id or 'listing', orders))
+          continue
+        if ORDER_KINDS[kind][2] and (not order_id or kind not in self._listed_since_by_kind):
+          # Everything since the listing started gets picked up by the next one
+          self._listed_since_by_kind[kind] = listing_started_at - LISTING_OVERLAP
+        for order in orders:
+          if order['id'] not in pending_order_ids_by_kind[kind]:
+            continue
+          previous_order = self._order_by_id.get(order['id'])
+          previous_state = previous_order['state'] if previous_order else None
+          self._order_by_id[order['id']] = order
+          if order['state'] != previous_state:
+            changed_hosts.add(host)
+            transitions.append((kind, order, previous_state))
+
+      for host in due_hosts:
+        interval = self._interval_by_host[host]
+        if host in rate_limited_hosts:
+          interval = min(interval * 2, self._max_interval)
+        elif host in changed_hosts:
+          interval = self._min_interval
+        else:
+          interval = min(interval * 1.5, self._max_interval)
+        self._interval_by_host[host] = interval
+        self._next_poll_at_by_host[host] = time.monotonic() + interval
+      callbacks = list(self._callbacks)
+
+    for host in rate_limited_hosts:
+      logging.warning('Rate limited polling orders on {}, backing off for {}s'.format(host, self._interval_by_host[host]))
+      self._client.backoff(self._interval_by_host[host])
+
+    for transition in transitions:
+      for callback in callbacks:
+        try:
+          callback(*transition)
+        except Exception:
+          logging.exception('Order tracker subscriber failed')
+    return transitions
+
+  def run(self):
+    """Polls until every tracked order is final or stop() is called."""
+    while not self._stop_event.is_set():
+      self.poll()
+      with self._lock:
+        pending_hosts = set(
+            ORDER_KINDS[self._kind_by_order_id[order_id]][0]
+            for order_id in filter(self._is_pending, self._kind_by_order_id))
+        if not pending_hosts:
+          return
+        next_poll_at = min(self._next_poll_at_by_host[host] for host in pending_hosts)
+      self._stop_event.wait(max(next_poll_at - time.monotonic(), 0))
+
+  def start(self):
+    """Polls on a background thread, callbacks get called from that thread."""
+    assert not self._thread, 'Already started'
+    self._stop_event.clear()
+    self._thread = threading.Thread(target=self.run, name='order-tracker', daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    self._stop_event.set()
+    if self._thread and self._thread is not threading.current_thread():
+      self._thread.join()
+    self._thread = None
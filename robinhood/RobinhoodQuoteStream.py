@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import threading
+
+from .exceptions import TooManyRequests
+from .RobinhoodClient import RobinhoodClient
+from .util import get_last_id_from_url
+
+# The quotes api takes at most this many instruments per request
+QUOTES_CHUNK_SIZE = 35
+# Queued to end an AsyncQuoteSubscription's iteration
+_UNSUBSCRIBED = object()
+
+
+class QuoteSubscription:
+  def __init__(self, instrument_ids, callback):
+    self.instrument_ids = frozenset(instrument_ids)
+    self.callback = callback
+    # New subscribers get the full quote on their first tick, changed or not
+    self._unsent_instrument_ids = set(instrument_ids)
+
+  def take_unsent(self, instrument_id):
+    """Whether the instrument's quote hasn't been sent yet, marking it as sent."""
+    if instrument_id not in self._unsent_instrument_ids:
+      return False
+    self._unsent_instrument_ids.discard(instrument_id)
+    return True
+
+
+class RobinhoodQuoteStream:
+  """
+  Polls equity quotes for everything subscribed to and fans out what changed.
+
+  Every tick, the instrument ids of all subscriptions are merged and fetched in
+  as few quotes requests as the 35 instrument limit allows, with the chunks
+  fetched concurrently. Each quote is diffed against the previous tick and every
+  subscription to that instrument gets callback(instrument_id, changes, quote),
+  where changes is a dict of just the fields that differ.
+  """
+  def __init__(self, client, interval=1):
+    """
+    Args:
+      client: A RobinhoodClient or RobinhoodCachedClient, quotes always come from the live api
+      interval: Seconds between ticks
+    """
+    self._client = client
+    self._interval = interval
+    self._subscriptions = []
+    self._quote_by_id = {}
+    self._lock = threading.Lock()
+    self._stop_event = threading.Event()
+    self._thread = None
+
+  def subscribe(self, instrument_ids, callback):
+    """Returns the subscription, to pass to unsubscribe."""
+    subscription = QuoteSubscription(instrument_ids, callback)
+    with self._lock:
+      self._subscriptions.append(subscription)
+    return subscription
+
+  def unsubscribe(self, subscription):
+    with self._lock:
+      self._subscriptions.remove(subscription)
+      subscribed_ids = set().union(*[s.instrument_ids for s in self._subscriptions])
+      # Forget what nobody is watching anymore
+      for instrument_id in list(self._quote_by_id.keys()):
+        if instrument_id not in subscribed_ids:
+          del self._quote_by_id[instrument_id]
+
+  def get_snapshot(self):
+    """The latest quote of every subscribed instrument, by instrument id."""
+    with self._lock:
+      return dict(self._quote_by_id)
+
+  def _fetch_quotes(self, instrument_ids):
+    chunks = [instrument_ids[i:i + QUOTES_CHUNK_SIZE] for i in range(0, len(instrument_ids), QUOTES_CHUNK_SIZE)]
+    # Always go to the live api, never a subclass' cache
+    chunked_quotes = self._client.map_concurrently(
+        lambda chunk: RobinhoodClient.get_quotes(self._client, chunk),
+        [[chunk] for chunk in chunks],
+        return_exceptions=True)
+    quotes = []
+    for chunk_quotes in chunked_quotes:
+      if isinstance(chunk_quotes, TooManyRequests):
+        logging.warning('Rate limited polling quotes, backing off for {}s'.format(self._interval))
+        self._client.backoff(self._interval)
+      elif isinstance(chunk_quotes, Exception):
+        logging.warning('Failed to poll quotes: {}'.format(chunk_quotes))
+      else:
+        # Unknown instruments come back as null
+        quotes.extend(quote for quote in chunk_quotes if quote)
+    return quotes
+
+  def poll(self):
+    """Runs one tick, returning how many updates were sent out."""
+    with self._lock:
+      instrument_ids = sorted(set().union(*[s.instrument_ids for s in self._subscriptions]))
+    if not instrument_ids:
+      return 0
+    quotes = self._fetch_quotes(instrument_ids)
+
+    deliveries = []
+    with self._lock:
+      changes_by_id = {}
+      for quote in quotes:
+        instrument_id = get_last_id_from_url(quote['instrument'])
+        previous_quote = self._quote_by_id.get(instrument_id, {})
+        changes = {key: value for key, value in quote.items() if previous_quote.get(key) != value}
+        self._quote_by_id[instrument_id] = quote
+        if changes:
+          changes_by_id[instrument_id] = changes
+
+      for subscription in self._subscriptions:
+        for instrument_id in subscription.instrument_ids:
+          quote = self._quote_by_id.get(instrument_id)
+          if not quote:
+            continue
+          if subscription.take_unsent(instrument_id):
+            deliveries.append((subscription.callback, instrument_id, dict(quote), quote))
+          elif instrument_id in changes_by_id:
+            deliveries.append((subscription.callback, instrument_id, changes_by_id[instrument_id], quote))
+
+    for callback, instrument_id, changes, quote in deliveries:
+      try:
+        callback(instrument_id, changes, quote)
+      except Exception:
+        logging.exception('Quote subscriber failed')
+    return len(deliveries)
+
+  def run(self):
+    """Polls until stop() is called."""
+    while not self._stop_event.is_set():
+      self.poll()
+      self._stop_event.wait(self._interval)
+
+  def start(self):
+    """Polls on a background thread, callbacks get called from that thread."""
+    assert not self._thread, 'Already started'
+    self._stop_event.clear()
+    self._thread = threading.Thread(target=self.run, name='quote-stream', daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    self._stop_event.set()
+    if self._thread and self._thread is not threading.current_thread():
+      self._thread.join()
+    self._thread = None
+
+
+class AsyncQuoteSubscription:
+  """Async iterator of (instrument_id, changes, quote) for one subscription."""
+  def __init__(self, stream, instrument_ids, loop):
+    self._stream = stream
+    self._loop = loop
+    self._queue = asyncio.Queue()
+    self._subscription = RobinhoodQuoteStream.subscribe(stream, instrument_ids, self._on_update)
+
+  def _on_update(self, instrument_id, changes, quote):
+    # Called from whichever thread polled
+    self._loop.call_soon_threadsafe(self._queue.put_nowait, (instrument_id, changes, quote))
+
+  def unsubscribe(self):
+    """Stops the updates, any async for over this subscription ends once it has the ones already queued."""
+    self._stream.unsubscribe(self._subscription)
+    self._loop.call_soon_threadsafe(self._queue.put_nowait, _UNSUBSCRIBED)
+
+  def __aiter__(self):
+    return self
+
+  async def __anext__(self):
+    update = await self._queue.get()
+    if update is _UNSUBSCRIBED:
+      # Leave it there for anything else iterating
+      self._queue.put_nowait(_UNSUBSCRIBED)
+      raise StopAsyncIteration
+    return update
+
+
+class AsyncRobinhoodQuoteStream(RobinhoodQuoteStream):
+  """
+  The asyncio flavor of RobinhoodQuoteStream. Subscriptions are async iterators
+  and polling is a coroutine, with requests run on the loop's default executor.
+
+    stream = AsyncRobinhoodQuoteStream(client)
+    stream.start()
+    async for instrument_id, changes, quote in stream.subscribe([instrument_id]):
+      ...
+  """
+  def __init__(self, client, interval=1):
+    super(AsyncRobinhoodQuoteStream, self).__init__(client, interval)
+    self._task = None
+
+  def subscribe(self, instrument_ids, callback=None):
+    """Returns an AsyncQuoteSubscription, or a plain subscription if given a callback."""
+    if callback:
+      return super(AsyncRobinhoodQuoteStream, self).subscribe(instrument_ids, callback)
+    return AsyncQuoteSubscription(self, instrument_ids, asyncio.get_running_loop())
+
+  async def run(self):
+    """Polls until stop() is called."""
+    loop = asyncio.get_running_loop()
+    while not self._stop_event.is_set():
+      await loop.run_in_executor(None, self.poll)
+      await asyncio.sleep(self._interval)
+
+  def start(self):
+    """Polls in a task on the running loop, returning the task."""
+    assert not self._task, 'Already started'
+    self._stop_event.clear()
+    self._task = asyncio.get_running_loop().create_task(self.run())
+    return self._task
+
+  def stop(self):
+    self._stop_event.set()
+    if self._task:
+      self._task.cancel()
+    self._task = None
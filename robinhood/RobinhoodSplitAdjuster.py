@@ -0,0 +1,144 @@
+from bisect import bisect_right
+from decimal import Decimal
+
+from robinhood.util import get_last_id_from_url
+
+HISTORICAL_PRICE_KEYS = [
+    'open_price',
+    'close_price',
+    'high_price',
+    'low_price',
+]
+
+
+class RobinhoodSplitAdjuster:
+  """
+  Class to help with adjusting historical data for stock splits.
+
+  Split history is pulled once per instrument and turned into an index of
+  execution dates with the cumulative factor of every split that comes after
+  it. Finding the factor for any date is then a bisect on that index, so
+  adjusting a series is O(bars) rather than O(bars * splits).
+
+  A factor of 7 means 1 share before the split is 7 shares now, so quantities
+  get multiplied by the factor and prices get divided by it.
+  """
+  def __init__(self, client, client_kwargs=None):
+    self._client = client
+    self._client_kwargs = client_kwargs or {}
+    self._index_by_instrument_id = {}
+
+  def _get_index(self, instrument_id):
+    if instrument_id in self._index_by_instrument_id:
+      return self._index_by_instrument_id[instrument_id]
+
+    split_history = self._client.get_instrument_split_history(instrument_id, **self._client_kwargs)
+    splits = sorted(split_history['results'], key=lambda s: s['execution_date'])
+    execution_dates = [split['execution_date'] for split in splits]
+
+    # cumulative_factors[i] is the factor for anything dated before execution_dates[i]
+    cumulative_factors = [Decimal(1)] * (len(splits) + 1)
+    for i in range(len(splits) - 1, -1, -1):
+      ratio = Decimal(splits[i]['multiplier']) / Decimal(splits[i]['divisor'])
+      cumulative_factors[i] = cumulative_factors[i + 1] * ratio
+
+    index = (execution_dates, cumulative_factors)
+    self._index_by_instrument_id[instrument_id] = index
+    return index
+
+  def get_factor(self, instrument_id, on_date):
+    """
+    Args:
+      instrument_id: Internal robinhood instrument id (a uuid)
+      on_date: A date, datetime or an ISO 8601 string (e.g. 2018-03-01T14:30:00Z)
+    """
+    execution_dates, cumulative_factors = self._get_index(instrument_id)
+    # Splits take effect at the open of the execution date, ISO dates sort lexically.
+    return cumulative_factors[bisect_right(execution_dates, str(on_date)[:10])]
+
+  def get_factors(self, instrument_id, dates):
+    """Factors for many dates at once, in the same order as given."""
+    execution_dates, cumulative_factors = self._get_index(instrument_id)
+    return [cumulative_factors[bisect_right(execution_dates, str(d)[:10])] for d in dates]
+
+  def adjust_historicals(self, instrument_id, historicals):
+    """Returns copies of the given historical bars with split adjusted prices and volumes."""
+    factors = self.get_factors(instrument_id, [bar['begins_at'] for bar in historicals])
+    adjusted_historicals = []
+    for bar, factor in zip(historicals, factors):
+      adjusted_bar = dict(bar)
+      if factor != 1:
+        for price_key in HISTORICAL_PRICE_KEYS:
+          if bar.get(price_key) is not None:
+            adjusted_bar[price_key] = '{:.4f}'.format(Decimal(bar[price_key]) / factor)
+        if bar.get('volume') is not None:
+          adjusted_bar['volume'] = int(bar['volume'] * factor)
+      adjusted_historicals.append(adjusted_bar)
+    return adjusted_historicals
+
+  def adjust_historical_quote(self, historical_quote):
+    """Adjusts a whole response from get_historical_quote(s)."""
+    instrument_id = get_last_id_from_url(historical_quote['instrument'])
+    adjusted_historical_quote = dict(historical_quote)
+    adjusted_historical_quote['historicals'] = self.adjust_historicals(
+        instrument_id, historical_quote['historicals'])
+    return adjusted_historical_quote
+
+  def adjust_order(self, order):
+    """
+    Returns a copy of the order with quantities and prices adjusted to today's
+    share count, each execution is adjusted by its own timestamp.
+    """
+    instrument_id = get_last_id_from_url(order['instrument'])
+    adjusted_order = dict(order)
+
+    order_factor = self.get_factor(instrument_id, order['created_at'])
+    for quantity_key in ['quantity', 'cumulative_quantity']:
+      if order.get(quantity_key) is not None:
+        adjusted_order[quantity_key] = '{:.5f}'.format(Decimal(order[quantity_key]) * order_factor)
+    for price_key in ['price', 'average_price', 'stop_price']:
+      if order.get(price_key) is not None:
+        adjusted_order[price_key] = '{:.8f}'.format(Decimal(order[price_key]) / order_factor)
+
+    executions = order.get('executions', [])
+    execution_factors = self.get_factors(instrument_id, [e['timestamp'] for e in executions])
+    adjusted_executions = []
+    for execution, factor in zip(executions, execution_factors):
+      adjusted_execution = dict(execution)
+      adjusted_execution['quantity'] = '{:.5f}'.format(Decimal(execution['quantity']) * factor)
+      adjusted_execution['price'] = '{:.8f}'.format(Decimal(execution['price']) / factor)
+      adjusted_executions.append(adjusted_execution)
+    adjusted_order['executions'] = adjusted_executions
+    return adjusted_order
+
+  def adjust_position(self, position):
+    """
+    Returns a copy of a (possibly cached) position brought up to date for any
+    splits since it was last updated.
+    """
+    instrument_id = get_last_id_from_url(position['instrument'])
+    factor = self.get_factor(instrument_id, position['updated_at'])
+    adjusted_position = dict(position)
+    if factor != 1:
+      for quantity_key in ['quantity', 'intraday_quantity']:
+        adjusted_position[quantity_key] = '{:.4f}'.format(Decimal(position[quantity_key]) * factor)
+      for price_key in ['average_buy_price', 'intraday_average_buy_price', 'pending_average_buy_price']:
+        adjusted_position[price_key] = '{:.4f}'.format(Decimal(position[price_key]) / factor)
+    return adjusted_position
+
+  def get_adjusted_cost_basis(self, orders):
+    """
+    Split adjusted (quantity, average_buy_price) from the filled buy executions of the given
+    orders for a single instrument.
+    """
+    quantity = Decimal(0)
+    cost = Decimal(0)
+    for order in orders:
+      if order['side'] != 'buy' or order['state'] != 'filled':
+        continue
+      for execution in self.adjust_order(order)['executions']:
+        execution_quantity = Decimal(execution['quantity'])
+        quantity += execution_quantity
+        cost += execution_quantity * Decimal(execution['price'])
+    average_buy_price = cost / quantity if quantity else Decimal(0)
+    return quantity, average_buy_price
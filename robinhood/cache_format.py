@@ -0,0 +1,125 @@
+"""
+How cached JSON is laid out on disk.
+
+Entries start with a header of MAGIC, the format version and which compression
+was used, followed by the JSON, compressed or not. Files without the header
+are plain JSON from before there was a header and still load as is.
+
+Compression defaults to gzip and can be set with the ROBINHOOD_CACHE_COMPRESSION
+environment variable to none, gzip or zstd. zstd needs the zstandard package,
+without it entries get written with gzip instead. See `robinhood benchmark-cache`
+for how the choices compare.
+"""
+import functools
+import gzip
+import json
+import logging
+import os
+import tempfile
+import zlib
+
+from .exceptions import CorruptCacheEntry
+
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+MAGIC = b'RHC'
+FORMAT_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+# Compression name to the id stored in the header
+COMPRESSIONS = {
+    'none': 0,
+    'gzip': 1,
+    'zstd': 2,
+}
+DEFAULT_COMPRESSION = os.environ.get('ROBINHOOD_CACHE_COMPRESSION', 'gzip')
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def get_compression(compression=None):
+  """Resolves None to the default, falling back to gzip when zstd isn't installed."""
+  compression = compression or DEFAULT_COMPRESSION
+  if compression not in COMPRESSIONS:
+    raise ValueError('Unknown cache compression {}, use one of {}'.format(compression, ', '.join(COMPRESSIONS)))
+  if compression == 'zstd' and not zstandard:
+    _warn_zstandard_missing()
+    return 'gzip'
+  return compression
+
+
+@functools.lru_cache(maxsize=None)
+def _warn_zstandard_missing():
+  # Once, rather than on every write
+  logging.warning('zstd cache compression needs `pip install zstandard`, using gzip')
+
+
+def dumps(content, compression=None):
+  compression = get_compression(compression)
+  data = json.dumps(content).encode('utf-8')
+  if compression == 'gzip':
+    data = gzip.compress(data, compresslevel=GZIP_LEVEL)
+  elif compression == 'zstd':
+    data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+  return MAGIC + bytes([FORMAT_VERSION, COMPRESSIONS[compression]]) + data
+
+
+def _decode_json(data):
+  try:
+    return json.loads(data.decode('utf-8'))
+  except (UnicodeDecodeError, json.JSONDecodeError) as e:
+    raise CorruptCacheEntry('Bad json: {}'.format(e))
+
+
+def loads(data):
+  """Raises CorruptCacheEntry for anything that isn't a complete entry."""
+  if not data.startswith(MAGIC):
+    # From before the header
+    return _decode_json(data)
+
+  if len(data) < HEADER_SIZE:
+    raise CorruptCacheEntry('Truncated header')
+  version, compression_id = data[len(MAGIC)], data[len(MAGIC) + 1]
+  if version != FORMAT_VERSION:
+    raise CorruptCacheEntry('Unknown cache format version {}'.format(version))
+  data = data[HEADER_SIZE:]
+  if compression_id == COMPRESSIONS['gzip']:
+    try:
+      data = gzip.decompress(data)
+    except (EOFError, OSError, zlib.error) as e:
+      raise CorruptCacheEntry('Bad gzip data: {}'.format(e))
+  elif compression_id == COMPRESSIONS['zstd']:
+    if not zstandard:
+      raise CorruptCacheEntry('Cache entry is zstd compressed, that needs `pip install zstandard`')
+    try:
+      data = zstandard.ZstdDecompressor().decompress(data)
+    except zstandard.ZstdError as e:
+      raise CorruptCacheEntry('Bad zstd data: {}'.format(e))
+  elif compression_id != COMPRESSIONS['none']:
+    raise CorruptCacheEntry('Unknown cache compression {}'.format(compression_id))
+  return _decode_json(data)
+
+
+def dump(content, file_path, compression=None):
+  """
+  Written to a temporary file and then moved into place, so readers and other
+  writers of the same entry never see it half written.
+  """
+  data = dumps(content, compression)
+  temporary_file = tempfile.NamedTemporaryFile(
+      dir=os.path.dirname(file_path) or '.', prefix='.incoming_', delete=False)
+  try:
+    with temporary_file:
+      temporary_file.write(data)
+    os.replace(temporary_file.name, file_path)
+  finally:
+    if os.path.exists(temporary_file.name):
+      os.remove(temporary_file.name)
+
+
+def load(file_path):
+  with open(file_path, 'rb') as cache_file:
+    return loads(cache_file.read())
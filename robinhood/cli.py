@@ -0,0 +1,93 @@
+"""
+The robinhood command, one entry point for all of the scripts in
+robinhood.commands.
+
+Only the standard library is imported up front, a subcommand's module and its
+dependencies get imported when it runs and scripts only build a client once
+their arguments parse, so `robinhood --help` and `robinhood order --help` never
+touch the network. Pass --timings to see where a command's cold start goes.
+"""
+import argparse
+import runpy
+import sys
+import time
+
+from . import RobinhoodDaemon
+
+# Subcommand to the script module that implements it and a one line summary
+COMMANDS = {
+    'login': ('robinhood.commands.login', 'Force a new login and cache the token'),
+    'logout': ('robinhood.commands.logout', 'Invalidate and delete the cached token'),
+    'enable-mfa': ('robinhood.commands.enable_mfa', 'Enable MFA for login'),
+    'disable-mfa': ('robinhood.commands.disable_mfa', 'Disable MFA for login'),
+    'start-daemon': ('robinhood.commands.start_daemon', 'Keep a warm client for the other commands to run in'),
+    'download-portfolio': ('robinhood.commands.download_portfolio', 'Current positions with various stats'),
+    'download-history': ('robinhood.commands.download_history', 'All account history'),
+    'download-documents': ('robinhood.commands.download_documents', "Documents that you've received"),
+    'sync-instruments': ('robinhood.commands.sync_instruments', 'Page the full instrument listing into a local index'),
+    'benchmark-cache': ('robinhood.commands.benchmark_cache', 'Compare cache compressions by size and read time'),
+    'show-quote': ('robinhood.commands.show_quote', 'The latest quote for a symbol along with auxiliary info'),
+    'show-watchlist': ('robinhood.commands.show_watchlist', 'A refreshing dashboard of every stock on a watchlist'),
+    'order': ('robinhood.commands.order', 'Place a stock order'),
+    'order-batch': ('robinhood.commands.order_batch', 'Place every order in a csv at once'),
+    'show-pending-orders': ('robinhood.commands.show_pending_orders', 'Outstanding stock orders'),
+    'cancel': ('robinhood.commands.cancel', 'Cancel stock orders'),
+    'show-potentials': ('robinhood.commands.show_potentials', 'Stocks and stats to help decide on positions'),
+    'show-interesting-stocks': ('robinhood.commands.show_interesting_stocks', 'Stocks that are on various lists'),
+    'prepare-sentiment': ('robinhood.commands.prepare_sentiment', 'Prepare sentiment data'),
+    'show-options-discoveries': ('robinhood.commands.show_options_discoveries', "Robinhood's options suggestions for a symbol"),
+    'scan-options': ('robinhood.commands.scan_options', "Scan many symbols' options chains for contracts"),
+    'show-options-quote': ('robinhood.commands.show_options_quote', 'Quotes for options contracts'),
+    'order-options': ('robinhood.commands.order_options', 'Place an options order'),
+    'show-pending-options-orders': ('robinhood.commands.show_pending_options_orders', 'Outstanding options orders'),
+    'cancel-options': ('robinhood.commands.cancel_options', 'Cancel options orders'),
+    'show-crypto-quote': ('robinhood.commands.show_crypto_quote', 'Quotes for cryptocurrencies'),
+    'order-crypto': ('robinhood.commands.order_crypto', 'Place a cryptocurrency order'),
+    'cancel-crypto': ('robinhood.commands.cancel_crypto', 'Cancel crypto orders'),
+}
+
+
+def _print_timings(command, module_started_at):
+  finished_at = time.perf_counter()
+  client_timings = RobinhoodDaemon._client_timings
+  # Everything before the first client is the script's imports and argument parsing
+  imports_finished_at = client_timings[0][0] if client_timings else finished_at
+  client_seconds = sum(client_finished_at - client_started_at for client_started_at, client_finished_at in client_timings)
+  print(
+      '{}: imports {:.3f}s, client {:.3f}s, run {:.3f}s, total {:.3f}s (after interpreter startup)'.format(
+          command,
+          imports_finished_at - module_started_at,
+          client_seconds,
+          finished_at - imports_finished_at - client_seconds,
+          finished_at - module_started_at),
+      file=sys.stderr)
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(
+      prog='robinhood',
+      description='Trade and look things up on Robinhood',
+      formatter_class=argparse.RawDescriptionHelpFormatter,
+      epilog='commands:\n{}'.format('\n'.join(
+          '  {:<30}{}'.format(command, summary) for command, (_, summary) in COMMANDS.items())))
+  parser.add_argument(
+      '--timings',
+      action='store_true',
+      help='Print how long the command took to start, to build a client and to run, to stderr')
+  parser.add_argument('command', choices=COMMANDS.keys(), metavar='command', help='One of the commands below')
+  parser.add_argument('args', nargs=argparse.REMAINDER, help="The command's arguments, see robinhood COMMAND --help")
+  args = parser.parse_args(argv)
+
+  module_name = COMMANDS[args.command][0]
+  # The script parses its own arguments out of sys.argv
+  sys.argv = ['robinhood {}'.format(args.command)] + args.args
+  module_started_at = time.perf_counter()
+  try:
+    runpy.run_module(module_name, run_name='__main__')
+  finally:
+    if args.timings:
+      _print_timings(args.command, module_started_at)
+
+
+if __name__ == '__main__':
+  main()
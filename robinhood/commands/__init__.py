@@ -0,0 +1 @@
+"""The robinhood command's subcommands, one module each, see cli.COMMANDS."""
@@ -0,0 +1,142 @@
+import argparse
+from datetime import date, timedelta
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from robinhood import cache_format
+from robinhood.exceptions import CorruptCacheEntry
+from robinhood.RobinhoodCachedClient import cache_root_path
+from robinhood.util import parse_positive_int_argument
+
+BENCHMARK_TABLE_ROW = '{:<6} {:>12} {:>12} {:>7} {:>9} {:>9} {:>9}'
+DISK_BLOCK_SIZE = 4096
+
+
+def load_cache_entries(cache_path):
+  """Every JSON entry in the cache by name, leaving out auth and blob pointers which are never compressed."""
+  entries = {}
+  for cache_name in sorted(os.listdir(cache_path)):
+    entry_path = os.path.join(cache_path, cache_name)
+    if cache_name == 'auth_data' or cache_name.startswith('not_found_') or not os.path.isfile(entry_path):
+      continue
+    try:
+      content = cache_format.load(entry_path)
+    except CorruptCacheEntry:
+      # Plain text ids, binary entries and writes in progress
+      continue
+    if isinstance(content, dict) and set(content.keys()) == {'blob', 'size'}:
+      continue
+    entries[cache_name] = content
+  return entries
+
+
+def make_synthetic_entries(count):
+  """Entries shaped like cached instruments, orders and historicals, for when there's no cache to measure."""
+  entries = {}
+  for i in range(count):
+    instrument_id = str(uuid.uuid4())
+    entries['instrument_{}'.format(instrument_id)] = {
+        'id': instrument_id,
+        'url': 'https://api.robinhood.com/instruments/{}/'.format(instrument_id),
+        'symbol': 'SYM{}'.format(i),
+        'name': 'Synthetic Company {} Inc. Common Stock'.format(i),
+        'simple_name': 'Synthetic {}'.format(i),
+        'market': 'https://api.robinhood.com/markets/XNAS/',
+        'state': 'active',
+        'tradability': 'tradable',
+        'tradeable': True,
+        'list_date': '2010-01-04',
+    }
+    order_id = str(uuid.uuid4())
+    entries['order_{}'.format(order_id)] = {
+        'id': order_id,
+        'instrument': 'https://api.robinhood.com/instruments/{}/'.format(instrument_id),
+        'side': random.choice(['buy', 'sell']),
+        'state': 'filled',
+        'quantity': '{:.5f}'.format(random.randint(1, 100)),
+        'average_price': '{:.6f}'.format(random.uniform(1, 500)),
+        'executions': [{
+            'id': str(uuid.uuid4()),
+            'price': '{:.6f}'.format(random.uniform(1, 500)),
+            'quantity': '{:.5f}'.format(random.randint(1, 100)),
+            'timestamp': '2018-03-{:02}T14:30:00.000000Z'.format(random.randint(1, 28)),
+        }],
+    }
+    if i % 10 == 0:
+      start = date(2017, 1, 2)
+      close_price = random.uniform(1, 500)
+      historicals = []
+      for day in range(250):
+        open_price, close_price = close_price, close_price * random.uniform(0.97, 1.03)
+        historicals.append({
+            'begins_at': '{}T00:00:00Z'.format(start + timedelta(days=day)),
+            'open_price': '{:.4f}'.format(open_price),
+            'close_price': '{:.4f}'.format(close_price),
+            'high_price': '{:.4f}'.format(max(open_price, close_price) * 1.01),
+            'low_price': '{:.4f}'.format(min(open_price, close_price) * 0.99),
+            'volume': random.randint(10000, 10000000),
+            'session': 'reg',
+            'interpolated': False,
+        })
+      entries['historicals_{}'.format(instrument_id)] = {'symbol': 'SYM{}'.format(i), 'historicals': historicals}
+  return entries
+
+
+def benchmark_compression(entries, compression, repeat):
+  """Returns (bytes, bytes on disk, write seconds, read seconds, read CPU seconds) for the entries."""
+  with tempfile.TemporaryDirectory() as temp_path:
+    write_started_at = time.perf_counter()
+    for cache_name, content in entries.items():
+      cache_format.dump(content, os.path.join(temp_path, cache_name), compression)
+    write_seconds = time.perf_counter() - write_started_at
+
+    sizes = [os.path.getsize(os.path.join(temp_path, cache_name)) for cache_name in entries]
+    disk_size = sum(-(-size // DISK_BLOCK_SIZE) * DISK_BLOCK_SIZE for size in sizes)
+
+    read_seconds = read_cpu_seconds = None
+    for _ in range(repeat):
+      read_started_at = time.perf_counter()
+      read_cpu_started_at = time.process_time()
+      for cache_name in entries:
+        cache_format.load(os.path.join(temp_path, cache_name))
+      # Best of the runs, the first one warms the page cache
+      read_seconds = min(read_seconds or float('inf'), time.perf_counter() - read_started_at)
+      read_cpu_seconds = min(read_cpu_seconds or float('inf'), time.process_time() - read_cpu_started_at)
+  return sum(sizes), disk_size, write_seconds, read_seconds, read_cpu_seconds
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Compare cache compressions by size on disk and time to read back')
+  parser.add_argument('--cache', default=cache_root_path, help='The cache to measure a copy of')
+  parser.add_argument('--synthetic', type=int, default=0, help='Measure this many made up instruments instead of the cache')
+  parser.add_argument('--repeat', type=parse_positive_int_argument, default=3, help='How many times to read everything back')
+  args = parser.parse_args()
+
+  if args.synthetic:
+    entries = make_synthetic_entries(args.synthetic)
+  else:
+    entries = load_cache_entries(args.cache)
+  if not entries:
+    print('No cache entries in {}, try --synthetic 1000'.format(args.cache))
+    exit()
+
+  compressions = [compression for compression in cache_format.COMPRESSIONS if compression != 'zstd' or cache_format.zstandard]
+  print('{} entries, default compression is {}'.format(len(entries), cache_format.get_compression()))
+  if not cache_format.zstandard:
+    print('zstd skipped, `pip install zstandard` to include it')
+  print(BENCHMARK_TABLE_ROW.format('codec', 'bytes', 'on disk', 'ratio', 'write s', 'read s', 'read cpu'))
+  uncompressed_size = None
+  for compression in compressions:
+    size, disk_size, write_seconds, read_seconds, read_cpu_seconds = benchmark_compression(entries, compression, args.repeat)
+    uncompressed_size = uncompressed_size or size
+    print(BENCHMARK_TABLE_ROW.format(
+        compression,
+        size,
+        disk_size,
+        '{:.2f}x'.format(uncompressed_size / size),
+        '{:.3f}'.format(write_seconds),
+        '{:.3f}'.format(read_seconds),
+        '{:.3f}'.format(read_cpu_seconds)))
@@ -1,13 +1,8 @@
-#!/usr/bin/env python3
-
 import argparse
 import json
 
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, FORCE_LIVE
-
-# Set up the client
-client = RobinhoodCachedClient()
-client.login()
+from robinhood.RobinhoodCachedClient import FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
 
 def cancel_orders(order_ids):
 
@@ -18,15 +13,22 @@ def cancel_orders(order_ids):
       print('Bailed out!')
       exit()
 
+    # These all go out at once
+    cancelled_order_by_id = client.cancel_orders(order_ids)
     for order_id in order_ids:
-      cancelled_order = client.cancel_order(order_id)
-      print('Cancelled order {}'.format(order_id))
+      cancelled_order = cancelled_order_by_id[order_id]
+      if isinstance(cancelled_order, Exception):
+        print('Failed to cancel order {}: {}'.format(order_id, repr(cancelled_order)))
+      else:
+        print('Cancelled order {}'.format(order_id))
 
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
   parser = argparse.ArgumentParser(description='Cancel orders')
   parser.add_argument('order_ids', nargs='*', help='The order ids to cancel')
   args = parser.parse_args()
+  client = get_client()
 
   order_ids = args.order_ids
   if not order_ids:
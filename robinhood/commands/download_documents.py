@@ -0,0 +1,93 @@
+import argparse
+import csv
+import os
+import shutil
+
+from robinhood.RobinhoodCachedClient import CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
+
+MANIFEST_PATH = 'documents.csv'
+MANIFEST_FIELDNAMES = ['document_id', 'date', 'type', 'path', 'size']
+
+
+def load_manifest(manifest_path):
+  """The rows of the manifest whose file is still there and complete, by document id."""
+  if not os.path.exists(manifest_path):
+    return {}
+  with open(manifest_path, 'r', newline='') as manifest_file:
+    rows = list(csv.DictReader(manifest_file))
+  completed_row_by_id = {}
+  for row in rows:
+    if not os.path.exists(row['path']):
+      continue
+    # Manifests from before sizes were recorded get theirs filled in
+    size = os.path.getsize(row['path'])
+    if row.get('size') and int(row['size']) != size:
+      continue
+    row['size'] = size
+    completed_row_by_id[row['document_id']] = row
+  return completed_row_by_id
+
+
+def link_to_cache(cache_path, pdf_path):
+  """Hard links the cached PDF rather than copying its bytes, falling back to a copy across filesystems."""
+  if os.path.exists(pdf_path):
+    os.remove(pdf_path)
+  try:
+    os.link(cache_path, pdf_path)
+  except OSError:
+    shutil.copyfile(cache_path, pdf_path)
+
+
+def download_document(document):
+  cache_path = client.download_document_to_cache(document['id'])
+  pdf_path = 'document_{}.pdf'.format(document['id'])
+  link_to_cache(cache_path, pdf_path)
+  return {
+      'document_id': document['id'],
+      'date': document['date'],
+      'type': document['type'],
+      'path': pdf_path,
+      'size': os.path.getsize(pdf_path),
+  }
+
+
+def download_documents(cache_mode, manifest_path=MANIFEST_PATH):
+  completed_row_by_id = load_manifest(manifest_path)
+  documents = client.get_documents(cache_mode=cache_mode)
+  pending_documents = [document for document in documents if document['id'] not in completed_row_by_id]
+  print('{} documents, {} already downloaded'.format(len(documents), len(documents) - len(pending_documents)))
+
+  # Rewritten with just what's complete, then appended to as each download
+  # finishes so an interrupted run picks up where it left off
+  with open(manifest_path, 'w', newline='') as manifest_file:
+    manifest_writer = csv.DictWriter(manifest_file, fieldnames=MANIFEST_FIELDNAMES)
+    manifest_writer.writeheader()
+    manifest_writer.writerows(completed_row_by_id.values())
+    manifest_file.flush()
+
+    # The client's worker pool bounds how many download at once and its rate limiter paces them
+    failures = 0
+    for i, row in client.iterate_concurrently(download_document, [[document] for document in pending_documents]):
+      if isinstance(row, Exception):
+        failures += 1
+        print('Failed to download document {}: {}'.format(pending_documents[i]['id'], row))
+        continue
+      manifest_writer.writerow(row)
+      manifest_file.flush()
+
+  print('Downloaded {} documents{}'.format(
+      len(pending_documents) - failures, ', {} failed, run again to retry them'.format(failures) if failures else ''))
+
+
+if __name__ == '__main__':
+  run_in_daemon(__file__)
+  parser = argparse.ArgumentParser(description='Download a list of your documents')
+  parser.add_argument(
+      '--live',
+      action='store_true',
+      help='Force to not use cache for APIs where values change'
+  )
+  args = parser.parse_args()
+  client = get_client()
+  download_documents(FORCE_LIVE if args.live else CACHE_FIRST)
@@ -0,0 +1,403 @@
+from datetime import datetime
+from decimal import Decimal
+import argparse
+import csv
+import pickle
+import tempfile
+import threading
+import time
+
+#import logging
+#logging.basicConfig(level=logging.DEBUG)
+
+from dateutil.parser import parse
+import pytz
+
+from robinhood.RobinhoodCachedClient import CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
+from robinhood.util import get_last_id_from_url
+
+HISTORY_FIELDNAMES = [
+    'symbol',
+    'name',
+    'side',
+    'type',
+    'quantity',
+    'price',
+    'amount',
+    'date',
+    'fees',
+]
+# Records are matched up with their instruments this many at a time, get_instruments' page size
+INSTRUMENT_BATCH_SIZE = 75
+PARQUET_ROW_GROUP_SIZE = 10000
+
+# Guards the instrument_by_id that every section shares
+instrument_by_id_lock = threading.Lock()
+
+
+class CsvHistoryWriter:
+  def __init__(self, path):
+    self._file = open(path, 'w', newline='')
+    self._writer = csv.DictWriter(self._file, fieldnames=HISTORY_FIELDNAMES)
+    self._writer.writeheader()
+
+  def writerow(self, row):
+    self._writer.writerow(row)
+
+  def close(self):
+    self._file.close()
+
+
+class ParquetHistoryWriter:
+  """Writes a row group at a time, every column as a string just like the csv."""
+  def __init__(self, path):
+    try:
+      import pyarrow
+      import pyarrow.parquet
+    except ImportError:
+      print('Writing parquet needs pyarrow, try `pip install pyarrow` or use --format csv')
+      exit(1)
+    self._pyarrow = pyarrow
+    self._schema = pyarrow.schema([(fieldname, pyarrow.string()) for fieldname in HISTORY_FIELDNAMES])
+    self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+    self._rows = []
+
+  def writerow(self, row):
+    self._rows.append(row)
+    if len(self._rows) >= PARQUET_ROW_GROUP_SIZE:
+      self._flush()
+
+  def _flush(self):
+    if not self._rows:
+      return
+    columns = [
+        self._pyarrow.array([str(row[fieldname]) for row in self._rows], type=self._pyarrow.string())
+        for fieldname in HISTORY_FIELDNAMES
+    ]
+    self._writer.write_table(self._pyarrow.Table.from_arrays(columns, schema=self._schema))
+    self._rows = []
+
+  def close(self):
+    self._flush()
+    self._writer.close()
+
+
+def is_in_date_range(day, date_range):
+  since, until = date_range
+  return (not since or day >= since) and (not until or day <= until)
+
+
+def with_instruments(records, record_to_instrument_id, instrument_by_id):
+  """
+  Yields (record, instrument), looking up the instruments that aren't in
+  instrument_by_id yet a batch at a time. instrument_by_id is shared by every
+  section so each instrument only gets looked up once.
+  """
+  batch = []
+  for record in records:
+    batch.append(record)
+    if len(batch) >= INSTRUMENT_BATCH_SIZE:
+      yield from _resolve_batch(batch, record_to_instrument_id, instrument_by_id)
+      batch = []
+  yield from _resolve_batch(batch, record_to_instrument_id, instrument_by_id)
+
+
+def _resolve_batch(batch, record_to_instrument_id, instrument_by_id):
+  instrument_ids = set(record_to_instrument_id(record) for record in batch)
+  with instrument_by_id_lock:
+    missing_instrument_ids = [instrument_id for instrument_id in instrument_ids if instrument_id not in instrument_by_id]
+  # Not looked up under the lock, so at worst two sections look up the same instrument
+  if missing_instrument_ids:
+    instruments = client.get_instruments(missing_instrument_ids)
+    with instrument_by_id_lock:
+      for instrument in instruments:
+        instrument_by_id[instrument['id']] = instrument
+  with instrument_by_id_lock:
+    resolved = [(record, instrument_by_id[record_to_instrument_id(record)]) for record in batch]
+  yield from resolved
+
+
+def iterate_margin_rows(instrument_by_id, cache_mode, date_range):
+  account = client.get_account(cache_mode=cache_mode)
+  unallocated_margin_cash = Decimal(account['margin_balances']['unallocated_margin_cash'])
+  margin_limit = Decimal(account['margin_balances']['margin_limit'])
+  updated_at = parse(account['margin_balances']['updated_at']).astimezone(pytz.timezone('US/Pacific')).date()
+  if margin_limit == 0 or not is_in_date_range(updated_at, date_range):
+    return
+
+  used_margin = margin_limit - unallocated_margin_cash
+
+  yield {
+      'symbol': '',
+      'name': 'Robinhood Gold',
+      'type': 'margin',
+      'side': 'used',
+      'quantity': 1,
+      'price': used_margin,
+      'amount': used_margin,
+      'date': updated_at,
+      'fees': 0,
+  }
+  yield {
+      'symbol': '',
+      'name': 'Robinhood Gold',
+      'type': 'margin',
+      'side': 'available',
+      'quantity': 1,
+      'price': '{:.2f}'.format(unallocated_margin_cash),
+      'amount': '{:.2f}'.format(unallocated_margin_cash),
+      'date': updated_at,
+      'fees': 0,
+  }
+
+def iterate_subscription_fee_rows(instrument_by_id, cache_mode, date_range):
+  for subscription_fee in client.get_subscription_fees(cache_mode=cache_mode):
+    amount = Decimal(subscription_fee['amount'])
+    created_at = parse(subscription_fee['created_at']).astimezone(pytz.timezone('US/Pacific')).date()
+    assert not subscription_fee['refunds']
+    assert float(subscription_fee['credit']) == 0.0
+    assert float(subscription_fee['carry_forward_credit']) == 0.0
+    if not is_in_date_range(created_at, date_range):
+      continue
+
+    yield {
+        'symbol': '',
+        'name': 'Robinhood Gold',
+        'type': 'subscription_fee',
+        'side': 'paid',
+        'quantity': 1,
+        'price': amount,
+        'amount': amount,
+        'date': created_at,
+        'fees': 0,
+    }
+
+def iterate_transfer_rows(instrument_by_id, cache_mode, date_range):
+  for transfer in client.iterate_ach_transfers(cache_mode=cache_mode):
+    transfer_amount = Decimal(transfer['amount'])
+    early_access_amount = Decimal(transfer['early_access_amount'])
+    updated_at = parse(transfer['updated_at']).astimezone(pytz.timezone('US/Pacific')).date()
+    if not is_in_date_range(updated_at, date_range):
+      continue
+    amount = early_access_amount or transfer_amount
+    direction = 'deposit_early_access' if early_access_amount else transfer['direction']
+
+    relationship = client.get_ach_relationship_by_id(get_last_id_from_url(transfer['ach_relationship']), cache_mode=cache_mode)
+
+    yield {
+        'symbol': '',
+        'name': relationship['bank_account_nickname'],
+        'type': 'transfer',
+        'side': direction,
+        'quantity': 1,
+        'price': amount,
+        'amount': amount,
+        'date': updated_at,
+        'fees': 0,
+    }
+
+
+def iterate_reward_rows(instrument_by_id, cache_mode, date_range):
+  referrals = (
+      referral for referral in client.get_referrals(cache_mode=cache_mode)
+      if referral['direction'] == 'from'
+      and referral['reward']['stocks']
+      and referral['reward']['stocks'][0]['state'] == 'granted'
+      and is_in_date_range(parse(referral['updated_at']).astimezone(pytz.timezone('US/Pacific')).date(), date_range)
+  )
+  referral_to_instrument_id = lambda referral: get_last_id_from_url(referral['reward']['stocks'][0]['instrument_url'])
+
+  for referral, instrument in with_instruments(referrals, referral_to_instrument_id, instrument_by_id):
+    assert len(referral['reward']['stocks']) == 1
+    cost_basis = Decimal(referral['reward']['stocks'][0]['cost_basis'])
+    quantity = int(referral['reward']['stocks'][0]['quantity'])
+    updated_at = parse(referral['updated_at']).astimezone(pytz.timezone('US/Pacific')).date()
+
+    name = instrument['simple_name'] or instrument['name']
+    symbol = instrument['symbol']
+
+    yield {
+        'symbol': symbol,
+        'name': name,
+        'type': 'reward',
+        'side': 'receive',
+        'quantity': quantity,
+        'price': '{:.2f}'.format(cost_basis),
+        'amount': '{:.2f}'.format(quantity * cost_basis),
+        'date': updated_at.isoformat(),
+        'fees': 0,
+    }
+
+
+def _execution_date(execution):
+  return parse(execution['timestamp']).astimezone(pytz.timezone('US/Pacific')).date()
+
+
+def _is_order_exported(order, date_range):
+  state = order['state']
+  if state != 'filled':
+    if state not in ['queued', 'confirmed', 'cancelled']:
+      print('Skipping order {} with state {} that may need to be handled...'.format(order['id'], state))
+    return False
+  return any(is_in_date_range(_execution_date(execution), date_range) for execution in order['executions'])
+
+
+def iterate_order_rows(instrument_by_id, cache_mode, date_range):
+  orders = (order for order in client.iterate_orders(cache_mode=cache_mode) if _is_order_exported(order, date_range))
+  order_to_instrument_id = lambda order: get_last_id_from_url(order['instrument'])
+
+  for order, instrument in with_instruments(orders, order_to_instrument_id, instrument_by_id):
+    fees = Decimal(order['fees'])
+    side = order['side']
+
+    name = instrument['simple_name'] or instrument['name']
+    symbol = instrument['symbol']
+
+    for execution in order['executions']:
+      price = Decimal(execution['price'])
+      quantity = int(float(execution['quantity']))
+      amount = quantity * price
+      transaction_on = _execution_date(execution)
+
+      # An execution outside of the range was exported along with its share of the fees already
+      if is_in_date_range(transaction_on, date_range):
+        yield {
+            'symbol': symbol,
+            'name': name,
+            'type': 'order',
+            'side': side,
+            'quantity': quantity,
+            'price': '{:.2f}'.format(price),
+            'amount': '{:.2f}'.format(amount),
+            'date': transaction_on.isoformat(),
+            'fees': fees,
+        }
+      # Don't duplicate fees in multiple executions
+      if fees:
+        fees = Decimal(0)
+
+
+def iterate_dividend_rows(instrument_by_id, cache_mode, date_range):
+  dividends = (
+      dividend for dividend in client.iterate_dividends(cache_mode=cache_mode)
+      if dividend['paid_at'] and is_in_date_range(parse(dividend['paid_at']).date(), date_range)
+  )
+  dividend_to_instrument_id = lambda dividend: get_last_id_from_url(dividend['instrument'])
+
+  for dividend, instrument in with_instruments(dividends, dividend_to_instrument_id, instrument_by_id):
+    paid_at = parse(dividend['paid_at'])
+    rate = Decimal(dividend['rate'])
+    amount = Decimal(dividend['amount'])
+    quantity = int(float(dividend['position']))
+
+    name = instrument['simple_name'] or instrument['name']
+    symbol = instrument['symbol']
+
+    yield {
+        'symbol': symbol,
+        'name': name,
+        'type': 'dividend',
+        'side': 'receive',
+        'quantity': quantity,
+        'price': '{:.2f}'.format(rate),
+        'amount': '{:.2f}'.format(amount),
+        'date': paid_at.date(),
+        'fees': 0,
+    }
+
+
+# In the order they're written out, orders first since it's by far the largest
+HISTORY_SECTIONS = [
+    ('orders', iterate_order_rows),
+    ('dividends', iterate_dividend_rows),
+    ('rewards', iterate_reward_rows),
+    ('transfers', iterate_transfer_rows),
+    ('subscription fees', iterate_subscription_fee_rows),
+    ('margin', iterate_margin_rows),
+]
+
+
+def write_section(writer, iterate_rows, instrument_by_id, cache_mode, date_range):
+  """Writes the section's rows as they come in, returning how many there were and how long it took."""
+  started_at = time.perf_counter()
+  num_rows = 0
+  for row in iterate_rows(instrument_by_id, cache_mode, date_range):
+    writer.writerow(row)
+    num_rows += 1
+  return num_rows, time.perf_counter() - started_at
+
+
+class SpooledSection:
+  """Holds a section's rows in a temp file until the sections before it have been written."""
+  def __init__(self):
+    self._file = tempfile.TemporaryFile()
+
+  def writerow(self, row):
+    pickle.dump(row, self._file)
+
+  def iterate_rows(self):
+    self._file.seek(0)
+    while True:
+      try:
+        yield pickle.load(self._file)
+      except EOFError:
+        return
+
+  def close(self):
+    self._file.close()
+
+
+def download_history(cache_mode, output_path, output_format, date_range):
+  started_at = time.perf_counter()
+  writer = ParquetHistoryWriter(output_path) if output_format == 'parquet' else CsvHistoryWriter(output_path)
+  instrument_by_id = {}
+  # The sections don't depend on each other. The first streams straight to the
+  # output while the rest load alongside it into temp files, which then get
+  # copied over in order as each one is ready.
+  (first_section_name, first_iterate_rows), later_sections = HISTORY_SECTIONS[0], HISTORY_SECTIONS[1:]
+  spools = [SpooledSection() for _ in later_sections]
+  try:
+    futures = client.submit_concurrently(
+        write_section,
+        [(spool, iterate_rows, instrument_by_id, cache_mode, date_range)
+         for spool, (_, iterate_rows) in zip(spools, later_sections)])
+    num_rows, seconds = write_section(writer, first_iterate_rows, instrument_by_id, cache_mode, date_range)
+    print('{}: {} rows in {:.2f}s'.format(first_section_name, num_rows, seconds))
+    for (section_name, _), spool, future in zip(later_sections, spools, futures):
+      num_rows, seconds = future.result()
+      for row in spool.iterate_rows():
+        writer.writerow(row)
+      spool.close()
+      print('{}: {} rows in {:.2f}s'.format(section_name, num_rows, seconds))
+  finally:
+    for spool in spools:
+      spool.close()
+    writer.close()
+  print('Wrote {} in {:.2f}s'.format(output_path, time.perf_counter() - started_at))
+
+
+def parse_date(value):
+  return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+if __name__ == '__main__':
+  run_in_daemon(__file__)
+  parser = argparse.ArgumentParser(description='Download a list of all financial history')
+  parser.add_argument(
+      '--live',
+      action='store_true',
+      help='Force to not use cache for APIs where values change'
+  )
+  parser.add_argument('--output', help='Where to write the history, defaults to history.csv or history.parquet')
+  parser.add_argument(
+      '--format',
+      choices=['csv', 'parquet'],
+      help='Defaults to parquet for a .parquet output and csv otherwise, parquet needs pyarrow')
+  parser.add_argument('--since', type=parse_date, help='Only activity on or after this date (YYYY-MM-DD)')
+  parser.add_argument('--until', type=parse_date, help='Only activity on or before this date (YYYY-MM-DD)')
+  args = parser.parse_args()
+  output_format = args.format or ('parquet' if args.output and args.output.endswith('.parquet') else 'csv')
+  output_path = args.output or 'history.{}'.format(output_format)
+  client = get_client()
+  download_history(FORCE_LIVE if args.live else CACHE_FIRST, output_path, output_format, (args.since, args.until))
@@ -1,18 +1,13 @@
-#!/usr/bin/env python3
-
 import argparse
 import csv
 
 #import logging
 #logging.basicConfig(level=logging.DEBUG)
 
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodCachedClient import CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
 from robinhood.RobinhoodPortfolio import RobinhoodPortfolio
 
-# Set up the client
-client = RobinhoodCachedClient()
-client.login()
-
 
 def download_portfolio(cache_mode):
   with open('portfolio.csv', 'w', newline='') as csv_file:
@@ -61,6 +56,7 @@ def download_portfolio(cache_mode):
 
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
   parser = argparse.ArgumentParser(description='Download a snapshot of your portfolio')
   parser.add_argument(
       '--live',
@@ -68,4 +64,5 @@ if __name__ == '__main__':
       help='Force to not use cache for APIs where values change'
   )
   args = parser.parse_args()
+  client = get_client()
   download_portfolio(FORCE_LIVE if args.live else CACHE_FIRST)
@@ -1,5 +1,3 @@
-#!/usr/bin/env python3
-
 from robinhood.RobinhoodCachedClient import RobinhoodCachedClient
 
 
@@ -1,19 +1,14 @@
-#!/usr/bin/env python3
-
 import argparse
 import json
 
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, FORCE_LIVE
+from robinhood.RobinhoodCachedClient import FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
+from robinhood.RobinhoodOrderTracker import RobinhoodOrderTracker
+from robinhood.commands.show_quote import display_quote
 from robinhood.util import ORDER_TYPES, ORDER_SIDES
 
-# Set up the client
-client = RobinhoodCachedClient()
-client.login()
-
-from show_quote import display_quote
 
-
-def place_order(order_type, order_side, symbol, quantity, price, no_cancel):
+def place_order(order_type, order_side, symbol, quantity, price, no_cancel, track):
   account_url = client.get_account()['url']
   instrument = client.get_instrument_by_symbol(symbol)
   instrument_id = instrument['id']
@@ -44,9 +39,12 @@ def place_order(order_type, order_side, symbol, quantity, price, no_cancel):
     exit()
 
   if no_cancel is not True and pending_same_side_orders:
-    for pending_order in pending_same_side_orders:
-      cancelled_order = client.cancel_order(pending_order['id'])
-      print('Cancelled order {}'.format(pending_order['id']))
+    cancelled_order_by_id = client.cancel_orders([pending_order['id'] for pending_order in pending_same_side_orders])
+    for order_id, cancelled_order in cancelled_order_by_id.items():
+      if isinstance(cancelled_order, Exception):
+        print('Failed to cancel order {}: {}'.format(order_id, repr(cancelled_order)))
+        exit()
+      print('Cancelled order {}'.format(order_id))
 
   order = client.order(
       instrument_id,
@@ -59,8 +57,16 @@ def place_order(order_type, order_side, symbol, quantity, price, no_cancel):
   )
   print(json.dumps(order, indent=4))
 
+  if track:
+    tracker = RobinhoodOrderTracker(client)
+    tracker.subscribe(lambda kind, tracked_order, previous_state: print(
+        'Order {} is now {}'.format(tracked_order['id'], tracked_order['state'])))
+    tracker.track(order['id'], kind='equity', order=order)
+    tracker.run()
+
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
   parser = argparse.ArgumentParser(description='Place an order')
   parser.add_argument('order_type', choices=ORDER_TYPES)
   parser.add_argument('order_side', choices=ORDER_SIDES)
@@ -68,7 +74,9 @@ if __name__ == '__main__':
   parser.add_argument('quantity', type=int)
   parser.add_argument('price', type=float)
   parser.add_argument('--no-cancel', action='store_true', help='Dont cancel any pending orders')
+  parser.add_argument('--track', action='store_true', help='Keep watching the order until it fills or is done')
   args = parser.parse_args()
+  client = get_client()
   place_order(
       args.order_type,
       args.order_side,
@@ -76,5 +84,6 @@ if __name__ == '__main__':
       args.quantity,
       args.price,
       args.no_cancel,
+      args.track,
   )
 
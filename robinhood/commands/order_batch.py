@@ -0,0 +1,65 @@
+import argparse
+import csv
+import uuid
+
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
+
+
+ORDER_FIELDNAMES = ['order_type', 'order_side', 'symbol', 'quantity', 'price', 'ref_id']
+
+
+def describe_order_request(order_request):
+  # Columns can be missing, place_orders reports on those once they're validated
+  return '{} {} {} {} @ ${}'.format(*[
+      order_request.get(fieldname) or '?' for fieldname in ['order_type', 'order_side', 'quantity', 'symbol', 'price']])
+
+
+def place_orders(orders_path):
+  with open(orders_path, 'r') as orders_file:
+    reader = csv.DictReader(orders_file)
+    order_requests = list(reader)
+    # Any columns of the user's own get written back untouched
+    fieldnames = list(reader.fieldnames or [])
+  if not order_requests:
+    print('Nothing to see here... Move along.')
+    exit()
+
+  # Save ref_ids before submitting anything, so re-running the same file can't place any order twice
+  if any(not order_request.get('ref_id') for order_request in order_requests):
+    for order_request in order_requests:
+      order_request['ref_id'] = order_request.get('ref_id') or str(uuid.uuid4())
+    if 'ref_id' not in fieldnames:
+      fieldnames.append('ref_id')
+    with open(orders_path, 'w') as orders_file:
+      writer = csv.DictWriter(orders_file, fieldnames=fieldnames)
+      writer.writeheader()
+      writer.writerows(order_requests)
+
+  for order_request in order_requests:
+    print(describe_order_request(order_request))
+
+  print('')
+  print('!!!!!!!!!!!!!!!!!! CAUTION !!!!!!!!!!!!!!!!!!')
+  confirm = input('Are you sure that you want to place these {} orders? [N/y] '.format(len(order_requests))).lower()
+  if confirm not in ['y', 'yes']:
+    print('Bailed out!')
+    exit()
+
+  report = client.place_orders(order_requests)
+  for entry in report:
+    order_request = entry['request']
+    if entry['error']:
+      print('FAILED\t{}\t{}'.format(describe_order_request(order_request), entry['error']))
+    else:
+      print('{}\t{}\t({})'.format(entry['order']['state'], describe_order_request(order_request), entry['order']['id']))
+
+
+if __name__ == '__main__':
+  run_in_daemon(__file__)
+  parser = argparse.ArgumentParser(description='Place a batch of orders from a csv file')
+  parser.add_argument(
+      'orders_path',
+      help='csv with a header of {}, ref_id is optional and gets filled in'.format(', '.join(ORDER_FIELDNAMES)))
+  args = parser.parse_args()
+  client = get_client()
+  place_orders(args.orders_path)
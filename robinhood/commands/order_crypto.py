@@ -1,18 +1,14 @@
-#!/usr/bin/env python3
-
 from decimal import Decimal
 import argparse
 import json
 
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, FORCE_LIVE
-from robinhood.util import ORDER_TYPES, ORDER_SIDES
-
-# Set up the client
-client = RobinhoodCachedClient()
-client.login()
+from robinhood.RobinhoodCachedClient import FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
+from robinhood.RobinhoodOrderTracker import RobinhoodOrderTracker
+from robinhood.util import ORDER_SIDES, ORDER_TYPES, parse_decimal_argument
 
 
-def place_order(order_type, order_side, symbol, quantity, price):
+def place_order(order_type, order_side, symbol, quantity, price, track):
   quote = client.get_crypto_quote(symbol)
   currency_pair_id = quote['id']
   currency_pair = client.get_crypto_currency_pair(currency_pair_id)
@@ -55,20 +51,31 @@ def place_order(order_type, order_side, symbol, quantity, price):
       currency_pair_id, order_type, order_side, quantity, price)
   print(json.dumps(order, indent=4))
 
+  if track:
+    tracker = RobinhoodOrderTracker(client)
+    tracker.subscribe(lambda kind, tracked_order, previous_state: print(
+        'Order {} is now {}'.format(tracked_order['id'], tracked_order['state'])))
+    tracker.track(order['id'], kind='crypto', order=order)
+    tracker.run()
+
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
   parser = argparse.ArgumentParser(description='Place an order')
   parser.add_argument('order_type', choices=ORDER_TYPES)
   parser.add_argument('order_side', choices=ORDER_SIDES)
   parser.add_argument('symbol', type=str.upper, help='The cryptocurrency + currency ticker')
-  parser.add_argument('quantity', type=Decimal)
-  parser.add_argument('price', type=Decimal)
+  parser.add_argument('quantity', type=parse_decimal_argument)
+  parser.add_argument('price', type=parse_decimal_argument)
+  parser.add_argument('--track', action='store_true', help='Keep watching the order until it fills or is done')
   args = parser.parse_args()
+  client = get_client()
   place_order(
       args.order_type,
       args.order_side,
       args.symbol,
       args.quantity,
-      args.price
+      args.price,
+      args.track
   )
 
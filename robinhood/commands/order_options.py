@@ -1,18 +1,14 @@
-#!/usr/bin/env python3
-
 from decimal import Decimal
 import argparse
 import json
 
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, FORCE_LIVE
-from robinhood.util import ORDER_TYPES, ORDER_SIDES, OPTIONS_TYPES, ORDER_SIDE_TO_DIRECTION
-
-# Set up the client
-client = RobinhoodCachedClient()
-client.login()
+from robinhood.RobinhoodCachedClient import FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
+from robinhood.RobinhoodOrderTracker import RobinhoodOrderTracker
+from robinhood.util import OPTIONS_TYPES, ORDER_SIDE_TO_DIRECTION, ORDER_SIDES, ORDER_TYPES, parse_decimal_argument
 
 
-def place_order(order_type, order_side, symbol, date, strike, options_type, quantity, price):
+def place_order(order_type, order_side, symbol, date, strike, options_type, quantity, price, track):
   try:
     instrument = client.get_instrument_by_symbol(symbol)
   except NotFound:
@@ -36,19 +32,18 @@ def place_order(order_type, order_side, symbol, date, strike, options_type, quan
   options_instrument_id = options_chain['underlying_instruments'][0]['id']
   multiplier = Decimal(options_chain['trade_value_multiplier'])
 
-  options_instruments = client.get_options_instruments(
-      chain_id=chain_id, options_type=options_type, tradability='tradable', state='active', expiration_dates=[date])
-  if not options_instruments:
-    raise Exception('No options found on that date')
-
-  options_instrument = None
-  for potential_options_instrument in options_instruments:
-    potential_strike = float(potential_options_instrument['strike_price'])
-    if potential_strike == strike:
-      options_instrument = potential_options_instrument
-      break
+  options_chain_index = client.get_options_chain_index(chain_id)
+  options_instrument = options_chain_index.get_contract(date, options_type, strike)
   if not options_instrument:
-    raise Exception('No options found at that strike price')
+    # The date may have gained strikes since the index was built
+    options_chain_index.refresh_expiration_dates([date])
+    options_instrument = options_chain_index.get_contract(date, options_type, strike)
+  if not options_instrument:
+    if not options_chain_index.get_strikes(date, options_type):
+      raise Exception('No options found on that date')
+    nearest_options_instrument = options_chain_index.get_nearest_contract(date, options_type, strike)
+    raise Exception('No options found at that strike price, the nearest is ${:.2f}'.format(
+        Decimal(nearest_options_instrument['strike_price'])))
 
   options_quote = client.get_options_marketdata(options_instrument['id'])
 
@@ -72,18 +67,28 @@ def place_order(order_type, order_side, symbol, date, strike, options_type, quan
       options_instrument['id'], order_type, ORDER_SIDE_TO_DIRECTION[order_side], quantity, price, use_account_url=account_url)
   print(json.dumps(order, indent=4))
 
+  if track:
+    tracker = RobinhoodOrderTracker(client)
+    tracker.subscribe(lambda kind, tracked_order, previous_state: print(
+        'Order {} is now {}'.format(tracked_order['id'], tracked_order['state'])))
+    tracker.track(order['id'], kind='options', order=order)
+    tracker.run()
+
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
   parser = argparse.ArgumentParser(description='Place an order')
   parser.add_argument('order_type', choices=ORDER_TYPES)
   parser.add_argument('order_side', choices=ORDER_SIDES)
   parser.add_argument('symbol', type=str.upper, help='The stock ticker')
   parser.add_argument('date', type=str, help='Date for the options to expire')
-  parser.add_argument('strike', type=float, help='Amount the strike price should be')
+  parser.add_argument('strike', type=parse_decimal_argument, help='Amount the strike price should be')
   parser.add_argument('options_type', choices=OPTIONS_TYPES)
   parser.add_argument('quantity', type=int)
   parser.add_argument('price', type=float)
+  parser.add_argument('--track', action='store_true', help='Keep watching the order until it fills or is done')
   args = parser.parse_args()
+  client = get_client()
   place_order(
       args.order_type,
       args.order_side,
@@ -92,6 +97,7 @@ if __name__ == '__main__':
       args.strike,
       args.options_type,
       args.quantity,
-      args.price
+      args.price,
+      args.track
   )
 
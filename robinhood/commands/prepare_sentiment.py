@@ -1,17 +1,12 @@
-#!/usr/bin/env python3
-
 import argparse
 import json
 import os
 import shutil
 
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodCachedClient import CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
 from robinhood.RobinhoodPortfolio import RobinhoodPortfolio
 
-# Set up the client
-client = RobinhoodCachedClient()
-client.login()
-
 
 def show_potentials(decay_priority, cache_mode):
   portfolio = RobinhoodPortfolio(client, {'cache_mode': cache_mode})
@@ -49,6 +44,7 @@ def show_potentials(decay_priority, cache_mode):
 
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
   parser = argparse.ArgumentParser(description='Show various position potentials to buy into')
   parser.add_argument(
       '--live',
@@ -61,6 +57,7 @@ if __name__ == '__main__':
       help='Lower the priority of everything'
   )
   args = parser.parse_args()
+  client = get_client()
   show_potentials(
       args.decay_priority,
       FORCE_LIVE if args.live else CACHE_FIRST
@@ -0,0 +1,71 @@
+from decimal import Decimal
+import argparse
+
+from robinhood.RobinhoodCachedClient import CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
+from robinhood.RobinhoodOptionsScanner import RobinhoodOptionsScanner
+from robinhood.util import OPTIONS_TYPES, parse_decimal_argument
+
+
+def scan_options(client, symbols, limit, cache_mode, **filters):
+  scanner = RobinhoodOptionsScanner(client, client_kwargs={'cache_mode': cache_mode})
+  num_found = 0
+  # Chains come back as they finish, print each as soon as it does
+  for symbol, candidates in scanner.scan(symbols, **filters):
+    if not candidates:
+      continue
+    num_found += len(candidates)
+    print('')
+    print('==================== {} ({} found) ===================='.format(symbol, len(candidates)))
+    print('Expires\t\tDays\tStrike\t\tType\tMark\tSpread\tDelta\tIV\tVolume\tOpen Int')
+    for candidate in candidates[:limit]:
+      options_instrument = candidate['options_instrument']
+      print('{}\t{}\t${:.2f}\t\t{}\t${:.2f}\t{:.2f}%\t{}\t{}\t{}\t{}'.format(
+          options_instrument['expiration_date'],
+          candidate['days_to_expiration'],
+          Decimal(options_instrument['strike_price']),
+          options_instrument['type'],
+          Decimal(candidate['options_marketdata']['adjusted_mark_price']),
+          candidate['spread_percent'],
+          '{:.3f}'.format(candidate['delta']) if candidate['delta'] is not None else '-',
+          '{:.1f}%'.format(candidate['implied_volatility'] * 100) if candidate['implied_volatility'] is not None else '-',
+          candidate['volume'],
+          candidate['open_interest']))
+  print('')
+  print('{} contracts matched'.format(num_found))
+
+
+if __name__ == '__main__':
+  run_in_daemon(__file__)
+  parser = argparse.ArgumentParser(description='Scan the options chains of many symbols')
+  parser.add_argument('symbols', nargs='+', type=str.upper, help='Symbols whose chains to scan')
+  parser.add_argument('-t', '--type', choices=OPTIONS_TYPES, dest='options_type')
+  parser.add_argument('--min-days', type=int, default=0, help='Fewest days until expiration')
+  parser.add_argument('--max-days', type=int, default=45, help='Most days until expiration')
+  parser.add_argument('--min-delta', type=float, help='Smallest absolute delta')
+  parser.add_argument('--max-delta', type=float, help='Largest absolute delta')
+  parser.add_argument('--min-volume', type=int, default=0)
+  parser.add_argument('--min-open-interest', type=int, default=0)
+  parser.add_argument('--max-spread', type=parse_decimal_argument, dest='max_spread_percent', help='Largest bid/ask spread in percent of the mark')
+  parser.add_argument('-n', '--limit', type=int, default=10, help='Contracts to show per symbol')
+  parser.add_argument(
+      '--live',
+      action='store_true',
+      help='Force to not use cache for APIs where values change'
+  )
+  args = parser.parse_args()
+
+  client = get_client()
+  scan_options(
+      client,
+      args.symbols,
+      args.limit,
+      FORCE_LIVE if args.live else CACHE_FIRST,
+      options_type=args.options_type,
+      min_days=args.min_days,
+      max_days=args.max_days,
+      min_delta=args.min_delta,
+      max_delta=args.max_delta,
+      min_volume=args.min_volume,
+      min_open_interest=args.min_open_interest,
+      max_spread_percent=args.max_spread_percent)
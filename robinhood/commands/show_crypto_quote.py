@@ -1,5 +1,3 @@
-#!/usr/bin/env python3
-
 import argparse
 from datetime import datetime
 from decimal import Decimal
@@ -9,7 +7,9 @@ from dateutil.parser import parse
 import pytz
 
 from robinhood.exceptions import NotFound
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodCachedClient import CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodCryptoQuotePoller import RobinhoodCryptoQuotePoller
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
 
 
 def display_crypto_quote(client, symbols, cache_mode):
@@ -39,7 +39,37 @@ def display_crypto_quote(client, symbols, cache_mode):
     print('Mark:\t${:.2f}'.format(mark))
     print('Vol:\t{}'.format(int(round(float(quote['volume'])))))
 
+
+def watch_crypto_quotes(client, symbols):
+  currency_pairs = client.get_crypto_currency_pairs()
+  currency_pair_ids = [
+      currency_pair['id'] for currency_pair in currency_pairs
+      if not symbols or currency_pair['symbol'].replace('-', '') in symbols
+  ]
+  if not currency_pair_ids:
+    print('No currency pairs match {}'.format(', '.join(symbols)))
+    return
+
+  def display_changes(currency_pair_id, changes, quote):
+    if 'mark_price' not in changes and 'bid_price' not in changes and 'ask_price' not in changes:
+      return
+    print('{:%H:%M:%S}\t{}\t${:.2f}\t${:.2f} <-> ${:.2f}'.format(
+        datetime.now(),
+        quote['symbol'],
+        Decimal(quote['mark_price']),
+        Decimal(quote['bid_price']),
+        Decimal(quote['ask_price'])))
+
+  poller = RobinhoodCryptoQuotePoller(client, currency_pair_ids)
+  poller.subscribe(display_changes)
+  try:
+    poller.run()
+  except KeyboardInterrupt:
+    pass
+
+
 if __name__ == '__main__':
+  run_in_daemon(__file__)
   parser = argparse.ArgumentParser(description='Get a quote for a cryptocurrency')
   parser.add_argument('-s', '--symbol', nargs='*', type=str.upper, dest='symbols', default=[], help='A symbol to get a quote on')
   parser.add_argument(
@@ -47,8 +77,11 @@ if __name__ == '__main__':
       action='store_true',
       help='Force to not use cache for APIs where values change'
   )
+  parser.add_argument('-w', '--watch', action='store_true', help='Keep polling and print quotes as they change')
   args = parser.parse_args()
 
-  client = RobinhoodCachedClient()
-  client.login()
-  display_crypto_quote(client, args.symbols, FORCE_LIVE if args.live else CACHE_FIRST)
+  client = get_client()
+  if args.watch:
+    watch_crypto_quotes(client, args.symbols)
+  else:
+    display_crypto_quote(client, args.symbols, FORCE_LIVE if args.live else CACHE_FIRST)
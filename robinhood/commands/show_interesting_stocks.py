@@ -1,13 +1,9 @@
-#!/usr/bin/env python3
-
 from decimal import Decimal
 
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, FORCE_LIVE
+from robinhood.RobinhoodCachedClient import FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
 from robinhood.util import get_last_id_from_url
 
-client = RobinhoodCachedClient()
-client.login()
-
 
 def display_popular_stocks():
   popular_stocks = client.get_popular_stocks()['data']
@@ -65,6 +61,8 @@ def display_100_most_popular():
 
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
+  client = get_client()
   display_popular_stocks()
   display_sp500_movers()
   display_top_movers()
@@ -1,15 +1,11 @@
-#!/usr/bin/env python3
-
 from decimal import Decimal
 import argparse
 import json
 
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodCachedClient import CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
 from robinhood.util import get_last_id_from_url
 
-client = RobinhoodCachedClient()
-client.login()
-
 
 def display_options_discoveries(symbol, cache_mode):
   try:
@@ -43,7 +39,7 @@ def display_options_discoveries(symbol, cache_mode):
 
   options_quotes = client.get_options_marketdatas(option_instrument_ids)
   options_quote_by_id = {
-    get_last_id_from_url(options_quote['instrument']): options_quote for options_quote in options_quotes
+    get_last_id_from_url(options_quote['instrument']): options_quote for options_quote in options_quotes if options_quote
   }
 
   for discovery in discoveries:
@@ -60,13 +56,17 @@ def display_options_discoveries(symbol, cache_mode):
     print('\tType\t{}'.format(option_instrument['type']))
     print('\tExpires\t{}'.format(option_instrument['expiration_date']))
     print('\tStrike\t{}'.format(Decimal(option_instrument['strike_price'])))
-    options_quote = options_quote_by_id[option_instrument_id]
+    options_quote = options_quote_by_id.get(option_instrument_id)
+    if not options_quote:
+      print('\tNo quote')
+      continue
     adjusted_mark_price = Decimal(options_quote['adjusted_mark_price'])
     print('\tPrice\t${:.2f}'.format(adjusted_mark_price))
     print('\tCost\t${:.2f}'.format(adjusted_mark_price * 100))
 
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
   parser = argparse.ArgumentParser(description='Discover options for a symbol')
   parser.add_argument('symbol', type=str.upper, help='A symbol to discover options for')
   parser.add_argument(
@@ -75,6 +75,7 @@ if __name__ == '__main__':
       help='Force to not use cache for APIs where values change'
   )
   args = parser.parse_args()
+  client = get_client()
   display_options_discoveries(
       args.symbol,
       FORCE_LIVE if args.live else CACHE_FIRST
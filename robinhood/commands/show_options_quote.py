@@ -1,5 +1,3 @@
-#!/usr/bin/env python3
-
 from datetime import datetime
 from decimal import Decimal
 from math import ceil
@@ -10,8 +8,10 @@ from dateutil.parser import parse
 import pytz
 
 from robinhood.exceptions import NotFound
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, CACHE_FIRST, FORCE_LIVE
-from robinhood.util import get_last_id_from_url, OPTIONS_TYPES
+from robinhood.options_pricing import price_chain
+from robinhood.RobinhoodCachedClient import CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
+from robinhood.util import get_last_id_from_url, OPTIONS_TYPES, parse_decimal_argument
 
 
 def display_options_quote(client, options_type, symbol, dates, strike, cache_mode):
@@ -24,7 +24,7 @@ def display_options_quote(client, options_type, symbol, dates, strike, cache_mod
     instrument_id = instrument['id']
     name = instrument['simple_name'] or instrument['name']
 
-  options_chains = [c for c in client.get_options_chains(instrument_ids=[instrument_id]) if c['can_open_position']]
+  options_chains = [c for c in client.get_options_chains(instrument_ids=[instrument_id], cache_mode=cache_mode) if c['can_open_position']]
   if len(options_chains) != 1:
     raise Exception('Expected exactly one options chains listing, but got: {}'.format(json.dumps(options_chains, indent=4)))
   options_chain = options_chains[0]
@@ -36,19 +36,14 @@ def display_options_quote(client, options_type, symbol, dates, strike, cache_mod
   chain_id = options_chain['id']
   multiplier = Decimal(options_chain['trade_value_multiplier'])
 
-  kwargs = {}
-  if dates:
-    kwargs['expiration_dates'] = dates
-  if options_type:
-    kwargs['options_type'] = options_type
-  potential_options_instruments = client.get_options_instruments(chain_id=chain_id, tradability='tradable', state='active', **kwargs)
-  if not potential_options_instruments:
-    raise Exception('No options found')
-
-  options_instruments = []
-  for potential_options_instrument in potential_options_instruments:
-    if strike is None or strike == float(potential_options_instrument['strike_price']):
-      options_instruments.append(potential_options_instrument)
+  options_chain_index = client.get_options_chain_index(chain_id, cache_mode=cache_mode)
+  options_instruments = options_chain_index.get_contracts(
+      expiration_dates=dates, options_type=options_type, strike=strike)
+  if not options_instruments and dates:
+    # The dates may have gained strikes since the index was built
+    options_chain_index.refresh_expiration_dates(dates)
+    options_instruments = options_chain_index.get_contracts(
+        expiration_dates=dates, options_type=options_type, strike=strike)
   if not options_instruments:
     raise Exception('No options found')
 
@@ -58,7 +53,19 @@ def display_options_quote(client, options_type, symbol, dates, strike, cache_mod
 
   options_quotes = client.get_options_marketdatas([options_instrument['id'] for options_instrument in options_instruments])
 
+  # Solve the whole chain at once rather than contract by contract. Quotes are
+  # cached forever, so the spot always comes live to match the marketdata.
+  quote = client.get_quote(instrument_id, cache_mode=FORCE_LIVE)
+  spot = float(quote['last_extended_hours_trade_price'] or quote['last_trade_price'])
+  priced = price_chain(spot, options_instruments, options_quotes)
+  greeks_by_id = {
+    options_instrument_id: {name: column[i] for name, column in priced.items()}
+    for i, options_instrument_id in enumerate(priced['id'])
+  }
+
   for options_quote in options_quotes:
+    if not options_quote:
+      continue
     break_even_price = Decimal(options_quote['break_even_price'])
     ask_size = options_quote['ask_size']
     ask_price = Decimal(options_quote['ask_price'])
@@ -80,9 +87,10 @@ def display_options_quote(client, options_type, symbol, dates, strike, cache_mod
     options_instrument = options_instrument_by_id[options_instrument_id]
     expiration_date = options_instrument['expiration_date']
     option_strike = Decimal(options_instrument['strike_price'])
+    greeks = greeks_by_id[options_instrument_id]
 
     print('')
-    print('${:.2f} {} ({}) {}'.format(option_strike, symbol, name, options_type[0].upper() + options_type[1:]))
+    print('${:.2f} {} ({}) {}'.format(option_strike, symbol, name, options_instrument['type'].capitalize()))
     print('Break even\t ${:.2f}'.format(break_even_price))
     print('Expires\t\t {}'.format(expiration_date))
     print('Spread\t\t ${:.2f} ({}) <-> ${:.2f} ({})'.format(bid_price, bid_size, ask_price, ask_size))
@@ -91,17 +99,22 @@ def display_options_quote(client, options_type, symbol, dates, strike, cache_mod
     print('\t\t\t${:.2f} ({:.2f}%)'.format(hl_spread, hl_spread * 100 / adjusted_mark_price))
     print('Max loss\t ${:.2f}'.format(max_loss))
     print('Impl Volatil\t {:.2f}%'.format(implied_volatility))
+    if greeks['implied_volatility'] is not None:
+      print('Solved Volatil\t {:.2f}%'.format(greeks['implied_volatility'] * 100))
+      print('Delta/Gamma\t {:.4f} / {:.4f}'.format(greeks['delta'], greeks['gamma']))
+      print('Theta/Vega\t {:.4f} / {:.4f}'.format(greeks['theta'], greeks['vega']))
     print('Last\t\t {} @ ${:.2f}'.format(last_trade_size, last_trade_price))
     print('Open Int\t {}'.format(open_interest))
     print('Volume\t\t {}'.format(volume))
 
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
   parser = argparse.ArgumentParser(description='Get a quote for a symbol')
   parser.add_argument('symbol', type=str.upper, help='A symbol to get an options quote on')
   parser.add_argument('-t', '--type', choices=OPTIONS_TYPES)
   parser.add_argument('-d', '--date', nargs='+', type=str, dest='dates', default=[], help='Date for the options to expire')
-  parser.add_argument('-s', '--strike', type=float, help='Amount the strike price should be')
+  parser.add_argument('-s', '--strike', type=parse_decimal_argument, help='Amount the strike price should be')
   parser.add_argument(
       '--live',
       action='store_true',
@@ -112,8 +125,7 @@ if __name__ == '__main__':
   if not args.dates and not args.strike:
     raise Exception('You need to pass in --date and/or --strike')
 
-  client = RobinhoodCachedClient()
-  client.login()
+  client = get_client()
   display_options_quote(
       client,
       args.type,
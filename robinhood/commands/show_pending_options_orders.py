@@ -1,5 +1,3 @@
-#!/usr/bin/env python3
-
 import argparse
 from collections import defaultdict
 from datetime import datetime
@@ -10,14 +8,11 @@ from dateutil.parser import parse
 import pytz
 
 from robinhood.exceptions import NotFound
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, FORCE_LIVE
+from robinhood.RobinhoodCachedClient import FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
 from robinhood.util import get_last_id_from_url, DIRECTION_TO_ORDER_SIDE
 
 
-client = RobinhoodCachedClient()
-client.login()
-
-
 def display_pending_options_orders():
   orders = client.get_options_orders()
   pending_orders = [order for order in orders if order['state'] in ['queued', 'confirmed']]
@@ -74,4 +69,6 @@ def display_pending_options_orders():
 
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
+  client = get_client()
   display_pending_options_orders()
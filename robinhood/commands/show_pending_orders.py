@@ -1,19 +1,14 @@
-#!/usr/bin/env python3
-
 from collections import defaultdict
 from datetime import datetime
 from decimal import Decimal
 from math import ceil
 
 from robinhood.exceptions import NotFound
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, FORCE_LIVE
+from robinhood.RobinhoodCachedClient import FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
 from robinhood.util import get_last_id_from_url
 
 
-client = RobinhoodCachedClient()
-client.login()
-
-
 def display_pending_orders():
   orders = client.get_orders(cache_mode=FORCE_LIVE)
   pending_orders = [order for order in orders if order['state'] in ['queued', 'confirmed']]
@@ -39,9 +34,9 @@ def display_pending_orders():
 
     print('{} ({})'.format(instrument['symbol'], instrument['simple_name'] or instrument['name']))
 
-    # Show position
+    # Show position, these all come from one positions fetch
     try:
-      position = client.get_position_by_instrument_id(instrument['id'])
+      position = client.get_position_by_instrument_id(instrument['id'], cache_mode=FORCE_LIVE)
     except NotFound:
       print('\tNo current position (or ever)')
     else:
@@ -86,4 +81,6 @@ def display_pending_orders():
   print('Combined order totals (negative means added account value) = ${:.2f}'.format(order_amounts))
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
+  client = get_client()
   display_pending_orders()
@@ -1,16 +1,11 @@
-#!/usr/bin/env python3
-
 from decimal import Decimal
 import argparse
 import json
 
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodCachedClient import CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
 from robinhood.RobinhoodPortfolio import RobinhoodPortfolio
 
-# Set up the client
-client = RobinhoodCachedClient()
-client.login()
-
 
 def show_potentials(cache_mode):
   # Load the portfolio
@@ -61,6 +56,7 @@ def show_potentials(cache_mode):
 
 
 if __name__ == '__main__':
+  run_in_daemon(__file__)
   parser = argparse.ArgumentParser(description='Show various position potentials to buy into')
   parser.add_argument(
       '--live',
@@ -68,4 +64,5 @@ if __name__ == '__main__':
       help='Force to not use cache for APIs where values change'
   )
   args = parser.parse_args()
+  client = get_client()
   show_potentials(FORCE_LIVE if args.live else CACHE_FIRST)
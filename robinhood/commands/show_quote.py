@@ -1,5 +1,3 @@
-#!/usr/bin/env python3
-
 import argparse
 from datetime import datetime
 from decimal import Decimal
@@ -9,7 +7,11 @@ from dateutil.parser import parse
 import pytz
 
 from robinhood.exceptions import NotFound
-from robinhood.RobinhoodCachedClient import RobinhoodCachedClient, CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodCachedClient import CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
+from robinhood.util import get_last_id_from_url
+
+QUOTES_TABLE_ROW = '{:<6} {:<22} {:>10} {:>8} {:>8} {:>9} {:>7} {:>6} {:>6} {:>8} {:>14}'
 
 def display_quote(client, symbol, cache_mode):
   now = datetime.now(pytz.UTC)
@@ -77,13 +79,13 @@ def display_quote(client, symbol, cache_mode):
     position_equity_cost = 0
     print('None')
   else:
-    position_quantity = int(float(position['quantity']))
+    position_quantity = Decimal(position['quantity'])
     if not position_quantity:
       print('None anymore')
     else:
       position_average_buy_price = Decimal(position['average_buy_price'])
       position_equity_cost = position_quantity * position_average_buy_price
-      print('{} @ ${:.2f} = ${:.2f}'.format(position_quantity, position_average_buy_price, position_equity_cost))
+      print('{:f} @ ${:.2f} = ${:.2f}'.format(position_quantity.normalize(), position_average_buy_price, position_equity_cost))
 
   # Get order history, put as a subdisplay of position
   print('')
@@ -132,9 +134,82 @@ def display_quote(client, symbol, cache_mode):
   print('age:\t{}m ago @ {:%I:%M%p}'.format(updated_minutes_ago, updated_at.astimezone(pytz.timezone('US/Pacific'))))
 
 
+def display_quotes(client, symbols, cache_mode):
+  """A compact row per symbol, each kind of data fetched for all of the symbols at once."""
+  symbols = list(dict.fromkeys(symbols))
+  instrument_by_symbol = client.get_instruments_by_symbols(symbols, cache_mode=cache_mode)
+  for symbol in symbols:
+    if symbol not in instrument_by_symbol:
+      print('symbol {} was not found'.format(symbol))
+  symbols = [symbol for symbol in symbols if symbol in instrument_by_symbol]
+  if not symbols:
+    return
+  instrument_ids = [instrument_by_symbol[symbol]['id'] for symbol in symbols]
+
+  fundamentals, popularities, ratings, quotes, positions = client.map_concurrently(
+      lambda method, args: method(*args, cache_mode=cache_mode),
+      [
+          (client.get_fundamentals, [instrument_ids]),
+          (client.get_popularities, [instrument_ids]),
+          (client.get_ratings, [instrument_ids]),
+          (client.get_quotes, [instrument_ids]),
+          (client.get_positions, []),
+      ])
+  fundamental_by_id = {get_last_id_from_url(fundamental['instrument']): fundamental for fundamental in fundamentals if fundamental}
+  popularity_by_id = {get_last_id_from_url(popularity['instrument']): popularity for popularity in popularities if popularity}
+  rating_by_id = {rating['instrument_id']: rating for rating in ratings if rating}
+  quote_by_id = {get_last_id_from_url(quote['instrument']): quote for quote in quotes if quote}
+  position_by_id = {get_last_id_from_url(position['instrument']): position for position in positions}
+
+  print(QUOTES_TABLE_ROW.format('symbol', 'name', 'last', 'day', 'spread', '52w', 'pe', 'dy', 'buy', 'holders', 'position'))
+  for symbol in symbols:
+    instrument = instrument_by_symbol[symbol]
+    instrument_id = instrument['id']
+    quote = quote_by_id.get(instrument_id)
+    fundamental = fundamental_by_id.get(instrument_id, {})
+    popularity = popularity_by_id.get(instrument_id, {})
+    rating_summary = rating_by_id.get(instrument_id, {}).get('summary')
+    position = position_by_id.get(instrument_id)
+
+    name = ('!' if not instrument['tradeable'] else '') + (instrument['simple_name'] or instrument['name'])
+    last = day = spread = '-'
+    if quote:
+      last_trade_price = Decimal(quote['last_extended_hours_trade_price'] or quote['last_trade_price'])
+      last_close_price = Decimal(quote['previous_close'])
+      bid_price = Decimal(quote['bid_price'])
+      ask_price = Decimal(quote['ask_price'])
+      last = '${:.2f}'.format(last_trade_price)
+      day = '{:+.2f}%'.format((last_trade_price - last_close_price) * 100 / last_close_price)
+      spread = '{:.2f}%'.format((ask_price - bid_price) * 100 / last_trade_price) if last_trade_price else '-'
+      if quote['trading_halted']:
+        last = 'HALTED'
+    year_range = '-'
+    if quote and fundamental.get('high_52_weeks') and fundamental.get('low_52_weeks'):
+      high_52 = Decimal(fundamental['high_52_weeks'])
+      low_52 = Decimal(fundamental['low_52_weeks'])
+      # Where the price sits in the 52 week range, 0% at the low and 100% at the high
+      year_range = '{:.0f}%'.format((last_trade_price - low_52) * 100 / (high_52 - low_52)) if high_52 > low_52 else '-'
+    pe_ratio = '{:.1f}x'.format(Decimal(fundamental['pe_ratio'])) if fundamental.get('pe_ratio') else '-'
+    dividend_yield = '{:.1f}%'.format(Decimal(fundamental['dividend_yield'])) if fundamental.get('dividend_yield') else '-'
+    num_ratings = sum(rating_summary.values()) if rating_summary else 0
+    percent_buy = '{:.0f}%'.format(rating_summary['num_buy_ratings'] * 100 / num_ratings) if num_ratings else '-'
+    holders = popularity.get('num_open_positions', '-')
+    # Fractional shares, kept as a Decimal rather than cut down to whole shares
+    position_quantity = Decimal(position['quantity']) if position else 0
+    position_summary = '{:f} @ ${:.2f}'.format(position_quantity.normalize(), Decimal(position['average_buy_price'])) if position_quantity else ''
+
+    print(QUOTES_TABLE_ROW.format(
+        symbol, name[:22], last, day, spread, year_range, pe_ratio, dividend_yield, percent_buy, holders, position_summary))
+
+
 if __name__ == '__main__':
-  parser = argparse.ArgumentParser(description='Get a quote for a symbol')
-  parser.add_argument('symbol', type=str.upper, help='A symbol to get a quote on')
+  run_in_daemon(__file__)
+  parser = argparse.ArgumentParser(description='Get a quote for one or more symbols')
+  parser.add_argument(
+      'symbols',
+      nargs='+',
+      type=str.upper,
+      help='Symbols to get a quote on, one gets the full details and more get a row each')
   parser.add_argument(
       '--live',
       action='store_true',
@@ -142,6 +217,9 @@ if __name__ == '__main__':
   )
   args = parser.parse_args()
 
-  client = RobinhoodCachedClient()
-  client.login()
-  display_quote(client, args.symbol, FORCE_LIVE if args.live else CACHE_FIRST)
+  client = get_client()
+  cache_mode = FORCE_LIVE if args.live else CACHE_FIRST
+  if len(args.symbols) == 1:
+    display_quote(client, args.symbols[0], cache_mode)
+  else:
+    display_quotes(client, args.symbols, cache_mode)
@@ -0,0 +1,126 @@
+import argparse
+from datetime import datetime
+from decimal import Decimal
+import time
+
+from robinhood.exceptions import NotFound
+from robinhood.RobinhoodCachedClient import CACHE_FIRST, FORCE_LIVE
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
+from robinhood.RobinhoodQuoteStream import RobinhoodQuoteStream
+from robinhood.util import get_last_id_from_url
+
+WATCHLIST_TABLE_ROW = '{:1} {:<6} {:<22} {:>10} {:>8} {:>8} {:>7} {:>6} {:>6} {:>6}'
+CLEAR_SCREEN = '\033[H\033[J'
+
+
+def load_watchlist(client, watchlist_name, cache_mode):
+  """Returns the watchlist's instruments and their fundamentals and ratings by instrument id."""
+  watchlist_instruments = client.get_watchlist_instruments(watchlist_name, cache_mode=cache_mode)['results']
+  instrument_ids = list(dict.fromkeys(
+      get_last_id_from_url(watchlist_instrument['instrument']) for watchlist_instrument in watchlist_instruments))
+  if not instrument_ids:
+    return [], {}, {}
+
+  # Each of these is one batched lookup for the whole list, run side by side
+  instruments, fundamentals, ratings = client.map_concurrently(
+      lambda method: method(instrument_ids, cache_mode=cache_mode),
+      [[client.get_instruments], [client.get_fundamentals], [client.get_ratings]])
+  fundamental_by_id = {get_last_id_from_url(fundamental['instrument']): fundamental for fundamental in fundamentals if fundamental}
+  rating_by_id = {rating['instrument_id']: rating for rating in ratings if rating}
+  return instruments, fundamental_by_id, rating_by_id
+
+
+def format_row(instrument, fundamental, rating, quote, changed):
+  last = day = spread = '-'
+  if quote:
+    last_trade_price = Decimal(quote['last_extended_hours_trade_price'] or quote['last_trade_price'])
+    last_close_price = Decimal(quote['previous_close'])
+    last = 'HALTED' if quote['trading_halted'] else '${:.2f}'.format(last_trade_price)
+    day = '{:+.2f}%'.format((last_trade_price - last_close_price) * 100 / last_close_price)
+    if last_trade_price:
+      spread = '{:.2f}%'.format((Decimal(quote['ask_price']) - Decimal(quote['bid_price'])) * 100 / last_trade_price)
+  pe_ratio = '{:.1f}x'.format(Decimal(fundamental['pe_ratio'])) if fundamental.get('pe_ratio') else '-'
+  dividend_yield = '{:.1f}%'.format(Decimal(fundamental['dividend_yield'])) if fundamental.get('dividend_yield') else '-'
+  summary = rating.get('summary')
+  num_ratings = sum(summary.values()) if summary else 0
+  percent_buy = '{:.0f}%'.format(summary['num_buy_ratings'] * 100 / num_ratings) if num_ratings else '-'
+  percent_sell = '{:.0f}%'.format(summary['num_sell_ratings'] * 100 / num_ratings) if num_ratings else '-'
+  name = ('!' if not instrument['tradeable'] else '') + (instrument['simple_name'] or instrument['name'])
+  return WATCHLIST_TABLE_ROW.format(
+      '*' if changed else '', instrument['symbol'], name[:22], last, day, spread, pe_ratio, dividend_yield, percent_buy, percent_sell)
+
+
+def display_watchlist(instruments, fundamental_by_id, rating_by_id, quote_by_id, changed_ids, sort_by):
+  def day_change(instrument):
+    quote = quote_by_id.get(instrument['id'])
+    if not quote:
+      return Decimal(0)
+    last_trade_price = Decimal(quote['last_extended_hours_trade_price'] or quote['last_trade_price'])
+    last_close_price = Decimal(quote['previous_close'])
+    return (last_trade_price - last_close_price) / last_close_price
+
+  if sort_by == 'day':
+    instruments = sorted(instruments, key=day_change, reverse=True)
+  else:
+    instruments = sorted(instruments, key=lambda instrument: instrument['symbol'])
+
+  print(WATCHLIST_TABLE_ROW.format('', 'symbol', 'name', 'last', 'day', 'spread', 'pe', 'dy', 'buy', 'sell'))
+  for instrument in instruments:
+    instrument_id = instrument['id']
+    print(format_row(
+        instrument,
+        fundamental_by_id.get(instrument_id, {}),
+        rating_by_id.get(instrument_id, {}),
+        quote_by_id.get(instrument_id),
+        instrument_id in changed_ids))
+
+
+def watch_watchlist(client, watchlist_name, cache_mode, interval, sort_by, once):
+  try:
+    instruments, fundamental_by_id, rating_by_id = load_watchlist(client, watchlist_name, cache_mode)
+  except NotFound:
+    print('No watchlist named {}, there is {}'.format(
+        watchlist_name, ', '.join(watchlist['name'] for watchlist in client.get_watchlists(cache_mode=cache_mode)['results'])))
+    exit()
+  if not instruments:
+    print('Nothing to see here... Move along.')
+    exit()
+
+  # The stream merges every instrument into as few quotes requests as it can and
+  # only reports what changed since the last tick
+  stream = RobinhoodQuoteStream(client, interval)
+  changed_ids = set()
+  stream.subscribe([instrument['id'] for instrument in instruments], lambda instrument_id, changes, quote: changed_ids.add(instrument_id))
+  try:
+    while True:
+      started_at = time.monotonic()
+      stream.poll()
+      if once:
+        display_watchlist(instruments, fundamental_by_id, rating_by_id, stream.get_snapshot(), set(), sort_by)
+        return
+      if changed_ids:
+        print(CLEAR_SCREEN, end='')
+        print('{} ({} names) at {:%H:%M:%S}, every {}s, ctrl-c to stop'.format(
+            watchlist_name, len(instruments), datetime.now(), interval))
+        display_watchlist(instruments, fundamental_by_id, rating_by_id, stream.get_snapshot(), changed_ids, sort_by)
+        changed_ids.clear()
+      time.sleep(max(interval - (time.monotonic() - started_at), 0))
+  except KeyboardInterrupt:
+    pass
+
+
+if __name__ == '__main__':
+  run_in_daemon(__file__)
+  parser = argparse.ArgumentParser(description='A dashboard of every stock on a watchlist')
+  parser.add_argument('--name', default='Default', help='The watchlist to show')
+  parser.add_argument('--interval', type=float, default=5, help='Seconds between quote refreshes')
+  parser.add_argument('--sort', choices=['symbol', 'day'], default='symbol', help='Sort by symbol or by the day\'s change')
+  parser.add_argument('--once', action='store_true', help='Print the dashboard once instead of refreshing it in place')
+  parser.add_argument(
+      '--live',
+      action='store_true',
+      help='Force to not use cache for APIs where values change'
+  )
+  args = parser.parse_args()
+  client = get_client()
+  watch_watchlist(client, args.name, FORCE_LIVE if args.live else CACHE_FIRST, args.interval, args.sort, args.once)
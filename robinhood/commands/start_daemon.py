@@ -0,0 +1,18 @@
+import argparse
+import logging
+
+from robinhood.RobinhoodDaemon import RobinhoodDaemon, DAEMON_SOCKET_PATH
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Keep a warm client around for the other scripts to run in')
+  parser.add_argument('--socket', default=DAEMON_SOCKET_PATH, help='Unix socket to listen on')
+  args = parser.parse_args()
+
+  logging.basicConfig(level=logging.INFO)
+  daemon = RobinhoodDaemon(args.socket)
+  print('Listening on {}, ctrl-c to stop'.format(args.socket))
+  try:
+    daemon.serve_forever()
+  except KeyboardInterrupt:
+    print('Stopped')
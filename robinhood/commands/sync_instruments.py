@@ -0,0 +1,19 @@
+import argparse
+
+from robinhood.RobinhoodDaemon import get_client, run_in_daemon
+
+
+def sync_instruments(force):
+  instrument_universe = client.get_instrument_universe()
+  instrument_universe.sync(max_age=None if force else instrument_universe.DEFAULT_MAX_AGE)
+  print('Synced {} instruments'.format(len(instrument_universe)))
+  print('Tradable: {}'.format(len(instrument_universe.filter_instruments(tradability='tradable', state='active'))))
+
+
+if __name__ == '__main__':
+  run_in_daemon(__file__)
+  parser = argparse.ArgumentParser(description='Sync the full instrument listing locally')
+  parser.add_argument('--force', action='store_true', help='Sync even if the last sync is recent')
+  args = parser.parse_args()
+  client = get_client()
+  sync_instruments(args.force)
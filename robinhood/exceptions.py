@@ -15,3 +15,6 @@ class TooManyRequests(Exception):
 
 class Forbidden(Exception):
     pass
+
+class CorruptCacheEntry(Exception):
+    pass
@@ -0,0 +1,226 @@
+"""
+Black-Scholes pricing, greeks and implied volatility for whole options chains.
+
+Everything here works on columns (lists with one entry per contract) so a chain,
+or many chains at once, is priced in a single pass. Implied volatility is solved
+for every contract together, with contracts dropping out as they converge.
+
+Prices and rates are floats, not Decimals, since this is about speed rather
+than exact money.
+"""
+from datetime import datetime, timedelta
+from math import erfc, exp, log, pi, sqrt
+
+from .util import get_last_id_from_url
+
+# Annualized, continuously compounded
+DEFAULT_RISK_FREE_RATE = 0.02
+
+# Contracts stop trading at 4pm Eastern on their expiration date
+EXPIRATION_UTC_HOUR = 20
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+# Avoids dividing by zero for contracts expiring today
+MIN_TIME_TO_EXPIRATION = 1.0 / (365 * 24 * 60)
+
+MIN_VOLATILITY = 0.0001
+MAX_VOLATILITY = 5.0
+IMPLIED_VOLATILITY_TOLERANCE = 0.00001
+IMPLIED_VOLATILITY_MAX_ITERATIONS = 50
+
+
+def _broadcast(value, length):
+  return list(value) if isinstance(value, (list, tuple)) else [value] * length
+
+
+def _norm_cdf(x):
+  return 0.5 * erfc(-x / sqrt(2))
+
+
+def _norm_pdf(x):
+  return exp(-0.5 * x * x) / sqrt(2 * pi)
+
+
+def get_times_to_expiration(expiration_dates, as_of=None):
+  """Years until each expiration date (e.g. 2018-04-13) from as_of (default now, UTC)."""
+  as_of = as_of or datetime.utcnow()
+  times = []
+  for expiration_date in expiration_dates:
+    expires_at = datetime.strptime(expiration_date, '%Y-%m-%d') + timedelta(hours=EXPIRATION_UTC_HOUR)
+    times.append(max((expires_at - as_of).total_seconds() / SECONDS_PER_YEAR, MIN_TIME_TO_EXPIRATION))
+  return times
+
+
+def get_prices(spots, strikes, times, volatilities, is_calls, rate=DEFAULT_RISK_FREE_RATE, dividend_yield=0.0):
+  """
+  Theoretical prices per share. spots, volatilities, rate and dividend_yield can be
+  either a single value for every contract or a column.
+  """
+  return get_greeks(spots, strikes, times, volatilities, is_calls, rate, dividend_yield, only_price=True)['price']
+
+
+def get_greeks(spots, strikes, times, volatilities, is_calls, rate=DEFAULT_RISK_FREE_RATE, dividend_yield=0.0, only_price=False):
+  """
+  Returns columns of price, delta, gamma, theta (per calendar day) and vega (per
+  volatility point, i.e. 1%), the same units Robinhood's marketdata uses.
+  """
+  count = len(strikes)
+  spots = _broadcast(spots, count)
+  volatilities = _broadcast(volatilities, count)
+  rates = _broadcast(rate, count)
+  dividend_yields = _broadcast(dividend_yield, count)
+
+  columns = {'price': [], 'delta': [], 'gamma': [], 'theta': [], 'vega': []}
+  for s, k, t, v, is_call, r, q in zip(spots, strikes, times, volatilities, is_calls, rates, dividend_yields):
+    sqrt_t = sqrt(t)
+    v_sqrt_t = v * sqrt_t
+    d1 = (log(s / k) + (r - q + 0.5 * v * v) * t) / v_sqrt_t
+    d2 = d1 - v_sqrt_t
+    discounted_s = s * exp(-q * t)
+    discounted_k = k * exp(-r * t)
+    if is_call:
+      price = discounted_s * _norm_cdf(d1) - discounted_k * _norm_cdf(d2)
+    else:
+      price = discounted_k * _norm_cdf(-d2) - discounted_s * _norm_cdf(-d1)
+    columns['price'].append(price)
+    if only_price:
+      continue
+
+    pdf_d1 = _norm_pdf(d1)
+    decay = -discounted_s * pdf_d1 * v / (2 * sqrt_t)
+    if is_call:
+      delta = exp(-q * t) * _norm_cdf(d1)
+      theta = decay - r * discounted_k * _norm_cdf(d2) + q * discounted_s * _norm_cdf(d1)
+    else:
+      delta = exp(-q * t) * (_norm_cdf(d1) - 1)
+      theta = decay + r * discounted_k * _norm_cdf(-d2) - q * discounted_s * _norm_cdf(-d1)
+    columns['delta'].append(delta)
+    columns['gamma'].append(exp(-q * t) * pdf_d1 / (s * v_sqrt_t))
+    columns['theta'].append(theta / 365)
+    columns['vega'].append(discounted_s * pdf_d1 * sqrt_t / 100)
+  return columns
+
+
+def get_implied_volatilities(spots, strikes, times, prices, is_calls, rate=DEFAULT_RISK_FREE_RATE, dividend_yield=0.0):
+  """
+  Solves for the volatility that gives each price. Newton's method is used, falling
+  back to bisection whenever a step would leave the bracket, so every contract
+  converges. Contracts priced outside of what any volatility can give are None.
+  """
+  count = len(strikes)
+  spots = _broadcast(spots, count)
+  rates = _broadcast(rate, count)
+  dividend_yields = _broadcast(dividend_yield, count)
+
+  implied_volatilities = [None] * count
+  lows = [MIN_VOLATILITY] * count
+  highs = [MAX_VOLATILITY] * count
+  guesses = [0.3] * count
+
+  # Anything outside of the price range the bracket covers has no answer
+  low_prices = get_prices(spots, strikes, times, lows, is_calls, rates, dividend_yields)
+  high_prices = get_prices(spots, strikes, times, highs, is_calls, rates, dividend_yields)
+  active = [
+      i for i in range(count)
+      if prices[i] is not None and low_prices[i] <= prices[i] <= high_prices[i]
+  ]
+
+  for _ in range(IMPLIED_VOLATILITY_MAX_ITERATIONS):
+    if not active:
+      break
+    columns = get_greeks(
+        [spots[i] for i in active],
+        [strikes[i] for i in active],
+        [times[i] for i in active],
+        [guesses[i] for i in active],
+        [is_calls[i] for i in active],
+        [rates[i] for i in active],
+        [dividend_yields[i] for i in active])
+
+    still_active = []
+    for i, price, vega in zip(active, columns['price'], columns['vega']):
+      difference = price - prices[i]
+      if abs(difference) < IMPLIED_VOLATILITY_TOLERANCE:
+        implied_volatilities[i] = guesses[i]
+        continue
+      # Price goes up with volatility, so keep the bracket around the answer
+      if difference > 0:
+        highs[i] = guesses[i]
+      else:
+        lows[i] = guesses[i]
+      # vega is per volatility point
+      next_guess = guesses[i] - difference / (vega * 100) if vega > 0 else None
+      if next_guess is None or not lows[i] < next_guess < highs[i]:
+        next_guess = (lows[i] + highs[i]) / 2
+      guesses[i] = next_guess
+      still_active.append(i)
+    active = still_active
+
+  for i in active:
+    implied_volatilities[i] = guesses[i]
+  return implied_volatilities
+
+
+def price_chain(spots, options_instruments, options_marketdatas, rate=DEFAULT_RISK_FREE_RATE, dividend_yield=0.0, as_of=None):
+  """
+  Prices a whole chain (or several) from get_options_instruments and
+  get_options_marketdatas results.
+
+  Args:
+    spots: The underlying's price, or a column of them when pricing several chains
+    options_instruments: Contracts, in the same order as spots if that's a column
+    options_marketdatas: Marketdata for the contracts in any order, contracts without
+      any, or without a mark, get None for everything computed
+
+  Returns columns of id, strike, expiration_date, type, time_to_expiration,
+  mark_price, implied_volatility (solved from the mark) and the theoretical price
+  and greeks at that volatility.
+  """
+  options_marketdata_by_id = {
+      get_last_id_from_url(options_marketdata['instrument']): options_marketdata
+      # No quote, no mark to solve from
+      for options_marketdata in options_marketdatas
+      if options_marketdata and options_marketdata['adjusted_mark_price'] is not None
+  }
+
+  ids = [options_instrument['id'] for options_instrument in options_instruments]
+  strikes = [float(options_instrument['strike_price']) for options_instrument in options_instruments]
+  expiration_dates = [options_instrument['expiration_date'] for options_instrument in options_instruments]
+  types = [options_instrument['type'] for options_instrument in options_instruments]
+  is_calls = [options_type == 'call' for options_type in types]
+  times = get_times_to_expiration(expiration_dates, as_of=as_of)
+  mark_prices = [
+      float(options_marketdata_by_id[options_instrument_id]['adjusted_mark_price'])
+      if options_instrument_id in options_marketdata_by_id else None
+      for options_instrument_id in ids
+  ]
+
+  implied_volatilities = get_implied_volatilities(
+      spots, strikes, times, mark_prices, is_calls, rate=rate, dividend_yield=dividend_yield)
+
+  # Greeks only make sense where there was a volatility to solve for
+  solved = [i for i, v in enumerate(implied_volatilities) if v is not None]
+  solved_spots = [spots[i] for i in solved] if isinstance(spots, (list, tuple)) else spots
+  greeks = get_greeks(
+      solved_spots,
+      [strikes[i] for i in solved],
+      [times[i] for i in solved],
+      [implied_volatilities[i] for i in solved],
+      [is_calls[i] for i in solved],
+      rate=rate,
+      dividend_yield=dividend_yield)
+
+  columns = {
+      'id': ids,
+      'strike': strikes,
+      'expiration_date': expiration_dates,
+      'type': types,
+      'time_to_expiration': times,
+      'mark_price': mark_prices,
+      'implied_volatility': implied_volatilities,
+  }
+  for name, values in greeks.items():
+    column = [None] * len(ids)
+    for i, value in zip(solved, values):
+      column[i] = value
+    columns[name] = column
+  return columns
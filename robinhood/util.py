@@ -1,4 +1,6 @@
+from decimal import Decimal, InvalidOperation
 from urllib.parse import parse_qs, urlparse
+import argparse
 import os
 
 CURRENT_DIRECTORY = os.path.abspath(os.path.dirname(os.path.realpath(__file__)))
@@ -10,6 +12,15 @@ NUMMUS = 'NUMMUS'
 API = 'API'
 ANALYTICS = 'ANALYTICS'
 
+# Throttling for anything that makes requests concurrently
+MAX_CONCURRENT_REQUESTS = 8
+REQUESTS_PER_SECOND = 10
+REQUESTS_BURST = 10
+# Times to resubmit an order that may not have gone through, safe thanks to its ref_id
+ORDER_RETRIES = 2
+# Bytes at a time when streaming a download to disk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 
 ORDER_TYPES = [
     'market',
@@ -39,6 +50,14 @@ ORDER_STATES = [
     'canceled',
     'failed',
 ]
+# Orders in these states won't change anymore, the api spells it cancelled
+FINAL_ORDER_STATES = [
+    'filled',
+    'rejected',
+    'canceled',
+    'cancelled',
+    'failed',
+]
 TRADABILITY = [
     'tradable',
     'untradable',
@@ -88,6 +107,25 @@ ORDER_SIDE_TO_DIRECTION = {
 }
 
 
+def parse_decimal_argument(value):
+  """An argparse type for prices and strikes, bad input is a usage error rather than a traceback."""
+  try:
+    return Decimal(value)
+  except InvalidOperation:
+    raise argparse.ArgumentTypeError('{} is not a number'.format(value))
+
+
+def parse_positive_int_argument(value):
+  """An argparse type for counts that have to be at least 1."""
+  try:
+    number = int(value)
+  except ValueError:
+    raise argparse.ArgumentTypeError('{} is not a whole number'.format(value))
+  if number < 1:
+    raise argparse.ArgumentTypeError('{} has to be at least 1'.format(value))
+  return number
+
+
 def get_last_id_from_url(url):
   item_id = urlparse(url).path.split('/')[-2]
   # Make sure this is in the expected format
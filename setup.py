@@ -11,7 +11,10 @@ setup(
     version=__version__,
     license='Apache',
     keywords='Trade API for Robinhood',
-    packages=['robinhood'],
+    packages=['robinhood', 'robinhood.commands'],
+    entry_points={
+        'console_scripts': ['robinhood = robinhood.cli:main']
+    },
     package_data={
         'robinhood': ['certs/*']
     },